@@ -0,0 +1,80 @@
+"""
+bench_frontier.py
+
+Drains a frontier of synthetic URLs with 1, 2, 4 and 8 worker processes.
+Each URL takes WORK_SECONDS of simulated fetch time (sleep, so workers do
+not compete for CPU). Reports URLs/s per worker count, once for 8 hosts
+that allow many concurrent leases and once for 2 hosts limited to one
+lease each (throughput should stop growing at 2 workers), and checks no
+URL was processed twice.
+
+Usage: python bench_frontier.py [urls] [work_seconds]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from frontier import Frontier
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+URLS = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+WORK_SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+WORKER_LEVELS = [1, 2, 4, 8]
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def drain(path: str, owner: str, host_concurrency: int, done):
+    frontier = Frontier(path, host_concurrency=host_concurrency)
+    while True:
+        items = frontier.lease(owner, wait=10)
+        if not items:
+            break
+        time.sleep(WORK_SECONDS)
+        frontier.ack(items[0].url, owner)
+        done.put(items[0].url)
+    frontier.close()
+
+
+def run(workers: int, hosts: int, host_concurrency: int) -> float:
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "frontier.sqlite")
+        with Frontier(path, host_concurrency=host_concurrency) as frontier:
+            for host in range(hosts):
+                frontier.add([f"https://portal{host}.test/listing/{i}" for i in range(URLS // hosts)])
+        done = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=drain, args=(path, f"w{i}", host_concurrency, done)) for i in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        urls = [done.get() for _ in range(URLS // hosts * hosts)]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+        assert len(set(urls)) == len(urls), "a URL was processed twice"
+        return len(urls) / elapsed
+
+
+def main():
+    for hosts, host_concurrency in [(8, 16), (2, 1)]:
+        label = f"{hosts} hosts x {host_concurrency}"
+        base = None
+        for workers in WORKER_LEVELS:
+            rate = run(workers, hosts, host_concurrency)
+            base = base or rate
+            print(f"[INFO] {label:<18} workers={workers}  {rate:7.1f} URLs/s  (x{rate / base:.1f})")
+
+
+if __name__ == "__main__":
+    main()
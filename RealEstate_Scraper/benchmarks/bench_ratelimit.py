@@ -0,0 +1,69 @@
+"""
+bench_ratelimit.py
+
+Fetches pages from two local portals at once, a fast one and one that
+throttles (429 + Retry-After above its capacity), with a fixed per-host
+limit and with the adaptive rate limiter. Reports throughput and how many
+requests each portal refused.
+
+Usage: python bench_ratelimit.py [pages_per_portal] [slow_capacity_rps]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+sys.path.insert(0, PROJECT_ROOT)
+
+import fetcher
+from ratelimit import RateLimiter
+from throttle_server import ThrottleServer
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+SLOW_CAPACITY = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+FIXED_PER_HOST = 16
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+async def _fetch_portal(engine, urls: list) -> tuple:
+    start = time.perf_counter()
+    pages = await engine.fetch_many(urls)
+    return sum(1 for page in pages if page), time.perf_counter() - start
+
+
+def run(label: str, limiter: RateLimiter = None):
+    async def _run(fast_urls, slow_urls):
+        async with fetcher.StaticFetchEngine(per_host=FIXED_PER_HOST, limiter=limiter) as engine:
+            return await asyncio.gather(_fetch_portal(engine, fast_urls), _fetch_portal(engine, slow_urls))
+
+    with ThrottleServer(capacity=1000) as fast, ThrottleServer(capacity=SLOW_CAPACITY, latency=0.05, overload_latency=0.05) as slow:
+        (ok_fast, fast_seconds), (ok_slow, slow_seconds) = asyncio.run(_run(
+            [fast.url(f"/page/{i}") for i in range(PAGES)],
+            [slow.url(f"/page/{i}") for i in range(PAGES)],
+        ))
+        print(f"[INFO] {label:<9} fast {ok_fast}/{PAGES} ok in {fast_seconds:5.2f}s, {fast.counts['throttled']} refused   "
+              f"slow {ok_slow}/{PAGES} ok in {slow_seconds:5.2f}s, {slow.counts['throttled']} refused")
+        if limiter:
+            for host, stats in limiter.stats().items():
+                print(f"[INFO]           {host}: {stats['rps']} req/s, {stats['concurrency']} in flight at the end")
+
+
+def main():
+    logging.basicConfig(level=logging.CRITICAL)  # refused pages are expected here; keep the report readable
+    run("fixed")
+    run("adaptive", RateLimiter(max_rps=200.0, max_concurrency=FIXED_PER_HOST, target_latency=0.5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+bench_warc_replay.py
+
+Writes synthetic crawl archives (listing pages as WARC resource records),
+then:
+  1. reprocesses every archive with 1 and with N worker processes
+     (scraper.reprocess_archive, the same job as `scraper.py reprocess`);
+  2. reads random pages through the offset index vs scanning the file
+     from the start, to show what the .idx sidecar buys;
+  3. checks replay_pages() returns the latest crawl in page order.
+Reprocessing is CPU bound, so the speedup is capped by the cores available.
+
+Usage: python bench_warc_replay.py [archives] [pages_per_archive] [listings_per_page]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+sys.path.insert(0, PROJECT_ROOT)
+
+from warc import WarcReader, WarcWriter, find_archives, replay_pages
+import scraper
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+ARCHIVES = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+PAGES = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+LISTINGS = int(sys.argv[3]) if len(sys.argv) > 3 else 25
+PORTAL = "Street Easy (Sales)"
+RANDOM_READS = 200
+
+
+# -----------------------------
+# Synthetic archives
+# -----------------------------
+def listing_page(crawl: int, page: int) -> str:
+    cards = "".join(
+        f'<div class="listing-card"><span class="address">{crawl}-{page}-{n} Main St</span>'
+        f'<span class="price">${500000 + n * 1000:,}</span><span class="beds">{n % 5} bd</span>'
+        f'<span class="baths">{n % 3 + 1} ba</span><span class="sqft">{800 + n} sqft</span>'
+        f'<span class="agent">Agent {n}</span><span class="listing-date">2024-05-{n % 28 + 1:02d}</span>'
+        f'<a href="/listing/{crawl}-{page}-{n}">view</a></div>'
+        for n in range(LISTINGS)
+    )
+    return f"<html><body><div id='results'>{cards}</div></body></html>"
+
+
+def write_archives(folder: str) -> str:
+    start_url = "https://portal.test/search"
+    for crawl in range(ARCHIVES):
+        with WarcWriter(folder, prefix=f"bench{crawl:03d}", portal=PORTAL) as recorder:
+            for page in range(1, PAGES + 1):
+                recorder.write_resource(f"{start_url}?page={page}", listing_page(crawl, page), crawl=start_url, page=page)
+    return start_url
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def reprocess(paths: list, workers: int) -> tuple:
+    start = time.perf_counter()
+    if workers == 1:
+        results = [scraper.reprocess_archive(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(scraper.reprocess_archive, paths))
+    return time.perf_counter() - start, sum(len(r["rows"]) for r in results), sum(r["pages"] for r in results)
+
+
+def random_access(path: str) -> tuple:
+    with WarcReader(path) as reader:
+        entries = reader.index()
+        picks = [random.choice(entries) for _ in range(RANDOM_READS)]
+        start = time.perf_counter()
+        for entry in picks:
+            reader.read_at(entry.offset, entry.length)
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        for entry in picks[:RANDOM_READS // 10]:
+            next(record for record in reader.records() if record.offset == entry.offset)
+        scanned = (time.perf_counter() - start) * 10
+    return indexed / RANDOM_READS, scanned / RANDOM_READS
+
+
+def main():
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        start_url = write_archives(folder)
+        paths = find_archives(folder)
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"Wrote {len(paths)} archives x {PAGES} pages x {LISTINGS} listings "
+              f"({size / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s")
+
+        workers = os.cpu_count() or 1
+        for level in sorted({1, max(2, workers)}):
+            seconds, rows, pages = reprocess(paths, level)
+            print(f"reprocess  workers={level:<2}  {seconds:6.2f}s  {pages / seconds:7.0f} pages/s  {rows} rows")
+        if workers == 1:
+            print("(1 CPU available: worker processes cannot run in parallel here)")
+
+        indexed, scanned = random_access(paths[-1])
+        print(f"random page read: indexed {indexed * 1e3:.2f} ms, sequential scan {scanned * 1e3:.2f} ms")
+
+        pages = replay_pages(start_url, folder)
+        expected = [listing_page(ARCHIVES - 1, page) for page in range(1, PAGES + 1)]
+        print(f"replay_pages: {len(pages)} pages, latest crawl in order: {pages == expected}")
+
+
+if __name__ == "__main__":
+    main()
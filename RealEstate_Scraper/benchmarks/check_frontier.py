@@ -0,0 +1,132 @@
+"""
+check_frontier.py
+
+Checks the crawl frontier's leasing rules on a throw-away database:
+  1. URLs are deduplicated (normalized form) and leased by priority, then FIFO;
+  2. a host never has more than its max_in_flight URLs leased, and hosts
+     take turns;
+  3. an expired lease (worker died) is reaped: queued again, or failed after
+     max_attempts, and the dead worker's late ack is refused;
+  4. nack(retry_in) holds a URL back, requeue=True queues finished URLs again;
+  5. LeaseKeeper keeps a lease alive past lease_seconds;
+  6. a worker process killed while holding a lease loses it to another
+     process once it expires.
+Exits with status 1 if any check fails.
+
+Usage: python check_frontier.py
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from frontier import Frontier, LeaseKeeper
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+LEASE_SECONDS = 0.5  # short leases, so expiry can be checked quickly
+
+_failures = []
+
+
+def check(label: str, ok: bool, detail=""):
+    print(f"[{'OK' if ok else 'ERROR'}] {label}" + (f" ({detail})" if detail and not ok else ""))
+    if not ok:
+        _failures.append(label)
+
+
+# -----------------------------
+# Checks
+# -----------------------------
+def check_dedup_and_priority(path: str):
+    with Frontier(path, host_concurrency=10) as frontier:
+        added = frontier.add(["https://a.test/1", "https://a.test/2", "HTTPS://A.TEST/1#top"])
+        check("normalized duplicates are queued once", added == 2, f"added {added}")
+        frontier.add(["https://a.test/urgent"], priority=5)
+        urls = [item.url for item in frontier.lease("w1", count=3)]
+        check("higher priority first, then FIFO", urls == ["https://a.test/urgent", "https://a.test/1", "https://a.test/2"], urls)
+
+
+def check_host_limits(path: str):
+    with Frontier(path, host_concurrency=1, host_overrides={"wide.test": {"max_in_flight": 3}}) as frontier:
+        frontier.add([f"https://narrow.test/{n}" for n in range(3)] + [f"https://wide.test/{n}" for n in range(5)])
+        hosts = [item.host for item in frontier.lease("w1", count=10)]
+        check("host concurrency caps leases per host", hosts.count("narrow.test") == 1 and hosts.count("wide.test") == 3, hosts)
+        check("hosts take turns", hosts[:2] in (["narrow.test", "wide.test"], ["wide.test", "narrow.test"]), hosts)
+
+
+def check_expiry(path: str):
+    with Frontier(path, lease_seconds=LEASE_SECONDS, max_attempts=2) as frontier:
+        frontier.add(["https://c.test/job"])
+        first = frontier.lease("dead-worker")[0]
+        time.sleep(LEASE_SECONDS * 1.5)
+        again = frontier.lease("w2")
+        check("expired lease is re-queued for another worker", [item.url for item in again] == [first.url])
+        check("attempts are counted across leases", again and again[0].attempts == 2, again)
+        check("late ack from the dead worker is refused", not frontier.ack(first.url, "dead-worker"))
+        time.sleep(LEASE_SECONDS * 1.5)
+        check("URL fails once max_attempts leases expired", frontier.lease("w3") == [] and frontier.counts().get("failed") == 1, frontier.counts())
+
+
+def check_nack_and_requeue(path: str):
+    with Frontier(path) as frontier:
+        frontier.add(["https://d.test/retry"])
+        item = frontier.lease("w1")[0]
+        frontier.nack(item.url, "w1", "HTTP 503", retry_in=0.3)
+        check("nack(retry_in) holds the URL back", frontier.lease("w1") == [])
+        check("...and leases it again afterwards", len(frontier.lease("w1", wait=1)) == 1)
+        frontier.ack(item.url, "w1")
+        check("done URLs are not queued again", frontier.add([item.url]) == 0)
+        check("requeue=True queues them again", frontier.add([item.url], requeue=True) == 1)
+
+
+def check_lease_keeper(path: str):
+    with Frontier(path, lease_seconds=LEASE_SECONDS) as frontier:
+        frontier.add(["https://e.test/long"])
+        item = frontier.lease("w1")[0]
+        with LeaseKeeper(path, item.url, "w1", LEASE_SECONDS) as keeper:
+            time.sleep(LEASE_SECONDS * 3)
+            stolen = frontier.lease("w2")
+        check("LeaseKeeper keeps a long job's lease", stolen == [] and not keeper.lost)
+        check("the job's ack is accepted", frontier.ack(item.url, "w1"))
+
+
+def hold_lease(path: str):
+    frontier = Frontier(path, lease_seconds=LEASE_SECONDS)
+    frontier.lease("crashing-worker")
+    time.sleep(60)  # killed before it can ack
+
+
+def check_killed_worker(path: str):
+    with Frontier(path, lease_seconds=LEASE_SECONDS) as frontier:
+        frontier.add(["https://f.test/crash"])
+    worker = multiprocessing.Process(target=hold_lease, args=(path,))
+    worker.start()
+    with Frontier(path, lease_seconds=LEASE_SECONDS) as frontier:
+        while frontier.counts().get("leased", 0) == 0:
+            time.sleep(0.05)
+        worker.kill()
+        worker.join()
+        items = frontier.lease("survivor", wait=LEASE_SECONDS * 4)
+        check("killed worker's URL is leased by another process", [item.url for item in items] == ["https://f.test/crash"], items)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        for n, run in enumerate([check_dedup_and_priority, check_host_limits, check_expiry,
+                                 check_nack_and_requeue, check_lease_keeper, check_killed_worker]):
+            run(os.path.join(folder, f"frontier{n}.sqlite"))
+    print(f"\n{len(_failures)} check(s) failed" if _failures else "\nAll frontier checks passed")
+    sys.exit(1 if _failures else 0)
+
+
+if __name__ == "__main__":
+    main()
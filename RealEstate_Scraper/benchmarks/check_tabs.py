@@ -0,0 +1,194 @@
+"""
+check_tabs.py
+
+Checks multi-tab pagination (fetcher.fetch_pages_in_tabs) without Chrome:
+a stand-in driver gives every tab its own page, ready after a random load
+time, so later pages often finish before earlier ones. Checks that
+  1. pages come back in page order, and WARC records carry page numbers in order;
+  2. no more than `tabs` pages load at once (and more than one does);
+  3. a host limiter's concurrency caps the pages in flight;
+  4. a page that never loads is returned as "" in its place;
+  5. with windowed pagination links, `more` (later_page_urls) finds the
+     pages beyond the first window, each fetched once;
+  6. the extra tabs are closed and the driver is back on its first tab.
+Exits with status 1 if any check fails.
+
+Usage: python check_tabs.py [pages]
+"""
+
+import os
+import random
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+import fetcher
+from driver_pool import DriverLease
+from ratelimit import HostLimiter
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+TABS = 4
+MAX_LOAD_SECONDS = 0.3  # stand-in page load times are uniform in 0..this
+LINK_WINDOW = 3         # pagination links shown around the current page
+START_URL = "https://portal.test/search?sort=new&page=1"
+
+_failures = []
+
+
+def check(label: str, ok: bool, detail=""):
+    print(f"[{'OK' if ok else 'ERROR'}] {label}" + (f" ({detail})" if detail and not ok else ""))
+    if not ok:
+        _failures.append(label)
+
+
+# -----------------------------
+# Stand-in browser
+# -----------------------------
+def page_url(page: int) -> str:
+    return START_URL.replace("page=1", f"page={page}")
+
+
+def page_html(page: int) -> str:
+    return f"<div class='listing-card'>Listing on page {page}</div>"
+
+
+def page_of(url: str) -> int:
+    return int(parse_qs(urlsplit(url).query)["page"][0])
+
+
+class StandInDriver:
+    """Just enough of a WebDriver for fetch_pages_in_tabs: tabs, navigation and the fetcher's scripts."""
+
+    def __init__(self, total=PAGES, broken=(), seed=0):
+        self.total = total
+        self.broken = set(broken)
+        self.rng = random.Random(seed)
+        self.tabs = {"main": {"url": START_URL, "ready_at": 0.0, "read": True}}
+        self.current_window_handle = "main"
+        self.switch_to = self  # switch_to.new_window() / switch_to.window()
+        self.loads = []        # pages in navigation order
+        self.max_in_flight = 0
+
+    # Tabs
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    @property
+    def current_url(self):
+        return self.tabs[self.current_window_handle]["url"]
+
+    def new_window(self, kind="tab"):
+        handle = f"tab{len(self.tabs)}"
+        self.tabs[handle] = {"url": "about:blank", "ready_at": 0.0, "read": True}
+        self.current_window_handle = handle
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def close(self):
+        del self.tabs[self.current_window_handle]
+
+    def execute_cdp_cmd(self, command, params):
+        return {}
+
+    # Scripts
+    def execute_script(self, script, *args):
+        tab = self.tabs[self.current_window_handle]
+        if script == fetcher.NAVIGATE_JS:
+            tab.update(url=args[0], ready_at=time.monotonic() + self.rng.uniform(0, MAX_LOAD_SECONDS), read=False)
+            self.loads.append(page_of(args[0]))
+            self.max_in_flight = max(self.max_in_flight, sum(not t["read"] for t in self.tabs.values()))
+            return None
+        if script == fetcher.PAGE_READY_JS:
+            page = page_of(tab["url"])
+            if page in self.broken or time.monotonic() < tab["ready_at"]:
+                return None
+            tab["read"] = True
+            return page_html(page)
+        if script == fetcher.PAGE_LINKS_JS:
+            page = page_of(tab["url"])
+            hrefs = [page_url(n) for n in range(max(1, page - LINK_WINDOW), min(self.total, page + LINK_WINDOW) + 1)]
+            return {"hrefs": hrefs, "text": ""}  # no "Page x of N": the total is only known from the links
+        raise ValueError(f"Unexpected script: {script[:60]!r}")
+
+
+class PageRecorder:
+    """Stands in for WarcWriter: keeps the page numbers pages were archived under."""
+
+    def __init__(self):
+        self.pages = []
+
+    def write_resource(self, url, body, crawl=None, page=None):
+        self.pages.append((page, page_of(url)))
+
+
+# -----------------------------
+# Checks
+# -----------------------------
+def fetch(driver, urls, **kwargs) -> tuple:
+    lease = DriverLease(driver)
+    start = time.perf_counter()
+    pages = fetcher.fetch_pages_in_tabs(lease, urls, container_selector="#results", **kwargs)
+    return pages, time.perf_counter() - start
+
+
+def check_order():
+    driver, recorder = StandInDriver(), PageRecorder()
+    urls = [page_url(n) for n in range(2, PAGES + 1)]
+    pages, seconds = fetch(driver, urls, tabs=TABS, recorder=recorder, crawl=START_URL)
+    check("pages returned in page order", pages == [page_html(n) for n in range(2, PAGES + 1)])
+    check("WARC records numbered in page order", recorder.pages == [(n, n) for n in range(2, PAGES + 1)], recorder.pages)
+    check(f"at most {TABS} pages loading at once, and more than one", 1 < driver.max_in_flight <= TABS, driver.max_in_flight)
+    check("extra tabs closed, back on the first tab", driver.window_handles == ["main"] and driver.current_window_handle == "main")
+    print(f"[INFO] {len(pages)} pages in {TABS} tabs: {seconds:.2f}s")
+
+
+def check_host_limit():
+    driver = StandInDriver(seed=1)
+    host = HostLimiter("portal.test", rps=1000, burst=1000, concurrency=2, max_concurrency=2)
+    pages, _ = fetch(driver, [page_url(n) for n in range(2, PAGES + 1)], tabs=TABS, host=host)
+    check("host limiter caps pages in flight at its concurrency (2)", driver.max_in_flight == 2, driver.max_in_flight)
+    check("...still in page order", pages == [page_html(n) for n in range(2, PAGES + 1)])
+
+
+def check_broken_page():
+    driver = StandInDriver(total=6, broken={4}, seed=2)
+    load_timeout, fetcher.LOAD_TIMEOUT = fetcher.LOAD_TIMEOUT, 1
+    try:
+        pages, _ = fetch(driver, [page_url(n) for n in range(2, 7)], tabs=TABS)
+    finally:
+        fetcher.LOAD_TIMEOUT = load_timeout
+    check("page that never loads is returned as \"\" in its place",
+          pages == [page_html(2), page_html(3), "", page_html(5), page_html(6)], pages)
+
+
+def check_windowed_links():
+    driver = StandInDriver(seed=3)
+    first = fetcher.infer_page_pattern(START_URL, driver.execute_script(fetcher.PAGE_LINKS_JS)["hrefs"])
+    urls = first.urls()
+    pages, _ = fetch(driver, urls, tabs=TABS, more=fetcher.later_page_urls)
+    check(f"first page links only pages 2..{1 + LINK_WINDOW}", len(urls) == LINK_WINDOW, urls)
+    check(f"`more` finds every page up to {PAGES}", pages == [page_html(n) for n in range(2, PAGES + 1)], len(pages))
+    check("...each loaded once", sorted(driver.loads) == list(range(2, PAGES + 1)), driver.loads)
+
+
+def main():
+    check_order()
+    check_host_limit()
+    check_broken_page()
+    check_windowed_links()
+    print(f"\n{len(_failures)} check(s) failed" if _failures else "\nAll multi-tab checks passed")
+    sys.exit(1 if _failures else 0)
+
+
+if __name__ == "__main__":
+    main()
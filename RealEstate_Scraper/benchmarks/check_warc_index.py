@@ -0,0 +1,119 @@
+"""
+check_warc_index.py
+
+Checks that a WARC archive's offset index survives damage: writes one
+archive with static (response) and browser (resource) records, then
+compares WarcReader.index() and the pages read through it against the
+writer's own sidecar when
+  1. the .idx sidecar is missing (rebuilt by scanning the file);
+  2. the sidecar lost its last lines (crash before the index was flushed);
+  3. the sidecar's last line is torn (crash mid-write);
+  4. the archive's last record is torn (it is dropped, the rest is kept);
+and that replay_pages() still returns the crawl in page order.
+Exits with status 1 if any check fails.
+
+Usage: python check_warc_index.py [pages]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from warc import WarcReader, WarcWriter, find_archives, replay_pages
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+START_URL = "https://portal.test/search"
+STATIC_URL = "https://portal.test/static/{n}"
+
+_failures = []
+
+
+def check(label: str, ok: bool, detail=""):
+    print(f"[{'OK' if ok else 'ERROR'}] {label}" + (f" ({detail})" if detail and not ok else ""))
+    if not ok:
+        _failures.append(label)
+
+
+# -----------------------------
+# Archive
+# -----------------------------
+def page_html(page: int) -> str:
+    return f"<div id='results'><div class='listing-card'>Listing {page}: {'é' * page}</div></div>"
+
+
+def write_archive(folder: str) -> str:
+    with WarcWriter(folder, prefix="check", portal="Check Portal") as recorder:
+        for page in range(1, PAGES + 1):
+            recorder.write_resource(f"{START_URL}?page={page}", page_html(page), crawl=START_URL, page=page)
+            if page % 5 == 0:
+                recorder.write_response(STATIC_URL.format(n=page), page_html(page), status=200, headers={"Content-Type": "text/html"})
+    return recorder.paths[0]
+
+
+def read_index(path: str) -> tuple:
+    """(index entries, bodies read through them)."""
+    with WarcReader(path) as reader:
+        entries = reader.index()
+        return entries, [reader.read_at(entry.offset, entry.length).body for entry in entries]
+
+
+# -----------------------------
+# Checks
+# -----------------------------
+def damaged_copy(path: str, folder: str, label: str) -> str:
+    copy = os.path.join(folder, label, os.path.basename(path))
+    os.makedirs(os.path.dirname(copy))
+    shutil.copy(path, copy)
+    shutil.copy(path + ".idx", copy + ".idx")
+    return copy
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        original = write_archive(os.path.join(folder, "original"))
+        expected, bodies = read_index(original)
+        check(f"writer's sidecar lists every page record ({len(expected)})", len(expected) == PAGES + PAGES // 5)
+        check("bodies read through the index match what was written",
+              [body for entry, body in zip(expected, bodies) if entry.type == "resource"] == [page_html(p) for p in range(1, PAGES + 1)])
+
+        copy = damaged_copy(original, folder, "missing")
+        os.remove(copy + ".idx")
+        check("missing sidecar: index rebuilt by scanning", read_index(copy) == (expected, bodies))
+
+        copy = damaged_copy(original, folder, "short")
+        with open(copy + ".idx", encoding="utf-8") as f:
+            lines = f.readlines()
+        with open(copy + ".idx", "w", encoding="utf-8") as f:
+            f.writelines(lines[:len(lines) // 2])
+        check("short sidecar: later records found by scanning", read_index(copy) == (expected, bodies))
+
+        copy = damaged_copy(original, folder, "torn-idx")
+        with open(copy + ".idx", "w", encoding="utf-8") as f:
+            f.writelines(lines[:-1])
+            f.write(lines[-1][:len(lines[-1]) // 2])
+        check("torn sidecar line: ignored, record found by scanning", read_index(copy) == (expected, bodies))
+
+        copy = damaged_copy(original, folder, "torn-warc")
+        os.remove(copy + ".idx")
+        with open(copy, "r+b") as f:
+            f.truncate(expected[-1].offset + expected[-1].length // 2)
+        check("torn last record: dropped, the rest kept", read_index(copy) == (expected[:-1], bodies[:-1]))
+
+        pages = replay_pages(START_URL, archives=find_archives(os.path.join(folder, "missing")))
+        check("replay_pages without a sidecar: crawl in page order", pages == [page_html(p) for p in range(1, PAGES + 1)])
+
+    print(f"\n{len(_failures)} check(s) failed" if _failures else "\nAll WARC index checks passed")
+    sys.exit(1 if _failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+throttle_server.py
+
+Local HTTP server that behaves like a portal under load, used by the
+benchmarks. It admits `capacity` requests per second (token bucket) and
+answers the rest with 429 + Retry-After; each response is delayed by
+`latency` plus `overload_latency` for every other request in flight.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+
+# -----------------------------
+# Request handler
+# -----------------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real portals
+
+    def do_GET(self):
+        server = self.server
+        admitted, in_flight = server.admit()
+        try:
+            if not admitted:
+                server.count("throttled")
+                self._send(429, b"slow down", {"Retry-After": str(server.retry_after)})
+                return
+            time.sleep(server.latency + server.overload_latency * (in_flight - 1))
+            server.count("ok")
+            self._send(200, server.body)
+        finally:
+            server.release()
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+
+# -----------------------------
+# Server
+# -----------------------------
+class ThrottleServer:
+    """
+    Threaded local server with a request budget.
+    Usage: `with ThrottleServer(capacity=20) as server: fetch(server.url("/page/1"))`
+    """
+
+    def __init__(self, capacity=20.0, latency=0.02, overload_latency=0.01, retry_after=1, body="<html><body>listing</body></html>"):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.handle_error = lambda request, client_address: None  # clients hanging up mid-response are expected
+        self.httpd.capacity = capacity
+        self.httpd.latency = latency
+        self.httpd.overload_latency = overload_latency
+        self.httpd.retry_after = retry_after
+        self.httpd.body = body.encode("utf-8")
+        self.httpd.counts = {"ok": 0, "throttled": 0}
+        self.httpd.in_flight = 0
+        self.httpd.tokens = capacity
+        self.httpd.refilled = time.monotonic()
+        self.httpd.lock = threading.Lock()
+        self.httpd.admit = self._admit
+        self.httpd.release = self._release
+        self.httpd.count = self._count
+        self._thread = None
+
+    def _admit(self):
+        httpd = self.httpd
+        with httpd.lock:
+            now = time.monotonic()
+            httpd.tokens = min(httpd.capacity, httpd.tokens + (now - httpd.refilled) * httpd.capacity)
+            httpd.refilled = now
+            httpd.in_flight += 1
+            if httpd.tokens < 1:
+                return False, httpd.in_flight
+            httpd.tokens -= 1
+            return True, httpd.in_flight
+
+    def _release(self):
+        with self.httpd.lock:
+            self.httpd.in_flight -= 1
+
+    def _count(self, name):
+        with self.httpd.lock:
+            self.httpd.counts[name] += 1
+
+    @property
+    def counts(self) -> dict:
+        return dict(self.httpd.counts)
+
+    def url(self, path: str) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
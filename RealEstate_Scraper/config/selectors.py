@@ -0,0 +1,67 @@
+"""
+selectors.py
+
+Site-specific extraction schemas for the real estate portals.
+If a portal changes its HTML, only this file needs editing: the parser
+compiles each schema once into an extraction plan (parser.compile_plan).
+"""
+
+
+
+# -----------------------------
+# Schema format
+# -----------------------------
+# "block"  : CSS selector for one listing card
+# "fields" : field name -> rule, matched inside the card
+#     "css"     : CSS selector (the first match is used)
+#     "attr"    : read this attribute instead of the element's text (optional)
+#     "type"    : "text" (default), "number", "date" or "url"
+#                 url values are made absolute against the portal URL; number and
+#                 date values stay strings here and are typed by the cleaner
+#     "default" : value when nothing matches (default "")
+# A portal schema only lists what differs from DEFAULT_SCHEMA; a field set
+# to None is not extracted for that portal.
+FIELD_TYPES = ("text", "number", "date", "url")
+
+
+# -----------------------------
+# Listing schemas
+# -----------------------------
+DEFAULT_SCHEMA = {
+    "block": "[data-testid='property-card'], .listing-card, .property-card",
+    "fields": {
+        "address": {"css": "[data-testid='address'], .address"},
+        "price": {"css": "[data-testid='price'], .price", "type": "number"},
+        "beds": {"css": "[data-testid='beds'], .beds", "type": "number"},
+        "baths": {"css": "[data-testid='baths'], .baths", "type": "number"},
+        "sqft": {"css": "[data-testid='sqft'], .sqft", "type": "number"},
+        "agent": {"css": "[data-testid='agent'], .agent"},
+        "date": {"css": "[data-testid='listing-date'], .listing-date", "type": "date"},
+        "url": {"css": "a[href]", "attr": "href", "type": "url"},
+    },
+}
+
+# Commercial listings carry no bedroom / bathroom counts
+COMMERCIAL = {"fields": {"beds": None, "baths": None}}
+
+# Per-portal schemas, keyed by the portal name used in START_URLS.
+PORTAL_SCHEMAS = {
+    "Staten Island MLS": {},
+    "Brooklyn MLS (Sales)": {},
+    "Street Easy (Sales)": {},
+    "Street Easy (Rentals)": {},
+    "One Key MLS (Sales)": {},
+    "One Key MLS (Rentals)": {},
+    "One Key MLS (Commercial Sales)": COMMERCIAL,
+    "One Key MLS (Commercial Rentals)": COMMERCIAL,
+}
+
+
+def get_schema(portal: str) -> dict:
+    """Return the schema for a portal (DEFAULT_SCHEMA + the portal's overrides)."""
+    override = PORTAL_SCHEMAS.get(portal, {})
+    fields = {**DEFAULT_SCHEMA["fields"], **override.get("fields", {})}
+    return {
+        "block": override.get("block", DEFAULT_SCHEMA["block"]),
+        "fields": {name: rule for name, rule in fields.items() if rule is not None},
+    }
@@ -0,0 +1,110 @@
+"""
+settings.py
+
+Configurable settings for the real estate scraper (browsers, delays, retries, etc.).
+"""
+
+
+
+# -----------------------------
+# Browser pool
+# -----------------------------
+DRIVER_POOL_SIZE = 1      # warm headless browsers kept per process
+DRIVER_MAX_PAGES = 200    # recycle a browser after this many page loads
+DRIVER_MAX_RSS_MB = 1024  # recycle a browser once its process tree uses this much memory
+
+
+# -----------------------------
+# Parallel portals
+# -----------------------------
+PORTAL_WORKERS = None     # portal worker processes; None = min(number of portals, CPU cores)
+
+
+# -----------------------------
+# Crawl frontier (work queue shared by portal workers)
+# -----------------------------
+FRONTIER_FILE = "data/frontier.sqlite"  # relative to the project root; workers on other machines may share the file
+FRONTIER_LEASE_SECONDS = 120     # a crashed worker's portal is queued again after this (leases are renewed while it runs)
+FRONTIER_MAX_ATTEMPTS = 3        # leases per URL before it is marked failed
+FRONTIER_HOST_CONCURRENCY = 2    # portals / URLs of one host worked on at the same time
+FRONTIER_HOST_DELAY = 0.0        # seconds between two leases of the same host
+FRONTIER_HOSTS = {}              # host -> {"max_in_flight": n, "delay": seconds}
+FRONTIER_QUEUE_LISTINGS = False  # record discovered listing detail URLs (kind "listing"); off until a detail-page stage leases them
+
+
+# -----------------------------
+# Fetching
+# -----------------------------
+FETCH_MODES = {}          # portal name -> "static", "dynamic" or "replay" (default: dynamic / Selenium)
+PAGINATION_MODES = {      # portal name -> "replace" (default: Next replaces the results), "delta" or "tabs"
+    "Street Easy (Sales)": "delta",    # results are appended (infinite scroll / "Load more"):
+    "Street Easy (Rentals)": "delta",  # capture only the listing cards added by each step
+}                         # "tabs": pages have their own URLs (?page=N); load PAGE_TABS of them at once
+PAGE_TABS = 4             # tabs per browser for "tabs" pagination (falls back to clicking Next without a URL pattern)
+
+
+# -----------------------------
+# Adaptive rate limiting (per host, static and dynamic fetches)
+# -----------------------------
+# Token-bucket pacing plus AIMD: limits grow while a host answers within the
+# target latency and are halved on slow responses, 429s, 5xx and errors;
+# Retry-After pauses the host. Limits are per worker process.
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_START_RPS = 2.0          # requests per second a host starts at
+RATE_LIMIT_MIN_RPS = 0.2
+RATE_LIMIT_MAX_RPS = 50.0
+RATE_LIMIT_BURST = 4                # requests a host may bank while idle
+RATE_LIMIT_START_CONCURRENCY = 2    # requests in flight per host (static fetches)
+RATE_LIMIT_MAX_CONCURRENCY = 16
+RATE_LIMIT_TARGET_LATENCY = 2.0     # seconds; slower static responses count as congestion
+RATE_LIMIT_DYNAMIC_TARGET_LATENCY = 10.0  # seconds for a browser page (load or Next click until new content)
+RATE_LIMIT_HOSTS = {}               # host -> overrides, e.g. {"streeteasy.com": {"max_rps": 1.0}}
+
+REPLAY = False            # True = every portal is served from the WARC archives (no browser, no network)
+
+
+# -----------------------------
+# WARC archive (data/raw/warc)
+# -----------------------------
+WARC_RECORD = False       # archive every fetched page (URL, time, headers, body) as .warc.gz + offset index
+WARC_DIR = "data/raw/warc"  # relative to the project root; one sub-folder per portal
+WARC_MAX_MB = 1024        # compressed size of one archive file before a new one is started
+REPROCESS_WORKERS = None  # processes for `scraper.py reprocess`; None = CPU cores
+
+# -----------------------------
+# HTTP response cache (static fetches)
+# -----------------------------
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_TTL = 6 * 3600        # seconds served without revalidation
+HTTP_CACHE_MAX_MB = 2048         # compressed size kept in data/raw/http_cache before LRU eviction
+HTTP_CACHE_OFFLINE = False       # True = serve only from cache, never touch the network
+
+
+# -----------------------------
+# Lean browser profile (dynamic fetches)
+# -----------------------------
+LEAN_BROWSER = True              # block resources the parsers never read
+BLOCKED_RESOURCE_TYPES = ["image", "media", "font", "stylesheet"]  # drop "stylesheet" for portals whose Next button needs CSS to be clickable
+BLOCKED_URL_PATTERNS = [         # Network.setBlockedURLs patterns ("*" wildcards): trackers and analytics
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*newrelic.com*", "*nr-data.net*", "*segment.io*",
+]
+PAGE_LOAD_STRATEGY = "eager"     # "eager" returns after DOMContentLoaded, "normal" waits for every subresource
+
+
+# -----------------------------
+# Export
+# -----------------------------
+EXPORT_PARQUET = True            # also append rows to output/parquet (partitioned by portal and scrape date; needs pyarrow)
+PARQUET_ROW_GROUP_SIZE = 50000   # rows per Parquet row group
+WAREHOUSE_ENABLED = True         # also upsert rows into data/warehouse.sqlite (SQLite, WAL)
+WAREHOUSE_BATCH_SIZE = 1000      # rows per executemany transaction
+
+
+# -----------------------------
+# Logging and metrics
+# -----------------------------
+LOG_LEVEL = "INFO"               # DEBUG adds per-page parser/fetcher detail
+LOG_FILE = "logs/scraper.log"    # relative to the project root; None = console only
+METRICS_FILE = "logs/metrics.json"       # run summary: counters and latency histograms per portal
+METRICS_PROM_FILE = "logs/metrics.prom"  # same metrics, Prometheus text format (node_exporter textfile collector)
@@ -1,12 +1,13 @@
 """
 cleaner.py
 
-Module to clean and standardize supporter data before export.
+Module to clean and standardize listing data before export.
 """
 
-print("[INFO] --- Installing 'CLEANER' libraries...")
-
+import re
+from collections import Counter
 from datetime import datetime
+from metrics import METRICS
 
 
 
@@ -14,7 +15,92 @@ from datetime import datetime
 # -----------------------------
 # Configuration
 # -----------------------------
+DATE_FORMATS = ["%m/%d/%Y", "%Y-%m-%d", "%B %d, %Y", "%b %d, %Y", "%d %B %Y"]
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
 
 # -----------------------------
 # Cleaning functions
-# -----------------------------
\ No newline at end of file
+# -----------------------------
+def _first_number(text: str):
+    """Return the first number in a string (commas ignored), or None."""
+    match = NUMBER_PATTERN.search(text.replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def clean_price(price_str: str) -> float:
+    """Convert price string (e.g., "$1,250,000") to float."""
+    value = _first_number(price_str or "")
+    return value if value is not None else 0.0
+
+
+def clean_sqft(sqft_str: str) -> int:
+    """Convert square footage string to integer."""
+    value = _first_number(sqft_str or "")
+    return int(value) if value is not None else 0
+
+
+def clean_beds(beds_str: str) -> int:
+    """Extract integer from bedroom count string ("Studio" counts as 0)."""
+    value = _first_number(beds_str or "")
+    return int(value) if value is not None else 0
+
+
+def clean_baths(baths_str: str) -> float:
+    """Extract number (including halves) from bathroom string."""
+    value = _first_number(baths_str or "")
+    return value if value is not None else 0.0
+
+
+def clean_date(date_str: str) -> str:
+    """Standardize listing date to YYYY-MM-DD format."""
+    date_str = (date_str or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return ""
+
+
+def _rejected_fields(entry: dict, row: dict) -> list:
+    """Fields whose raw value was present but cleaned to the 0 / "" fallback."""
+    rejected = []
+    for field in ("price", "beds", "baths", "sqft"):
+        raw = (entry.get(field) or "").strip()
+        if row[field] == 0 and raw and _first_number(raw) is None and raw.lower() != "studio":
+            rejected.append(field)
+    if not row["date"] and (entry.get("date") or "").strip():
+        rejected.append("date")
+    return rejected
+
+
+def clean_data(data_list: list) -> list:
+    """Apply cleaning to entire dataset and drop duplicates by address + price."""
+
+    cleaned = []
+    seen = set()
+    rejected = Counter()
+    for entry in data_list:
+        row = {
+            "address": entry.get("address", "").strip(),
+            "price": clean_price(entry.get("price", "")),
+            "beds": clean_beds(entry.get("beds", "")),
+            "baths": clean_baths(entry.get("baths", "")),
+            "sqft": clean_sqft(entry.get("sqft", "")),
+            "agent": entry.get("agent", "").strip(),
+            "date": clean_date(entry.get("date", "")),
+            "url": entry.get("url", "").strip(),
+        }
+        rejected.update(_rejected_fields(entry, row))
+        key = (row["address"].lower(), row["price"])
+        if key in seen:
+            continue
+        seen.add(key)
+        cleaned.append(row)
+
+    METRICS.inc("rows_cleaned_total", len(data_list))
+    METRICS.inc("duplicates_dropped_total", len(data_list) - len(cleaned))
+    for field, count in rejected.items():
+        METRICS.inc("values_rejected_total", count, column=field)
+    return cleaned
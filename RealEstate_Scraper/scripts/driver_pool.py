@@ -0,0 +1,348 @@
+"""
+driver_pool.py
+
+Pool of warm headless Chrome drivers shared by fetch jobs.
+Drivers are leased to one job at a time, reset between leases and
+recycled once they reach a page or memory budget.
+"""
+import logging
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil  # optional: enables the memory budget
+except ImportError:
+    psutil = None
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+POOL_SIZE = 2              # warm browsers kept per process
+MAX_PAGES_PER_DRIVER = 200 # recycle a browser after this many page loads
+MAX_RSS_MB = 1024          # recycle a browser once its process tree uses this much memory
+
+# Lean fetch profile: requests the parsers never read are blocked in the browser
+BLOCKED_RESOURCE_TYPES = ["image", "media", "font", "stylesheet"]
+BLOCKED_URL_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*newrelic.com*", "*nr-data.net*", "*segment.io*",
+]
+PAGE_LOAD_STRATEGY = "eager"  # return after DOMContentLoaded instead of waiting for every subresource
+
+# resource type -> URL patterns for Network.setBlockedURLs (which only matches URLs)
+RESOURCE_TYPE_PATTERNS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"],
+    "media": ["mp4", "webm", "ogg", "mp3", "wav", "m3u8"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheet": ["css"],
+}
+
+DRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "realestate_scraper", "chromedriver.json")
+DRIVER_CACHE_TTL = 7 * 24 * 3600  # seconds a resolved chromedriver path is reused before webdriver_manager checks for updates
+
+_driver_path = None        # chromedriver path, resolved once per process
+_driver_path_lock = threading.Lock()
+_default_pool = None
+
+
+# -----------------------------
+# Creating Driver Setup
+# -----------------------------
+def _read_cached_driver_path(cache_file=DRIVER_CACHE_FILE, ttl=DRIVER_CACHE_TTL):
+    """chromedriver path saved by an earlier run, or None if missing, expired or deleted."""
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    path = entry.get("path")
+    if not path or not os.path.isfile(path) or time.time() - entry.get("resolved_at", 0) > ttl:
+        return None
+    return path
+
+
+def _write_cached_driver_path(path: str, cache_file=DRIVER_CACHE_FILE):
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump({"path": path, "resolved_at": time.time()}, f)
+    except OSError as e:
+        logger.warning(f"Could not cache chromedriver path: {e}")
+
+
+def resolve_driver_path(refresh=False) -> str:
+    """
+    Resolve the chromedriver binary once per process. The path is cached on
+    disk (DRIVER_CACHE_FILE) for DRIVER_CACHE_TTL, so later runs and portal
+    workers skip webdriver_manager and its network check. refresh=True
+    resolves it again.
+    """
+    global _driver_path
+
+    with _driver_path_lock:
+        if _driver_path is None or refresh:
+            path = None if refresh else _read_cached_driver_path()
+            if path is None:
+                from webdriver_manager.chrome import ChromeDriverManager  # slow import + network, only on a cache miss
+                path = ChromeDriverManager().install()
+                _write_cached_driver_path(path)
+            _driver_path = path
+        return _driver_path
+
+
+def blocked_url_patterns(resource_types=None, url_patterns=None) -> list:
+    """Expand blocked resource types into URL patterns and add the explicit ones."""
+    patterns = []
+    for resource_type in resource_types or []:
+        for ext in RESOURCE_TYPE_PATTERNS.get(resource_type, []):
+            patterns += [f"*.{ext}", f"*.{ext}?*"]
+    return patterns + list(url_patterns or [])
+
+
+def get_driver(lean=False, resource_types=None, url_patterns=None, page_load_strategy=None):
+    """
+    Set up and return a configured headless Chrome driver.
+    lean=True applies the lean fetch profile: images are not loaded or decoded,
+    requests matching the blocked resource types / URL patterns are refused
+    through CDP Network.setBlockedURLs, and pages load with an eager strategy.
+    Arguments left as None fall back to the module configuration.
+    """
+    options = Options()
+    options.add_argument("--headless")  # run without opening a browser window
+    options.add_argument("--no-sandbox")
+    options.add_argument("--log-level=3")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    if lean:
+        options.add_argument("--blink-settings=imagesEnabled=false")  # skip image decoding
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        options.page_load_strategy = page_load_strategy or PAGE_LOAD_STRATEGY
+
+    # Pass Service + Options
+    try:
+        driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+    except SessionNotCreatedException as e:
+        # Usually a cached chromedriver that no longer matches an updated Chrome
+        logger.warning(f"Chrome did not start with the cached chromedriver, resolving it again: {e.msg}")
+        driver = webdriver.Chrome(service=Service(resolve_driver_path(refresh=True)), options=options)
+
+    if lean:
+        patterns = blocked_url_patterns(
+            BLOCKED_RESOURCE_TYPES if resource_types is None else resource_types,
+            BLOCKED_URL_PATTERNS if url_patterns is None else url_patterns,
+        )
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        driver.blocked_url_patterns = patterns  # re-applied to every tab opened by open_tab()
+    return driver
+
+
+def open_tab(driver) -> str:
+    """
+    Open a new tab, switch to it and return its window handle.
+    CDP URL blocking is per tab, so the lean profile's patterns are applied again.
+    """
+    driver.switch_to.new_window("tab")
+    patterns = getattr(driver, "blocked_url_patterns", None)
+    if patterns:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    return driver.current_window_handle
+
+
+def driver_rss_mb(driver) -> float:
+    """Resident memory of the chromedriver + browser process tree, in MB (0 if unknown)."""
+    if psutil is None:
+        return 0.0
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+# -----------------------------
+# Leases
+# -----------------------------
+class DriverLease:
+    """A driver checked out of the pool. Call `page_loaded()` after every page."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+    def page_loaded(self, count=1):
+        self.pages += count
+
+
+def reset_driver(driver):
+    """Clear cookies, storage and extra tabs so the next lease starts clean."""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+    try:
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    except Exception:
+        pass  # about:blank and some error pages have no storage
+    driver.delete_all_cookies()
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    driver.get("about:blank")
+
+
+# -----------------------------
+# Driver Pool
+# -----------------------------
+class DriverPool:
+    """
+    Keeps up to `size` warm browsers and leases them to fetch jobs.
+    `driver_kwargs` are passed to get_driver() for every browser in the pool.
+    Usage: `with pool.lease() as lease: lease.driver.get(url)`
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER, max_rss_mb=MAX_RSS_MB, warm=True, driver_kwargs=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.driver_kwargs = driver_kwargs or {}
+        self._idle = deque()
+        self._pages = {}            # id(driver) -> pages served since the driver was created
+        self._created = 0
+        self._cond = threading.Condition()  # guards _idle and _created; notified whenever a driver or a slot frees up
+        self._closed = False
+        if warm:
+            self.warm()
+
+    def warm(self, count=None):
+        """Start browsers up front so the first lease does not pay startup."""
+        for _ in range(min(count or self.size, self.size)):
+            with self._cond:
+                if self._created >= self.size:
+                    break
+                self._created += 1
+            driver = self._start()
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    def _start(self):
+        """Start a browser for a slot already reserved in `_created` (the slot is given back if it fails)."""
+        try:
+            driver = get_driver(**self.driver_kwargs)
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        self._pages[id(driver)] = 0
+        METRICS.inc("drivers_started_total")
+        return driver
+
+    def _destroy(self, driver):
+        self._pages.pop(id(driver), None)
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()  # a waiter may start a browser in the freed slot
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Could not quit driver cleanly: {e}")
+
+    def _acquire(self, timeout=None):
+        """An idle driver, a new one if the pool has room, else wait for either (TimeoutError after `timeout`)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.popleft()
+                if self._created < self.size:
+                    self._created += 1  # reserve the slot; the browser starts outside the lock
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No driver became available within {timeout}s")
+                self._cond.wait(remaining)
+        return self._start()
+
+    def _release(self, lease: DriverLease):
+        driver = lease.driver
+        self._pages[id(driver)] = self._pages.get(id(driver), 0) + lease.pages
+        pages = self._pages[id(driver)]
+
+        recycle = self._closed or pages >= self.max_pages
+        if recycle and not self._closed:
+            METRICS.inc("drivers_recycled_total", reason="pages")
+        if not recycle and self.max_rss_mb:
+            rss = driver_rss_mb(driver)
+            if rss >= self.max_rss_mb:
+                logger.info(f"Recycling driver at {rss:.0f} MB")
+                METRICS.inc("drivers_recycled_total", reason="memory")
+                recycle = True
+
+        if not recycle:
+            try:
+                reset_driver(driver)
+            except Exception as e:
+                logger.warning(f"Driver reset failed, recycling it: {e}")
+                METRICS.inc("drivers_recycled_total", reason="reset_failed")
+                recycle = True
+
+        if recycle:
+            self._destroy(driver)
+        else:
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Lease a warm driver for one job; it is reset or recycled on exit."""
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+        lease = DriverLease(self._acquire(timeout))
+        try:
+            yield lease
+        finally:
+            self._release(lease)
+
+    def close(self):
+        """Quit every idle browser. Leased browsers are quit when released."""
+        self._closed = True
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for driver in idle:
+            self._destroy(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_pool() -> DriverPool:
+    """Process-wide default pool, created lazily and closed at exit."""
+    global _default_pool
+
+    if _default_pool is None:
+        _default_pool = DriverPool(warm=False)
+        atexit.register(_default_pool.close)
+    return _default_pool
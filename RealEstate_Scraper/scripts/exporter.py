@@ -1,18 +1,205 @@
 """
 exporter.py
 
-Module to export cleaned supporter data to CSV.
+Module to export cleaned listing data to CSV/JSON, and to a
+Parquet dataset partitioned by portal and scrape date.
 """
-print("[INFO] --- Installing 'EXPORTER' libraries...")
-
+import logging
+import glob
+import os
+import time
+import uuid
+from datetime import date
+from urllib.parse import quote
 import pandas as pd
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa  # optional: enables the Parquet backend
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
 
 
 
 # -----------------------------
 # Configuration
 # -----------------------------
+PARQUET_ROW_GROUP_SIZE = 50000  # rows buffered per partition before a row group is written
+PARTITION_COLUMNS = ["portal", "scrape_date"]
+
+if pa is not None:
+    # Columns stored in each Parquet file; portal and scrape_date live in the partition path
+    LISTING_SCHEMA = pa.schema([
+        ("address", pa.string()),
+        ("price", pa.float64()),
+        ("beds", pa.int32()),
+        ("baths", pa.float64()),
+        ("sqft", pa.int32()),
+        ("agent", pa.string()),
+        ("date", pa.date32()),
+        ("url", pa.string()),
+    ])
+    PARTITION_SCHEMA = pa.schema([
+        ("portal", pa.dictionary(pa.int32(), pa.string())),  # categorical
+        ("scrape_date", pa.date32()),
+    ])
 
 # -----------------------------
 # Export functions
-# -----------------------------
\ No newline at end of file
+# -----------------------------
+def export_to_csv(data_list: list, output_path: str, columns: list = None):
+    """Save the cleaned data to a CSV file."""
+    df = pd.DataFrame(data_list, columns=columns)
+    df.to_csv(output_path, index=False)
+    METRICS.inc("bytes_written_total", os.path.getsize(output_path), sink="csv")
+    METRICS.inc("rows_written_total", len(df), sink="csv")
+    logger.info(f"CSV exported to: {output_path}")
+
+
+def export_to_json(data_list: list, output_path: str):
+    """Save the cleaned data to a JSON file."""
+    df = pd.DataFrame(data_list)
+    df.to_json(output_path, orient="records", indent=2)
+    METRICS.inc("bytes_written_total", os.path.getsize(output_path), sink="json")
+    METRICS.inc("rows_written_total", len(df), sink="json")
+    logger.info(f"JSON exported to: {output_path}")
+
+
+def validate_output(data_list: list, required_fields: list) -> bool:
+    """Ensure required fields exist (and are non-empty) in all rows."""
+    for index, row in enumerate(data_list):
+        missing = [field for field in required_fields if not row.get(field)]
+        if missing:
+            logger.warning(f"Row {index} is missing {missing}")
+            return False
+    return True
+
+
+# -----------------------------
+# Parquet backend
+# -----------------------------
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The Parquet backend needs pyarrow: pip install pyarrow")
+
+
+def _to_table(rows: list) -> "pa.Table":
+    """Build a typed Arrow table (LISTING_SCHEMA) from cleaned rows; empty dates become nulls."""
+    columns = {}
+    for field in LISTING_SCHEMA:
+        values = [row.get(field.name) for row in rows]
+        if field.name == "date":
+            values = [date.fromisoformat(value) if value else None for value in values]
+        columns[field.name] = values
+    return pa.Table.from_pydict(columns, schema=LISTING_SCHEMA)
+
+
+class ParquetDatasetWriter:
+    """
+    Appends cleaned rows to a hive-partitioned Parquet dataset:
+    <root>/portal=<name>/scrape_date=<YYYY-MM-DD>/part-<run>.parquet
+    Rows are buffered per partition and written as one row group every
+    `row_group_size` rows, so memory stays bounded however much is appended.
+    Each run writes new part files; earlier files are never rewritten.
+    Usage: `with ParquetDatasetWriter(root) as writer: writer.write(rows)`
+    """
+
+    def __init__(self, root: str, scrape_date: date = None, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        _require_pyarrow()
+        self.root = root
+        self.scrape_date = scrape_date or date.today()
+        self.row_group_size = row_group_size
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.rows_written = 0
+        self._buffers = {}  # portal -> rows waiting for the next row group
+        self._writers = {}  # portal -> open pq.ParquetWriter
+        self._paths = {}    # portal -> part file path
+
+    def partition_dir(self, portal: str) -> str:
+        # Values are URI-encoded, as pyarrow's hive partitioning expects
+        return os.path.join(
+            self.root,
+            f"portal={quote(portal, safe='')}",
+            f"scrape_date={self.scrape_date.isoformat()}",
+        )
+
+    def write(self, rows: list):
+        """Append rows (each with a "portal" key); full row groups are written immediately."""
+        for row in rows:
+            buffer = self._buffers.setdefault(row.get("portal") or "unknown", [])
+            buffer.append(row)
+            if len(buffer) >= self.row_group_size:
+                self._flush(row.get("portal") or "unknown")
+
+    def _flush(self, portal: str):
+        rows = self._buffers.pop(portal, [])
+        if not rows:
+            return
+        writer = self._writers.get(portal)
+        if writer is None:
+            directory = self.partition_dir(portal)
+            os.makedirs(directory, exist_ok=True)
+            path = self._paths[portal] = os.path.join(directory, f"part-{self.run_id}.parquet")
+            writer = self._writers[portal] = pq.ParquetWriter(path, LISTING_SCHEMA, compression="zstd")
+        writer.write_table(_to_table(rows), row_group_size=self.row_group_size)
+        self.rows_written += len(rows)
+        METRICS.inc("rows_written_total", len(rows), sink="parquet", portal=portal)
+
+    def close(self):
+        """Write the remaining partial row groups and finalize every file footer."""
+        for portal in list(self._buffers):
+            self._flush(portal)
+        for portal, writer in self._writers.items():
+            writer.close()
+            METRICS.inc("bytes_written_total", os.path.getsize(self._paths[portal]), sink="parquet", portal=portal)
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_to_parquet(data_list: list, root: str, scrape_date: date = None, row_group_size=PARQUET_ROW_GROUP_SIZE) -> int:
+    """Append the cleaned data to the partitioned Parquet dataset at `root`. Returns rows written."""
+    with ParquetDatasetWriter(root, scrape_date=scrape_date, row_group_size=row_group_size) as writer:
+        writer.write(data_list)
+    logger.info(f"Parquet exported to: {root} ({writer.rows_written} rows)")
+    return writer.rows_written
+
+
+def read_parquet(root: str, columns: list = None, portals: list = None, since: date = None) -> pd.DataFrame:
+    """
+    Read the partitioned dataset, loading only `columns` and the partitions
+    matching `portals` / scrape dates on or after `since`.
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(root, format="parquet", partitioning=ds.HivePartitioning.discover(schema=PARTITION_SCHEMA))
+    expression = None
+    if portals:
+        expression = ds.field("portal").isin(portals)
+    if since:
+        condition = ds.field("scrape_date") >= since
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def validate_parquet(root: str, schema=None) -> bool:
+    """
+    Check every Parquet file under `root` against the listing schema.
+    Only file footers are read (pq.read_schema), never the row data.
+    """
+    _require_pyarrow()
+    schema = schema or LISTING_SCHEMA
+    paths = [root] if os.path.isfile(root) else glob.glob(os.path.join(root, "**", "*.parquet"), recursive=True)
+    for path in paths:
+        file_schema = pq.read_schema(path)
+        if not file_schema.remove_metadata().equals(schema.remove_metadata()):
+            logger.warning(f"Schema mismatch in {path}: {file_schema}")
+            return False
+    return True
@@ -1,49 +1,818 @@
 """
 fetcher.py
 
-Module to fetch HTML content from TeamWater.org.
+Module to fetch HTML content from the real estate portals.
 Supports static and dynamic pages, as well as pagination.
+Dynamic pagination either captures the whole container per page
+("replace") or, for portals that append results (infinite scroll,
+"Load more"), only the records added since the last capture ("delta").
+Portals whose pages have their own URLs (?page=N, an offset, /page/N) can
+instead be loaded several tabs at a time ("tabs").
 """
-print("[INFO] --- Installing 'FETCHER' libraries...")
-
+import logging
+import os
+import re
 import time
-import requests
-from selenium import webdriver
+import asyncio
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException, ElementNotInteractableException
+from driver_pool import DriverPool, driver_rss_mb, get_driver, get_pool, open_tab
+from http_cache import ResponseCache
+from metrics import METRICS
+from ratelimit import RateLimiter, parse_retry_after, unlimited_slot
+from warc import WARC_DIR, WarcWriter, replay_pages, slugify
+
+logger = logging.getLogger(__name__)
 
 
 
 # -----------------------------
 # Configuration
 # -----------------------------
-driver = None
-prev_html = None
-next_button = None
-html = []
+CONTAINER_SELECTOR = "body"  # element whose innerHTML holds one page of listings (override per portal)
+
+# Static fetch engine
+STATIC_PER_HOST = 4          # concurrent requests allowed against one host
+STATIC_MAX_CONNECTIONS = 32  # size of the shared keep-alive connection pool
+STATIC_TIMEOUT = 30          # total seconds allowed per request
+STATIC_RETRIES = 3           # retries after a 429 / 5xx response
+STATIC_RETRY_BACKOFF = 1.0   # seconds before the first retry without a rate limiter (doubles per retry)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Dynamic fetches
+LOAD_TIMEOUT = 30            # seconds to wait for the first page's container
+CHANGE_TIMEOUT = 60          # seconds to wait for the next page's content (shortened by the rate limiter once latency is known)
+ERROR_SCREENSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "error_screenshots")  # None = no screenshots
+
+# Delta pagination (cumulative containers)
+PAGINATION_MODES = ("replace", "delta", "tabs")
+LOAD_MORE_TEXTS = ("next", "load more", "show more", "see more", "more results")  # button texts, compared lower-case
+SCROLL_END_TIMEOUT = 10      # seconds without new records after a scroll before the results count as exhausted
+
+# Multi-tab pagination (URL-addressable pages)
+PAGE_TABS = 4                # tabs loading result pages at the same time in one browser
+PAGE_PARAMS = ("page", "p", "pg", "pagenum", "page_number", "pagenumber", "currentpage")  # query parameters, compared lower-case
+OFFSET_PARAMS = ("offset", "start", "from", "skip")
+PAGE_PATH_RE = re.compile(r"^(?P<base>.*?)(?P<token>/(?:page|p)[-/]?)(?P<n>\d+)/?$", re.IGNORECASE)
+TOTAL_PAGES_RE = re.compile(r"\bpage\s+\d+\s+of\s+([\d,]+)|\bof\s+([\d,]+)\s+pages\b", re.IGNORECASE)
 
 
 # -----------------------------
-# Creating Driver Setup
+# Pagination Session
 # -----------------------------
-def get_driver():
-    options = Options()
-    options.add_argument("--headless")  # run without opening a browser window
-    options.add_argument("--no-sandbox")
-    options.add_argument("--log-level=3")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+class PageSession:
+    """
+    Pagination state for one fetch job on a leased driver.
+    Replaces the old module globals (driver, prev_html, next_button, html)
+    so several fetches can run in the same process.
+    """
 
-    # Pass Service + Options
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=options)
+    def __init__(self, driver):
+        self.driver = driver
+        self.prev_html = None
+        self.next_button = None
+        self.trigger = None  # delta pagination: "button" or "scroll"
+        self.pages = []
 
 
 # -----------------------------
 # Custom Expected Conditions
-# -----------------------------
\ No newline at end of file
+# -----------------------------
+def innerHTMLChanged(locator, oldHTML=""):
+    """
+    Custom Expected Condition:
+    Wait until the innerHTML of the given locator is different from `oldHTML`.
+    Returns: WebElement if changed, otherwise False.
+    """
+
+    def _predicate(driver):
+        try:
+            element_ = driver.find_element(*locator)
+            if element_.get_attribute('innerHTML') != oldHTML:
+                return element_ # return the element (not just HTML string)
+            return False
+        except:
+            return False
+        
+    return _predicate
+
+
+def findNextButton(locator, searchText=""):
+    """
+    Custom expected condition:
+    Waits for an element (or multiple) matching locator to contain the given text.
+    Returns the element if found, otherwise False.
+    """
+
+    def _predicate(driver):
+        try:
+            elements_ = driver.find_elements(*locator) # find multiple
+            for element_ in elements_:
+                if element_.text.strip() == searchText:
+                    return element_ # success: return the matching element
+            return False
+        except Exception as e:
+            logger.error(f"findNextButton failed: {e}")
+            return False
+        
+    return _predicate
+
+
+# Browser-side record cursor for delta pagination, one per record selector
+# (window.__scraperCursors). Records are compared by key: a data-id style
+# attribute, else the first link, else the text. If the first and last
+# records seen are still in place the container is cumulative and only the
+# records after them are new; otherwise the results were replaced and all
+# records are captured again.
+_RECORD_CURSOR_JS = """
+const selector = arguments[0];
+const records = document.querySelectorAll(selector);
+const cursors = window.__scraperCursors || (window.__scraperCursors = {});
+const cursor = cursors[selector];
+const key = (el) => el.getAttribute("data-id") || el.getAttribute("data-key") || el.getAttribute("data-listing-id")
+    || (el.querySelector("a[href]") || {}).href || el.textContent;
+const n = cursor ? cursor.count : 0;
+const kept = n > 0 && records.length >= n && key(records[0]) === cursor.firstKey && key(records[n - 1]) === cursor.lastKey;
+"""
+
+RECORDS_CHANGED_JS = _RECORD_CURSOR_JS + """
+if (!records.length) return false;
+return !cursor || !kept || records.length > n;
+"""
+
+CAPTURE_RECORDS_JS = _RECORD_CURSOR_JS + """
+const start = kept ? n : 0;
+const parts = [];
+for (let i = start; i < records.length; i++) parts.push(records[i].outerHTML);
+if (records.length) {
+    cursors[selector] = {count: records.length, firstKey: key(records[0]), lastKey: key(records[records.length - 1])};
+}
+return {html: parts.join("\\n"), added: parts.length, total: records.length, cumulative: kept};
+"""
+
+SCROLL_TO_LAST_RECORD_JS = """
+const records = document.querySelectorAll(arguments[0]);
+if (records.length) records[records.length - 1].scrollIntoView({block: "end"});
+window.scrollTo(0, document.body.scrollHeight);
+"""
+
+
+def recordsChanged(record_selector: str):
+    """
+    Custom Expected Condition:
+    Wait until records were added after the cursor, or the records were replaced.
+    Only a boolean crosses the wire per poll, however many records the page holds.
+    """
+
+    def _predicate(driver):
+        try:
+            return driver.execute_script(RECORDS_CHANGED_JS, record_selector)
+        except Exception:
+            return False
+
+    return _predicate
+
+
+def captureNewRecords(driver, record_selector: str) -> dict:
+    """
+    Serialize the records added since the last capture (all of them on the
+    first capture, or when the results were replaced) and advance the cursor.
+    Returns {"html", "added", "total", "cumulative"}.
+    """
+    return driver.execute_script(CAPTURE_RECORDS_JS, record_selector)
+
+
+def timed_wait(driver, timeout, condition, name: str):
+    """WebDriverWait(driver, timeout).until(condition), timed into webdriver_wait_seconds{condition=name}."""
+    with METRICS.timer("webdriver_wait_seconds", condition=name):
+        return WebDriverWait(driver, timeout).until(condition)
+
+
+def save_error_screenshot(driver, label: str, folder=ERROR_SCREENSHOT_DIR):
+    """Save a screenshot for debugging as <folder>/<time>-<label>.png (never raises)."""
+    if not folder:
+        return None
+    path = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}-{slugify(label)}.png")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        driver.save_screenshot(path)
+        return path
+    except Exception as e:
+        logger.warning(f"Could not save error screenshot: {e}")
+        return None
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+def openNextPage(session: PageSession, delay=0):
+    """
+    Click the 'Next' button if available.
+    Returns True if navigation succeeded, False otherwise.
+    """
+    driver = session.driver
+    next_btn = (By.TAG_NAME, "button")
+    # time.sleep(delay)
+
+    try:
+        # Look for 'Next' button if not already found
+        if not session.next_button:
+            session.next_button = timed_wait(driver, 30, findNextButton(next_btn, "Next"), "next_button")
+
+        # Confirm the 'Next' button is clickable/active
+        isClickable = timed_wait(driver, 30, EC.element_to_be_clickable(session.next_button), "clickable")
+        # EC.element_to_be_clickable(next_btn)
+        if not isClickable:
+            return False
+        
+        # Click the 'Next' button
+        try:
+            session.next_button.click()  # Normal click (preferred)
+            logger.debug("Redirecting to next page.")
+            return True
+        except Exception:
+            logger.warning("Normal click failed, using JS click instead")
+            try:
+                driver.execute_script("arguments[0].click();", session.next_button)
+                return True
+            except Exception as e:
+                logger.error("JS click also failed")
+                return False
+    
+    # Combined exception handling for clarity
+    except:
+        return False
+
+
+def findLoadMoreButton(driver):
+    """The visible 'Next' / 'Load more' style button on the page, or None (no waiting)."""
+    for element_ in driver.find_elements(By.TAG_NAME, "button"):
+        try:
+            if element_.text.strip().lower() in LOAD_MORE_TEXTS and element_.is_displayed():
+                return element_
+        except StaleElementReferenceException:
+            continue
+    return None
+
+
+def loadMore(session: PageSession, record_selector: str) -> bool:
+    """
+    Ask a cumulative page for more records: click its 'Next' / 'Load more'
+    button, or scroll to the last record when it has none (infinite scroll).
+    Returns False once the button is gone or disabled.
+    """
+    driver = session.driver
+    if session.trigger is None:
+        session.next_button = findLoadMoreButton(driver)
+        session.trigger = "button" if session.next_button else "scroll"
+        logger.debug(f"Loading more records by {session.trigger}")
+
+    if session.trigger == "scroll":
+        driver.execute_script(SCROLL_TO_LAST_RECORD_JS, record_selector)
+        return True
+
+    for _ in range(2):  # the button may have been re-rendered since the last click
+        try:
+            if not session.next_button.is_enabled():
+                return False
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", session.next_button)
+            try:
+                session.next_button.click()
+            except ElementNotInteractableException:
+                driver.execute_script("arguments[0].click();", session.next_button)
+            return True
+        except StaleElementReferenceException:
+            session.next_button = findLoadMoreButton(driver)
+            if session.next_button is None:
+                return False
+    return False
+
+
+# -----------------------------
+# Multi-tab pagination
+# -----------------------------
+class PageURLPattern:
+    """
+    How page N of a result list is addressed: a query parameter holding the
+    page number or a record offset, or a /page/N path segment.
+    Usage: `for url in pattern.urls(): ...` (the pages after the current one)
+    """
+
+    def __init__(self, url: str, kind: str, key: str, first: int, step: int, total: int, current: int = 1):
+        self.url = url          # URL of the current page
+        self.kind = kind        # "query" or "path"
+        self.key = key          # query parameter name, or the path up to the page number
+        self.first = first      # parameter value of page 1
+        self.step = step        # 1 for page numbers, the page size for offsets
+        self.total = total      # number of pages
+        self.current = current  # page number of `url`
+
+    def page_url(self, page: int) -> str:
+        value = str(self.first + (page - 1) * self.step)
+        parts = urlsplit(self.url)
+        if self.kind == "path":
+            return urlunsplit(parts._replace(path=self.key + value))
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != self.key]
+        return urlunsplit(parts._replace(query=urlencode(query + [(self.key, value)])))
+
+    def urls(self) -> list:
+        """URLs of the pages after the current one."""
+        return [self.page_url(page) for page in range(self.current + 1, self.total + 1)]
+
+    def __repr__(self):
+        return f"PageURLPattern({self.kind} {self.key!r}, first={self.first}, step={self.step}, pages {self.current}..{self.total})"
+
+
+def infer_page_pattern(url: str, hrefs: list, text: str = "") -> PageURLPattern:
+    """
+    Work out how result pages are addressed from the links on the current
+    page (pagination links differ from `url` only in a page / offset
+    parameter or a /page/N segment) and how many there are (the highest
+    linked page, or "Page 1 of N" in `text`). Returns None if the pages
+    are not URL-addressable or there is no later page.
+    """
+    here = urlsplit(url)
+    here_query = dict(parse_qsl(here.query, keep_blank_values=True))
+    here_path = PAGE_PATH_RE.match(here.path)
+    seen = {}  # (kind, key) -> values linked
+    for href in hrefs:
+        link = urlsplit(urljoin(url, href))
+        if link.netloc != here.netloc:
+            continue
+        if link.path == here.path:
+            query = dict(parse_qsl(link.query, keep_blank_values=True))
+            changed = [k for k in here_query.keys() | query.keys() if here_query.get(k) != query.get(k)]
+            if len(changed) == 1 and changed[0].lower() in PAGE_PARAMS + OFFSET_PARAMS and query.get(changed[0], "").isdigit():
+                seen.setdefault(("query", changed[0]), set()).add(int(query[changed[0]]))
+        elif link.query == here.query:
+            match = PAGE_PATH_RE.match(link.path)
+            same_list = match and (here_path["base"] + here_path["token"] == match["base"] + match["token"] if here_path
+                                   else here.path.rstrip("/") == match["base"].rstrip("/"))
+            if same_list:
+                seen.setdefault(("path", match["base"] + match["token"]), set()).add(int(match["n"]))
+    if not seen:
+        return None
+
+    (kind, key), values = max(seen.items(), key=lambda item: (len(item[1]), item[0][0] == "query"))
+    if kind == "query":
+        current_value = int(here_query[key]) if here_query.get(key, "").isdigit() else None
+    else:
+        current_value = int(here_path["n"]) if here_path else None
+    if kind == "query" and key.lower() in OFFSET_PARAMS:
+        values = sorted(values | {current_value or 0})
+        step = min((b - a for a, b in zip(values, values[1:]) if b > a), default=0)
+        if not step:
+            return None
+        first = values[0]
+    else:
+        values = sorted(values | ({current_value} if current_value is not None else set()))
+        step = 1
+        first = 0 if values[0] == 0 else 1
+    current = 1 if current_value is None else (current_value - first) // step + 1
+    total = (values[-1] - first) // step + 1
+
+    match = TOTAL_PAGES_RE.search(text or "")
+    if match:
+        total = max(total, int((match[1] or match[2]).replace(",", "")))
+    if total <= current:
+        return None
+    return PageURLPattern(url, kind, key, first, step, total, current)
+
+
+# Links and "Page x of N" text of the current page, for infer_page_pattern
+PAGE_LINKS_JS = """
+const text = (document.body && document.body.innerText || "").match(/page\\s+\\d+\\s+of\\s+[\\d,]+|of\\s+[\\d,]+\\s+pages/i);
+return {hrefs: Array.from(document.querySelectorAll("a[href]"), (a) => a.href), text: text ? text[0] : ""};
+"""
+
+# Navigate without blocking: the next document starts without the marker
+NAVIGATE_JS = "window.__scraperStale = true; window.location.href = arguments[0];"
+
+# The container's innerHTML once the new document has it, else null
+PAGE_READY_JS = """
+if (window.__scraperStale || document.readyState === "loading") return null;
+const container = document.querySelector(arguments[0]);
+return container ? container.innerHTML : null;
+"""
+
+
+def discover_page_pattern(driver) -> PageURLPattern:
+    """infer_page_pattern() for the page open in `driver`."""
+    try:
+        found = driver.execute_script(PAGE_LINKS_JS)
+    except Exception as e:
+        logger.warning(f"Could not read pagination links: {e}")
+        return None
+    return infer_page_pattern(driver.current_url, found.get("hrefs") or [], found.get("text") or "")
+
+
+def later_page_urls(driver) -> list:
+    """URLs of the pages after the one open in `driver` ([] if none are linked)."""
+    pattern = discover_page_pattern(driver)
+    return pattern.urls() if pattern else []
+
+
+def pageReady(container_selector: str):
+    """Custom Expected Condition: the container HTML of the newly loaded document in the current tab."""
+
+    def _predicate(driver):
+        try:
+            return driver.execute_script(PAGE_READY_JS, container_selector)
+        except Exception:
+            return None
+
+    return _predicate
+
+
+def fetch_pages_in_tabs(lease, urls: list, tabs=PAGE_TABS, container_selector=CONTAINER_SELECTOR, host=None, recorder: WarcWriter = None, crawl: str = None, first_page=2, more=None) -> list:
+    """
+    Load `urls` in up to `tabs` tabs of the leased browser at once and return
+    their container HTML in page order. Each tab is given its next page as
+    soon as its previous one has been captured, so the browser keeps loading
+    while pages are read; a host limiter (`host`) bounds how many are in
+    flight. A page that does not load is returned as "" to keep positions.
+    When every URL is done, `more(driver)` is asked (on the tab holding the
+    last page) for the URLs after it, e.g. pages beyond the ones the first
+    page linked to.
+    """
+    driver = lease.driver
+    main = driver.current_window_handle
+    urls = list(urls)
+    known = set(urls)
+    handles = []
+    pages = []
+    pending = deque()  # (url, tab handle, load start), in page order
+    position = 0
+    try:
+        for _ in range(max(1, min(tabs, len(urls)))):
+            handles.append(open_tab(driver))
+        free = deque(handles)
+        while position < len(urls) or pending:
+            while free and position < len(urls):
+                if host:
+                    if not pending:
+                        host.acquire()
+                    elif not host.try_acquire():
+                        break  # the host allows no more in flight: read a page first
+                handle = free.popleft()
+                driver.switch_to.window(handle)
+                driver.execute_script(NAVIGATE_JS, urls[position])
+                pending.append((urls[position], handle, time.perf_counter()))
+                position += 1
+
+            page_url, handle, start = pending.popleft()
+            driver.switch_to.window(handle)
+            timeout = host.wait_timeout(LOAD_TIMEOUT) if host else LOAD_TIMEOUT
+            try:
+                html = timed_wait(driver, timeout, pageReady(container_selector), "tab_page")
+                if host:
+                    host.feedback(time.perf_counter() - start)
+                METRICS.observe("fetch_seconds", time.perf_counter() - start, mode="dynamic")
+                METRICS.inc("pages_fetched_total", mode="dynamic")
+            except Exception as e:
+                if host:
+                    host.feedback(time.perf_counter() - start, error=True)
+                logger.error(f"Could not load {page_url} in a tab: {e.__class__.__name__}")
+                METRICS.inc("fetch_errors_total", mode="dynamic")
+                html = ""
+            pages.append(html)
+            METRICS.inc("bytes_captured_total", len(html), pagination="tabs")
+            if recorder and html:
+                recorder.write_resource(page_url, html, crawl=crawl, page=first_page + len(pages) - 1)
+            lease.page_loaded()
+            if more and html and position == len(urls) and not pending:
+                further = [u for u in more(driver) if u not in known]
+                urls += further
+                known.update(further)
+            free.append(handle)
+    finally:
+        for url, handle, start in pending:  # only left over after an error
+            if host:
+                host.release()
+        for handle in handles:
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass  # the pool resets the driver (and closes stray tabs) on return
+        driver.switch_to.window(main)
+    return pages
+
+
+# -----------------------------
+# Async Static Fetch Engine
+# -----------------------------
+class StaticFetchEngine:
+    """
+    Asyncio fetch engine for static pages.
+    Every request goes through one shared keep-alive connection pool, and
+    `per_host` caps how many requests run against the same host at once.
+    With a ResponseCache, fresh hits skip the network and stale hits are
+    revalidated with If-None-Match / If-Modified-Since.
+    With a RateLimiter, requests are paced and their concurrency adapted per
+    host (the limiter replaces `per_host`); 429 / 5xx responses are retried
+    up to `retries` times, after Retry-After when the server sends one.
+    With a WarcWriter (`recorder`) every page returned is archived.
+    Usage: `async with StaticFetchEngine() as engine: await engine.fetch_many(urls)`
+    """
+
+    def __init__(self, per_host=STATIC_PER_HOST, max_connections=STATIC_MAX_CONNECTIONS, timeout=STATIC_TIMEOUT, headers=None, cache: ResponseCache = None, limiter: RateLimiter = None, retries=STATIC_RETRIES, recorder: WarcWriter = None):
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.headers = headers
+        self.cache = cache
+        self.limiter = limiter
+        self.retries = retries
+        self.recorder = recorder
+        self.session = None
+
+    async def __aenter__(self):
+        import aiohttp  # imported on first use: browser-only runs never load it
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host if self.limiter is None else 0,  # 0: the limiter sets per-host concurrency
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=self.headers,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    async def fetch(self, url: str, params: dict = None) -> str:
+        """Fetch a single page. Returns "" on failure so page positions are kept."""
+        cache = self.cache
+        key = entry = None
+        if cache:
+            key = cache.key(url, params)
+            entry = cache.lookup(key)
+            if entry and cache.is_fresh(entry):
+                METRICS.inc("cache_requests_total", result="fresh")
+                return self._record(url, cache.read_body(entry), 200, {"X-Cache": "fresh"})
+            if cache.offline:
+                logger.warning(f"Offline cache miss: {url}")
+                METRICS.inc("cache_requests_total", result="offline_miss")
+                return ""
+
+        headers = cache.conditional_headers(entry) if entry else None
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                async with self._slot(url) as slot:
+                    async with self.session.get(url, params=params, headers=headers) as response:
+                        slot.status = response.status
+                        slot.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        if response.status == 304 and entry:
+                            cache.refresh(key)
+                            METRICS.inc("cache_requests_total", result="revalidated")
+                            METRICS.observe("fetch_seconds", time.perf_counter() - start, mode="static")
+                            return self._record(url, cache.read_body(entry), 200, {"X-Cache": "revalidated"})
+                        if response.status not in RETRY_STATUSES or attempt >= self.retries:
+                            response.raise_for_status()
+                            text = await response.text()
+                            METRICS.observe("fetch_seconds", time.perf_counter() - start, mode="static")
+                            METRICS.inc("pages_fetched_total", mode="static")
+                            if cache:
+                                METRICS.inc("cache_requests_total", result="miss")
+                                cache.store(key, url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                            return self._record(url, text, response.status, response.headers)
+            except Exception as e:
+                logger.error(f"Could not fetch static page {url}: {e}")
+                METRICS.inc("fetch_errors_total", mode="static")
+                return ""
+
+            # 429 / 5xx: the limiter has already slowed the host down (and paused it for Retry-After)
+            attempt += 1
+            METRICS.inc("fetch_retries_total", mode="static", status=str(slot.status))
+            logger.warning(f"{url} answered {slot.status}, retrying ({attempt}/{self.retries})")
+            if self.limiter is None:
+                await asyncio.sleep(slot.retry_after or STATIC_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+    def _record(self, url: str, text: str, status: int, headers) -> str:
+        if self.recorder:
+            self.recorder.write_response(url, text, status, headers)
+        return text
+
+    def _slot(self, url: str):
+        return self.limiter.slot_async(url) if self.limiter else unlimited_slot()
+
+    async def fetch_many(self, urls: list) -> list:
+        """Fetch all URLs concurrently. Returns HTML strings in the order of `urls`."""
+        return list(await asyncio.gather(*(self.fetch(url) for url in urls)))
+
+
+# -----------------------------
+# Fetching For Static Pages
+# -----------------------------
+async def fetch_static_pages_async(urls: list, per_host=STATIC_PER_HOST, cache: ResponseCache = None, limiter: RateLimiter = None, recorder: WarcWriter = None) -> list:
+    """
+    Fetch many static pages at once through the async engine
+    (paced per host by `limiter` and archived to `recorder`, when given).
+    Returns a list of HTML strings in the same order as `urls`.
+    Await this from code that already runs an event loop.
+    """
+    async with StaticFetchEngine(per_host=per_host, cache=cache, limiter=limiter, recorder=recorder) as engine:
+        return await engine.fetch_many(urls)
+
+
+def fetch_static_pages(urls: list, per_host=STATIC_PER_HOST, cache: ResponseCache = None, limiter: RateLimiter = None, recorder: WarcWriter = None) -> list:
+    """
+    Blocking wrapper around fetch_static_pages_async() for synchronous callers.
+    Raises RuntimeError when called from a running event loop (await the coroutine there).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("fetch_static_pages() cannot run inside an event loop; await fetch_static_pages_async() instead")
+
+    logger.debug("Fetching %d static page(s)", len(urls))
+    pages = asyncio.run(fetch_static_pages_async(urls, per_host=per_host, cache=cache, limiter=limiter, recorder=recorder))
+    logger.debug("Finished fetching page(s)")
+    return pages
+
+
+def fetch_static_page(url: str) -> str:
+    """Fetch static HTML content for a single URL."""
+    return fetch_static_pages([url])[0]
+
+
+# -----------------------------
+# Fetching For Dynamic Pages
+# -----------------------------
+def fetch_dynamic_page(url: str, pool: DriverPool = None, container_selector=CONTAINER_SELECTOR, stats: dict = None, limiter: RateLimiter = None, recorder: WarcWriter = None, pagination="replace", record_selector: str = None, tabs=PAGE_TABS) -> list:
+    """
+    Fetch dynamically loaded HTML using Selenium.
+    A warm driver is leased from `pool` (the process-wide pool by default)
+    and handed back, reset, when pagination ends.
+    With a `limiter`, every page load / Next click takes a slot from the
+    host's limiter and reports how long the content took to arrive, and
+    the content-change timeout follows the host's observed latency.
+    With a `recorder` (WarcWriter) every page's container HTML is archived
+    under crawl `url` and its page number.
+    pagination="delta" is for portals that append results to the container
+    (infinite scroll, "Load more"): each step clicks the button or scrolls,
+    and only the records (`record_selector`, default: the container's
+    children) added since the last step are captured, tracked by a cursor
+    kept in the browser. Pages whose results are replaced instead are
+    detected and captured whole, so delta mode is safe on either kind.
+    pagination="tabs" is for portals whose pages have their own URLs: after
+    the first page, the page URL pattern and page count are read from its
+    pagination links and the remaining pages are loaded `tabs` at a time
+    (fetch_pages_in_tabs), still returned in page order. Without a
+    recognisable pattern it falls back to clicking 'Next'.
+    If `stats` is given it is filled with the first page's load time
+    ("load_seconds"), the page count, the captured HTML size ("bytes") and
+    the browser's RSS at the end ("rss_mb").
+    Returns a list with the container HTML (delta: the new records' HTML) of every page.
+    """
+    if pagination not in PAGINATION_MODES:
+        raise ValueError(f"Unknown pagination mode {pagination!r} (expected one of {PAGINATION_MODES})")
+    delta = pagination == "delta"
+    record_selector = record_selector or f"{container_selector} > *"
+    pool = pool or get_pool()
+    container_locator = (By.CSS_SELECTOR, container_selector if not delta else record_selector)
+    captured = 0  # bytes of HTML taken from the browser
+    host = limiter.for_url(url) if limiter else None
+    held = False  # a limiter slot is held for the page being loaded
+
+    with pool.lease() as lease:
+        session = PageSession(lease.driver)
+        driver = session.driver
+        if host:
+            host.acquire()
+            held = True
+        load_start = time.perf_counter()
+        try:
+            driver.get(url)
+        except Exception:
+            if held:
+                host.feedback(time.perf_counter() - load_start, error=True)
+            raise
+        load_seconds = time.perf_counter() - load_start
+        page_start = load_start
+        METRICS.observe("page_load_seconds", load_seconds)
+        lease.page_loaded()
+
+        # Debug logging
+        logger.info(f"Opened URL: {url}")
+        logger.info(f"Page title: {driver.title}")
+
+        while True:
+            try:
+                if not session.pages:
+                    # First page: capture as soon as the container is present
+                    element = timed_wait(driver, LOAD_TIMEOUT, EC.presence_of_element_located(container_locator), "container")
+                elif delta:
+                    timeout = host.wait_timeout(CHANGE_TIMEOUT) if host else CHANGE_TIMEOUT
+                    if session.trigger == "scroll":
+                        timeout = min(timeout, SCROLL_END_TIMEOUT)
+                    timed_wait(driver, timeout, recordsChanged(record_selector), "records_added")
+                else:
+                    # print("[VERBOSE] --- Waiting for new data/content to be loaded")
+                    timeout = host.wait_timeout(CHANGE_TIMEOUT) if host else CHANGE_TIMEOUT
+                    element = timed_wait(driver, timeout, innerHTMLChanged(container_locator, session.prev_html), "content_change")
+                if delta:
+                    capture = captureNewRecords(driver, record_selector)
+                    session.prev_html = capture["html"]
+                    logger.debug(f"Captured {capture['added']} of {capture['total']} records ({'appended' if capture['cumulative'] else 'whole page'})")
+                else:
+                    session.prev_html = element.get_attribute("innerHTML")
+                session.pages.append(session.prev_html)
+                captured += len(session.prev_html)
+                METRICS.inc("bytes_captured_total", len(session.prev_html), pagination=pagination)
+                if recorder:
+                    recorder.write_resource(driver.current_url, session.prev_html, crawl=url, page=len(session.pages))
+                page_seconds = time.perf_counter() - page_start
+                METRICS.observe("fetch_seconds", page_seconds, mode="dynamic")
+                METRICS.inc("pages_fetched_total", mode="dynamic")
+                if held:
+                    host.feedback(page_seconds)
+                    held = False
+
+                if pagination == "tabs" and len(session.pages) == 1:
+                    pattern = discover_page_pattern(driver)
+                    if pattern:
+                        logger.info(f"Loading pages {pattern.current + 1}-{pattern.total} in {tabs} tabs ({pattern})")
+                        session.pages += fetch_pages_in_tabs(lease, pattern.urls(), tabs, container_selector, host, recorder, crawl=url,
+                                                             more=later_page_urls)
+                        captured += sum(len(page) for page in session.pages[1:])
+                        break
+                    logger.info("No page URL pattern found, paginating with the 'Next' button")
+
+                # After content has been loaded
+                # Check for "next" button and click if exists
+                if host:
+                    host.acquire()
+                    held = True
+                page_start = time.perf_counter()
+                if not (loadMore(session, record_selector) if delta else openNextPage(session)):
+                    logger.info("No more pages/data available.")
+                    break
+                lease.page_loaded()
+
+            except Exception as e:
+                if delta and session.pages and isinstance(e, TimeoutException):
+                    # An appending page has no last page: no new records within the timeout ends it
+                    if held:
+                        host.release()  # the wait measured the end of the results, not the host
+                        held = False
+                    logger.info("No more records appeared.")
+                    break
+                if held:
+                    host.feedback(time.perf_counter() - page_start, error=True)
+                    held = False
+                logger.error("Could not find container or load data")
+                METRICS.inc("fetch_errors_total", mode="dynamic")
+                save_error_screenshot(driver, f"{urlsplit(url).netloc}-page{len(session.pages) + 1}")
+                break
+
+        if held:
+            host.feedback(time.perf_counter() - page_start)  # the last click found no next page
+        if stats is not None:
+            stats.update(load_seconds=load_seconds, pages=len(session.pages), bytes=captured, rss_mb=driver_rss_mb(driver))
+
+    # return the valued HTML
+    logger.info("Finished fetching page(s)")
+    return session.pages
+
+
+
+# -----------------------------
+# Entry point
+# -----------------------------
+def get_all_pages(start_url, mode="dynamic", per_host=STATIC_PER_HOST, pool: DriverPool = None, container_selector=CONTAINER_SELECTOR, cache: ResponseCache = None, stats: dict = None, limiter: RateLimiter = None, recorder: WarcWriter = None, warc_dir=WARC_DIR, pagination="replace", record_selector: str = None, tabs=PAGE_TABS) -> list:
+    """
+    Handle multiple pages if pagination exists.
+    Returns a list of HTML content strings for all pages.
+    mode="static" fetches `start_url` (a URL or a list of page URLs) concurrently
+    through the async engine instead of driving a browser, using `cache` when given.
+    Dynamic fetches lease a warm browser from `pool` and fill `stats`; pagination="delta"
+    captures only newly appended records on cumulative pages, pagination="tabs"
+    loads URL-addressable pages in `tabs` tabs at once (see fetch_dynamic_page).
+    Both paths are paced per host by `limiter` (ratelimit.RateLimiter) and
+    archived to `recorder` (warc.WarcWriter), when given.
+    mode="replay" serves the pages of the latest recorded crawl from the WARC
+    archives in `warc_dir`, with no browser and no network.
+    """
+    if mode == "replay":
+        return replay_pages(start_url, folder=warc_dir)
+    if mode == "static":
+        urls = [start_url] if isinstance(start_url, str) else list(start_url)
+        return fetch_static_pages(urls, per_host=per_host, cache=cache, limiter=limiter, recorder=recorder)
+
+    return fetch_dynamic_page(start_url, pool=pool, container_selector=container_selector, stats=stats, limiter=limiter, recorder=recorder,
+                              pagination=pagination, record_selector=record_selector, tabs=tabs)
@@ -0,0 +1,307 @@
+"""
+frontier.py
+
+Persistent URL frontier: a crawl queue in a SQLite file (WAL mode) that
+several worker processes, on one machine or on several machines sharing
+the file, drain concurrently. URLs are leased to one worker at a time and
+acked when done; a worker that dies simply lets its leases expire and the
+URLs are queued again. Seen URLs are never queued twice.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+FRONTIER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "frontier.sqlite")
+LEASE_SECONDS = 120        # a lease not renewed or acked within this time expires
+MAX_ATTEMPTS = 3           # leases per URL before it is marked failed
+HOST_CONCURRENCY = 2       # URLs of one host leased at the same time
+HOST_DELAY = 0.0           # seconds between two leases of the same host
+POLL_SECONDS = 0.5         # how often lease(wait=...) looks again
+
+FrontierItem = namedtuple("FrontierItem", "url host kind priority payload attempts")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    payload TEXT,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    added_at REAL NOT NULL,
+    done_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS urls_host_queue ON urls (host, state, priority DESC, seq);
+CREATE INDEX IF NOT EXISTS urls_leases ON urls (state, lease_expires);
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    max_in_flight INTEGER NOT NULL,
+    delay REAL NOT NULL,
+    next_at REAL NOT NULL DEFAULT 0,
+    last_leased REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Dedup form of a URL: lower-case scheme and host, no fragment."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+# -----------------------------
+# Frontier
+# -----------------------------
+class Frontier:
+    """
+    SQLite-backed crawl queue. Every state change runs in one IMMEDIATE
+    transaction, so concurrent processes never lease the same URL.
+    Within a host, higher `priority` URLs are leased first (then FIFO);
+    hosts take turns (least recently leased first) and each host has at
+    most `host_concurrency` URLs leased, spaced `host_delay` seconds apart.
+    One Frontier per thread/process; workers identify themselves with `owner`.
+    Usage: `item = frontier.lease(owner); ...; frontier.ack(item.url, owner)`
+    """
+
+    def __init__(self, path=FRONTIER_PATH, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS,
+                 host_concurrency=HOST_CONCURRENCY, host_delay=HOST_DELAY, host_overrides: dict = None):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.host_concurrency = host_concurrency
+        self.host_delay = host_delay
+        self.host_overrides = host_overrides or {}  # host -> {"max_in_flight", "delay"}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)  # transactions are explicit
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def _transaction(self):
+        return _Immediate(self.db)
+
+    # Adding URLs
+    def add(self, urls, kind="listing", priority=0, payload: dict = None, requeue=False) -> int:
+        """
+        Queue URLs not seen before; returns how many were new.
+        requeue=True also queues again URLs that are done or failed (e.g. the
+        portal start pages of a new run), keeping their lease if still leased.
+        """
+        now = time.time()
+        payload = json.dumps(payload) if payload is not None else None
+        rows = [(url, urlsplit(url).netloc, kind, priority, payload, now) for url in map(normalize_url, urls)]
+        on_conflict = (
+            "DO UPDATE SET state = 'queued', attempts = 0, not_before = 0, error = NULL, "
+            "priority = excluded.priority, payload = excluded.payload WHERE state IN ('done', 'failed')"
+            if requeue else "DO NOTHING"
+        )
+        with self._transaction():
+            before = self.db.total_changes
+            self.db.executemany(
+                f"INSERT INTO urls (url, host, kind, priority, payload, added_at) VALUES (?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT (url) {on_conflict}",
+                rows,
+            )
+            added = self.db.total_changes - before
+            self.db.executemany(
+                "INSERT OR IGNORE INTO hosts (host, max_in_flight, delay) VALUES (?, ?, ?)",
+                [(host, *self._host_limits(host)) for host in {row[1] for row in rows}],
+            )
+        METRICS.inc("frontier_added_total", added, kind=kind)
+        return added
+
+    def _host_limits(self, host: str) -> tuple:
+        override = self.host_overrides.get(host, {})
+        return override.get("max_in_flight", self.host_concurrency), override.get("delay", self.host_delay)
+
+    # Leasing
+    def _reap(self, now: float):
+        """Queue again (or fail) URLs whose lease expired, i.e. whose worker died or hung."""
+        expired = self.db.execute(
+            "SELECT url, attempts FROM urls WHERE state = 'leased' AND lease_expires < ?", (now,)
+        ).fetchall()
+        for url, attempts in expired:
+            state = "failed" if attempts >= self.max_attempts else "queued"
+            self.db.execute(
+                "UPDATE urls SET state = ?, lease_owner = NULL, lease_expires = NULL, error = 'lease expired' WHERE url = ?",
+                (state, url),
+            )
+        if expired:
+            logger.warning(f"Re-queued {len(expired)} URL(s) whose lease expired")
+            METRICS.inc("frontier_leases_expired_total", len(expired))
+
+    def lease(self, owner: str, count=1, kinds=None, wait: float = 0) -> list:
+        """
+        Lease up to `count` URLs (of `kinds`, default any) for `owner`.
+        With `wait`, keeps looking for up to that many seconds while URLs are
+        queued but held back by host limits, or leased by other workers (whose
+        leases may still expire). Returns a list of FrontierItems, possibly empty.
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            items = self._lease_now(owner, count, kinds)
+            if items or time.monotonic() >= deadline or not self.pending(kinds):
+                return items
+            time.sleep(POLL_SECONDS)
+
+    def _lease_now(self, owner: str, count: int, kinds) -> list:
+        kind_filter, kind_args = "", []
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+            kind_args = list(kinds)
+        items = []
+        with self._transaction():
+            now = time.time()
+            self._reap(now)
+            while len(items) < count:
+                # Least recently served host that has ready work and a free slot
+                host = self.db.execute(
+                    f"""SELECT h.host, h.delay FROM hosts h
+                        WHERE h.next_at <= ?
+                          AND (SELECT COUNT(*) FROM urls u WHERE u.host = h.host AND u.state = 'leased') < h.max_in_flight
+                          AND EXISTS (SELECT 1 FROM urls u WHERE u.host = h.host AND u.state = 'queued' AND u.not_before <= ?{kind_filter})
+                        ORDER BY h.last_leased LIMIT 1""",
+                    [now, now, *kind_args],
+                ).fetchone()
+                if host is None:
+                    break
+                host, delay = host
+                row = self.db.execute(
+                    f"""SELECT url, host, kind, priority, payload, attempts FROM urls
+                        WHERE host = ? AND state = 'queued' AND not_before <= ?{kind_filter}
+                        ORDER BY priority DESC, seq LIMIT 1""",
+                    [host, now, *kind_args],
+                ).fetchone()
+                self.db.execute(
+                    "UPDATE urls SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE url = ?",
+                    (owner, now + self.lease_seconds, row[0]),
+                )
+                self.db.execute("UPDATE hosts SET last_leased = ?, next_at = ? WHERE host = ?", (now, now + delay, host))
+                url, host, kind, priority, payload, attempts = row
+                items.append(FrontierItem(url, host, kind, priority, json.loads(payload) if payload else None, attempts + 1))
+        METRICS.inc("frontier_leased_total", len(items))
+        return items
+
+    def renew(self, url: str, owner: str) -> bool:
+        """Extend `owner`'s lease on `url`; False if the lease was lost (expired and re-leased)."""
+        with self._transaction():
+            cursor = self.db.execute(
+                "UPDATE urls SET lease_expires = ? WHERE url = ? AND state = 'leased' AND lease_owner = ?",
+                (time.time() + self.lease_seconds, url, owner),
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, url: str, owner: str) -> bool:
+        """Mark `url` done. False if `owner` no longer held the lease (the URL may be processed twice)."""
+        with self._transaction():
+            cursor = self.db.execute(
+                "UPDATE urls SET state = 'done', done_at = ?, lease_owner = NULL, lease_expires = NULL, error = NULL "
+                "WHERE url = ? AND state = 'leased' AND lease_owner = ?",
+                (time.time(), url, owner),
+            )
+        METRICS.inc("frontier_acked_total", cursor.rowcount)
+        return cursor.rowcount == 1
+
+    def nack(self, url: str, owner: str, error: str = "", retry_in: float = 0) -> bool:
+        """Give `url` back after a failure: queued again after `retry_in` seconds, or failed after max_attempts."""
+        with self._transaction():
+            cursor = self.db.execute(
+                "UPDATE urls SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "not_before = ?, lease_owner = NULL, lease_expires = NULL, error = ? "
+                "WHERE url = ? AND state = 'leased' AND lease_owner = ?",
+                (self.max_attempts, time.time() + retry_in, error[:500], url, owner),
+            )
+        METRICS.inc("frontier_nacked_total", cursor.rowcount)
+        return cursor.rowcount == 1
+
+    # Inspection
+    def pending(self, kinds=None) -> int:
+        """URLs queued or leased (of `kinds`): work that is not finished yet."""
+        query = "SELECT COUNT(*) FROM urls WHERE state IN ('queued', 'leased')"
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+        return self.db.execute(query, list(kinds or [])).fetchone()[0]
+
+    def counts(self) -> dict:
+        """{state: URLs} over the whole frontier."""
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall())
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error): takes the write lock up front, so lease checks cannot race."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, *exc_info):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+# -----------------------------
+# Lease heartbeat
+# -----------------------------
+class LeaseKeeper:
+    """
+    Renews a lease from a background thread (every third of the lease time)
+    while a long job runs, so only a dead or hung worker lets it expire.
+    Usage: `with LeaseKeeper(path, item.url, owner): process(item)`
+    """
+
+    def __init__(self, path: str, url: str, owner: str, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.url = url
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="frontier-lease", daemon=True)
+
+    def _run(self):
+        frontier = Frontier(self.path, lease_seconds=self.lease_seconds)
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                if not frontier.renew(self.url, self.owner):
+                    logger.warning(f"Lost the lease on {self.url}")
+                    self.lost = True
+                    return
+        finally:
+            frontier.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,166 @@
+"""
+http_cache.py
+
+On-disk HTTP response cache for the static fetcher.
+Bodies are stored once, gzip-compressed and content-addressed (sha256);
+a small SQLite index maps request keys (URL + parameters) to bodies,
+validators (ETag / Last-Modified) and expiry times.
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from urllib.parse import urlencode
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "raw", "http_cache")
+DEFAULT_TTL = 6 * 3600               # seconds a response is served without revalidation
+MAX_CACHE_BYTES = 2 * 1024 ** 3      # compressed bytes kept on disk before LRU eviction
+
+CacheEntry = namedtuple("CacheEntry", "key url body_hash etag last_modified stored_at expires_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+# -----------------------------
+# Response cache
+# -----------------------------
+class ResponseCache:
+    """
+    Content-addressed, compressed response cache with TTLs and LRU eviction.
+    offline=True serves every cached response regardless of age and never
+    asks the network to revalidate (re-runs after parser/cleaner fixes).
+    """
+
+    def __init__(self, root=CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=MAX_CACHE_BYTES, offline=False):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    @staticmethod
+    def key(url: str, params: dict = None, method: str = "GET") -> str:
+        """Request key: method + URL + sorted query parameters."""
+        query = urlencode(sorted((params or {}).items()), doseq=True)
+        return hashlib.sha256(f"{method} {url} {query}".encode("utf-8")).hexdigest()
+
+    def _object_path(self, body_hash: str) -> str:
+        return os.path.join(self.root, "objects", body_hash[:2], body_hash + ".gz")
+
+    def lookup(self, key: str):
+        """Return the CacheEntry for `key`, or None on a miss."""
+        row = self.db.execute(
+            "SELECT key, url, body_hash, etag, last_modified, stored_at, expires_at FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        with self.db:
+            self.db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(*row)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.offline or entry.expires_at > time.time()
+
+    def conditional_headers(self, entry: CacheEntry) -> dict:
+        """Validators for a conditional GET, so unchanged pages cost a 304."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def read_body(self, entry: CacheEntry) -> str:
+        with gzip.open(self._object_path(entry.body_hash), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def store(self, key: str, url: str, body: str, etag=None, last_modified=None, ttl=None):
+        """Save a 200 response. Identical bodies are stored once."""
+        data = body.encode("utf-8")
+        body_hash = hashlib.sha256(data).hexdigest()
+        path = self._object_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # atomic, so readers never see half a body
+
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO objects (hash, size) VALUES (?, ?)",
+                (body_hash, os.path.getsize(path)),
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, body_hash, etag, last_modified, now, now + (self.ttl if ttl is None else ttl), now),
+            )
+        self.evict()
+
+    def refresh(self, key: str, ttl=None):
+        """A 304 confirmed the cached body: extend its lifetime."""
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                "UPDATE entries SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + (self.ttl if ttl is None else ttl), now, key),
+            )
+
+    def total_bytes(self) -> int:
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        with self.db:
+            for key, body_hash in self.db.execute(
+                "SELECT key, body_hash FROM entries ORDER BY last_access"
+            ).fetchall():
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                still_used = self.db.execute(
+                    "SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)
+                ).fetchone()
+                if still_used:
+                    continue
+                size = self.db.execute("SELECT size FROM objects WHERE hash = ?", (body_hash,)).fetchone()[0]
+                self.db.execute("DELETE FROM objects WHERE hash = ?", (body_hash,))
+                try:
+                    os.remove(self._object_path(body_hash))
+                except FileNotFoundError:
+                    pass
+                excess -= size
+                if excess <= 0:
+                    break
+
+    def close(self):
+        self.db.close()
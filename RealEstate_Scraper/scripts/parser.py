@@ -1,18 +1,138 @@
 """
 parser.py
 
-Module to parse supporter data from HTML content.
+Module to parse property listing data from HTML content.
+Each portal's schema (config/selectors.py) is compiled once into an
+ExtractionPlan; parsing a page only runs the precompiled selectors.
 """
-print("[INFO] --- Installing 'PARSER' libraries...")
-
+import logging
+from functools import lru_cache
+from urllib.parse import urljoin
+import soupsieve
 from bs4 import BeautifulSoup
+from metrics import METRICS
+from config.selectors import FIELD_TYPES, get_schema
+
+logger = logging.getLogger(__name__)
 
 
 
 # -----------------------------
 # Configuration
 # -----------------------------
+LISTING_FIELDS = ["address", "price", "beds", "baths", "sqft", "agent", "date", "url"]
+
 
 # -----------------------------
 # Parsing functions
-# -----------------------------
\ No newline at end of file
+# -----------------------------
+def safe_get_text(block, selector: str, default="") -> str:
+    """Safely extract text from a CSS selector, return default if missing."""
+    el = block.select_one(selector)
+    return el.get_text(" ", strip=True) if el else default
+
+
+def safe_get_attr(block, selector: str, attr: str, default="") -> str:
+    """Safely extract an attribute (like href) from a CSS selector."""
+    el = block.select_one(selector)
+    return el.get(attr, default) if el else default
+
+
+# -----------------------------
+# Extraction plans
+# -----------------------------
+class ExtractionPlan:
+    """
+    A portal schema compiled for repeated use: every CSS selector is parsed
+    once (soupsieve.compile), fields sharing a selector share one lookup per
+    listing, and each field's text/attribute/type handling is fixed up front.
+    Usage: `plan = get_plan(portal); rows = plan.parse(html, base_url)`
+    """
+
+    def __init__(self, portal: str, block, lookups: list):
+        self.portal = portal
+        self.block = block      # compiled listing-card selector
+        self.lookups = lookups  # [(compiled selector, [(field, attr, type, default), ...]), ...]
+        self.fields = [field for _, rules in lookups for field, *_ in rules]
+
+    def extract(self, block, base_url: str = "") -> dict:
+        """Extract every field from one listing card."""
+        listing = {}
+        for selector, rules in self.lookups:
+            el = selector.select_one(block)
+            for field, attr, field_type, default in rules:
+                if el is None:
+                    value = default
+                elif attr:
+                    value = el.get(attr, default)
+                    if isinstance(value, list):  # multi-valued attributes such as class
+                        value = " ".join(value)
+                else:
+                    value = el.get_text(" ", strip=True)
+                if field_type == "url" and value:
+                    value = urljoin(base_url, value)
+                listing[field] = value
+        return listing
+
+    def parse(self, html_content: str, base_url: str = "") -> list:
+        """Parse every listing card in one HTML page."""
+        soup = BeautifulSoup(html_content, "html.parser")
+        return [self.extract(block, base_url) for block in self.block.select(soup)]
+
+
+def compile_plan(schema: dict, portal: str = "") -> ExtractionPlan:
+    """
+    Compile a schema ({"block": css, "fields": {name: rule}}) into an ExtractionPlan.
+    Raises ValueError for an unknown field type or an invalid selector, so a
+    broken schema fails at startup rather than on the first page.
+    """
+    try:
+        block = soupsieve.compile(schema["block"])
+        lookups = {}
+        for field, rule in schema["fields"].items():
+            field_type = rule.get("type", "text")
+            if field_type not in FIELD_TYPES:
+                raise ValueError(f"field {field!r} has unknown type {field_type!r} (expected one of {FIELD_TYPES})")
+            if rule["css"] not in lookups:
+                lookups[rule["css"]] = (soupsieve.compile(rule["css"]), [])
+            lookups[rule["css"]][1].append((field, rule.get("attr"), field_type, rule.get("default", "")))
+    except (KeyError, soupsieve.SelectorSyntaxError) as e:
+        raise ValueError(f"Invalid selector schema for {portal or 'portal'}: {e}") from e
+    return ExtractionPlan(portal, block, list(lookups.values()))
+
+
+@lru_cache(maxsize=None)
+def get_plan(portal: str) -> ExtractionPlan:
+    """Extraction plan for a portal (config/selectors.py), compiled once per process."""
+    return compile_plan(get_schema(portal), portal)
+
+
+def compile_plans(portals) -> dict:
+    """Compile the plans of all `portals` up front; returns {portal: ExtractionPlan}."""
+    return {portal: get_plan(portal) for portal in portals}
+
+
+def parse_property_block(block, plan: ExtractionPlan, base_url: str = "") -> dict:
+    """
+    Parse a single property block to extract data.
+    Returns a dictionary with the plan's fields (address, price, beds, baths, sqft, agent, date, url)
+    """
+    return plan.extract(block, base_url)
+
+
+def parse_page(html_content: str, page_index: int, plan: ExtractionPlan, base_url: str = "") -> list:
+    """Parse all property blocks from a single HTML page."""
+    listings = plan.parse(html_content, base_url)
+    logger.debug("Found %d listings in page %s", len(listings), page_index)
+    METRICS.inc("rows_parsed_total", len(listings))
+    return listings
+
+
+def parse_multiple_pages(list_of_html: list, plan: ExtractionPlan, base_url: str = "") -> list:
+    """Parse multiple pages and combine listing data."""
+
+    all_listings = []
+    for index, html in enumerate(list_of_html, start=1):
+        with METRICS.timer("parse_seconds"):
+            all_listings.extend(parse_page(html, index, plan, base_url))
+    return all_listings
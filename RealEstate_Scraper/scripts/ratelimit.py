@@ -0,0 +1,289 @@
+"""
+ratelimit.py
+
+Adaptive per-host rate and concurrency control for the fetchers.
+Each host gets a token bucket (requests per second) and a concurrency
+limit. Both grow exponentially until the host first pushes back (slow
+start), then additively while it answers quickly, and are cut
+multiplicatively on slow responses, 429s, 5xx and errors (AIMD);
+a Retry-After header pauses the host for the time it asks for.
+"""
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+START_RPS = 2.0            # initial requests per second per host
+MIN_RPS = 0.2
+MAX_RPS = 50.0
+BURST = 4                  # tokens a host can bank while idle
+START_CONCURRENCY = 2      # initial requests in flight per host
+MAX_CONCURRENCY = 16
+TARGET_LATENCY = 2.0       # seconds; slower responses count as congestion
+INCREASE_RPS = 0.5         # additive increase per healthy response
+SLOW_START_GAIN = 0.1      # until a host first pushes back, rps grows by this fraction per healthy response
+DECREASE = 0.5             # multiplicative decrease on congestion
+MAX_RETRY_AFTER = 300.0    # cap on honoured Retry-After pauses
+LATENCY_ALPHA = 0.2        # weight of the newest sample in the latency average
+WAIT_TIMEOUT_FACTOR = 10   # adaptive wait timeout = average latency x this factor (clamped)
+
+
+def parse_retry_after(value) -> float:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+# -----------------------------
+# Per-host controller
+# -----------------------------
+class HostLimiter:
+    """
+    Token bucket + AIMD concurrency for one host. Thread-safe; acquire()
+    blocks a thread, acquire_async() yields to the event loop. Call
+    feedback() with each response so the limits adapt.
+    """
+
+    def __init__(self, host: str, rps=START_RPS, min_rps=MIN_RPS, max_rps=MAX_RPS, burst=BURST,
+                 concurrency=START_CONCURRENCY, max_concurrency=MAX_CONCURRENCY, target_latency=TARGET_LATENCY,
+                 increase_rps=INCREASE_RPS, decrease=DECREASE):
+        self.host = host
+        self.rps = rps
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.increase_rps = increase_rps
+        self.decrease = decrease
+        self.latency = None          # moving average of response latency
+        self.in_flight = 0
+        self._tokens = min(burst, 1.0)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0     # Retry-After
+        self._last_decrease = 0.0
+        self._healthy = 0            # healthy responses since the concurrency last grew
+        self._slow_start = True      # until the first back-off
+        self._cond = threading.Condition()
+
+    def _try_acquire(self) -> float:
+        """Take a slot and a token if both are free (returns 0), else the seconds to wait first."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rps)
+        self._refilled = now
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= self.concurrency:
+            return None  # wait for a release
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rps
+        self._tokens -= 1
+        self.in_flight += 1
+        return 0
+
+    def acquire(self):
+        """Block until a request to this host may start."""
+        start = time.perf_counter()
+        with self._cond:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0:
+                    break
+                self._cond.wait(wait)
+        METRICS.observe("ratelimit_wait_seconds", time.perf_counter() - start, host=self.host)
+
+    def try_acquire(self) -> bool:
+        """Take a slot and a token only if both are free right now (never waits)."""
+        with self._cond:
+            return self._try_acquire() == 0
+
+    async def acquire_async(self):
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking the loop."""
+        start = time.perf_counter()
+        while True:
+            with self._cond:
+                wait = self._try_acquire()
+            if wait == 0:
+                break
+            await asyncio.sleep(min(wait if wait is not None else 0.05, 1.0))
+        METRICS.observe("ratelimit_wait_seconds", time.perf_counter() - start, host=self.host)
+
+    def feedback(self, latency: float, status: int = None, retry_after: float = None, error: bool = False):
+        """
+        Release the slot and adapt to one response: `status` None means no HTTP
+        status is known (browser loads); `error` marks timeouts and failed requests.
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.latency = latency if self.latency is None else (1 - LATENCY_ALPHA) * self.latency + LATENCY_ALPHA * latency
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + min(retry_after, MAX_RETRY_AFTER))
+
+            if status == 429:
+                self._back_off("throttled")
+            elif error or (status is not None and status >= 500):
+                self._back_off("error")
+            elif latency > self.target_latency:
+                self._back_off("slow")
+            elif self._slow_start:
+                self.rps = min(self.max_rps, self.rps * (1 + SLOW_START_GAIN) + self.increase_rps)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            else:
+                self.rps = min(self.max_rps, self.rps + self.increase_rps)
+                self._healthy += 1
+                if self._healthy >= self.concurrency:  # about +1 slot per round trip of healthy responses
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self._healthy = 0
+            self._cond.notify_all()
+
+    def release(self):
+        """Release a slot without adapting (the request's outcome says nothing about the host)."""
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._cond.notify_all()
+
+    def _back_off(self, reason: str):
+        # Responses already in flight report the same congestion: cut once per round trip
+        now = time.monotonic()
+        if now - self._last_decrease < max(self.latency or 0, 0.1):
+            return
+        self._last_decrease = now
+        self._slow_start = False
+        self.rps = max(self.min_rps, self.rps * self.decrease)
+        self.concurrency = max(1, int(self.concurrency * self.decrease))
+        self._tokens = min(self._tokens, 0)
+        self._healthy = 0
+        METRICS.inc("ratelimit_backoffs_total", host=self.host, reason=reason)
+        logger.debug(f"Backing off {self.host} ({reason}): {self.rps:.2f} req/s, {self.concurrency} in flight")
+
+    def wait_timeout(self, default: float, minimum: float = 10.0) -> float:
+        """Timeout for waiting on this host: WAIT_TIMEOUT_FACTOR x average latency, between `minimum` and `default`."""
+        if self.latency is None:
+            return default
+        return max(minimum, min(default, self.latency * WAIT_TIMEOUT_FACTOR))
+
+
+class _Slot:
+    """One request's reservation; set `status` / `retry_after` (or call fail()) before it is released."""
+
+    def __init__(self):
+        self.status = None
+        self.retry_after = None
+        self.error = False
+        self.start = time.perf_counter()
+
+    def fail(self):
+        self.error = True
+
+
+# -----------------------------
+# Limiter registry
+# -----------------------------
+class RateLimiter:
+    """
+    Per-host HostLimiters, created on first use. `host_overrides` maps a
+    host to HostLimiter arguments that differ from `defaults`.
+    Usage: `with limiter.slot(url) as slot: ...; slot.status = response.status`
+    """
+
+    def __init__(self, host_overrides: dict = None, **defaults):
+        self.defaults = defaults
+        self.host_overrides = host_overrides or {}
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> HostLimiter:
+        host = host_of(url)
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = self._hosts[host] = HostLimiter(host, **{**self.defaults, **self.host_overrides.get(host, {})})
+            return limiter
+
+    @contextmanager
+    def slot(self, url: str):
+        """Hold a request slot for `url` (thread-blocking); latency and outcome are fed back on exit."""
+        host = self.for_url(url)
+        host.acquire()
+        slot = _Slot()
+        try:
+            yield slot
+        except BaseException:
+            if slot.status is None:  # an HTTP error status was already recorded
+                slot.fail()
+            raise
+        finally:
+            host.feedback(time.perf_counter() - slot.start, slot.status, slot.retry_after, slot.error)
+
+    @asynccontextmanager
+    async def slot_async(self, url: str):
+        """slot() for coroutines."""
+        host = self.for_url(url)
+        await host.acquire_async()
+        slot = _Slot()
+        try:
+            yield slot
+        except BaseException:
+            if slot.status is None:  # an HTTP error status was already recorded
+                slot.fail()
+            raise
+        finally:
+            host.feedback(time.perf_counter() - slot.start, slot.status, slot.retry_after, slot.error)
+
+    def wait_timeout(self, url: str, default: float) -> float:
+        return self.for_url(url).wait_timeout(default)
+
+    def stats(self) -> dict:
+        """Current limits per host: {host: {"rps", "concurrency", "latency"}}."""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: {"rps": round(h.rps, 2), "concurrency": h.concurrency, "latency": h.latency} for host, h in hosts.items()}
+
+
+@asynccontextmanager
+async def unlimited_slot():
+    """slot_async() stand-in when no limiter is configured."""
+    yield _Slot()
+
+
+def from_settings(settings, dynamic: bool = False) -> RateLimiter:
+    """
+    RateLimiter configured from config/settings.py (None if RATE_LIMIT_ENABLED is off).
+    dynamic=True uses the browser page target latency.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    return RateLimiter(
+        host_overrides=settings.RATE_LIMIT_HOSTS,
+        rps=settings.RATE_LIMIT_START_RPS,
+        min_rps=settings.RATE_LIMIT_MIN_RPS,
+        max_rps=settings.RATE_LIMIT_MAX_RPS,
+        burst=settings.RATE_LIMIT_BURST,
+        concurrency=settings.RATE_LIMIT_START_CONCURRENCY,
+        max_concurrency=settings.RATE_LIMIT_MAX_CONCURRENCY,
+        target_latency=settings.RATE_LIMIT_DYNAMIC_TARGET_LATENCY if dynamic else settings.RATE_LIMIT_TARGET_LATENCY,
+    )
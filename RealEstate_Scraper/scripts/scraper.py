@@ -1,14 +1,30 @@
 """
 scraper.py
 
-Main script to scrape supporter data from TeamWater.org donations page,
-clean it, and export to CSV.
+Main script to scrape property listings from the real estate portals,
+clean them, and export one consolidated CSV.
+Stage modules (selenium, aiohttp, bs4, pandas...) are imported only by the
+commands that use them; the import and startup time is logged.
 """
 
-print("[INFO] Start all libraries installation...")
+import time
+_STARTED = time.perf_counter()  # for the startup report
+
+import importlib
+import logging
+import multiprocessing
 import os
-import fetcher, parser, cleaner, exporter
-print("[INFO] All libraries installed correctly...")
+import socket
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import util as mp_util
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # project root, for config/
+from warc import WarcWriter, find_archives, iter_archive_pages, slugify
+from frontier import Frontier, LeaseKeeper
+from metrics import METRICS, configure_logging, labels
+from warehouse import LISTINGS, SQLiteBackend, WarehouseLoader
+from config import settings
+from config.selectors import get_schema
 
 
 
@@ -20,44 +36,151 @@ print("[INFO] All libraries installed correctly...")
 # 
 # 0.
 # scraper.py - main orchestration script
-# # run_scraper(start_urls: list, output_path: str)
+# # run_scraper(start_urls: list, output_path: str, workers: int = None)
 # # # Orchestrates the scraping workflow:
-# # # # 1. Iterates through the 8 target portals
-# # # # 2. Fetch page(s) using fetcher.get_all_pages()
-# # # # 3. Parse property data using parser.parse_multiple_pages()
-# # # # 4. Clean data using cleaner.clean_data()
-# # # # 5. Export consolidated results using exporter.export_to_csv()
+# # # # 1. Queues the 8 target portals in the crawl frontier; a process pool leases and runs them
+# # # #    (failed portals are retried, a crashed worker's portal is re-leased when its lease expires)
+# # # # 2. Each portal: fetch page(s) using fetcher.get_all_pages()
+# # # # 3. Each portal: parse property data using parser.parse_multiple_pages()
+# # # # 4. Each portal: clean data using cleaner.clean_data()
+# # # # 5. Merge per-portal results in START_URLS order and export using exporter.export_to_csv()
+# # # #    (each portal is also appended to output/parquet through exporter.ParquetDatasetWriter
+# # # #     and upserted into data/warehouse.sqlite through warehouse.WarehouseLoader)
+# # # # 6. Report wall-clock time, page-load time and browser RSS per portal, and for the whole run
+# # # # 7. Write the run's metrics to logs/metrics.json and logs/metrics.prom (write_metrics())
+# # reprocess_archives(output_path: str, since=None, until=None, workers=None) -> int
+# # # `scraper.py reprocess`: re-parses archived WARC crawls with the current plans, one archive file per worker process
+# # reprocess_archive(path: str) -> dict
+# # # Parses and cleans every page of one archive file
+# # open_recorder(name: str) -> WarcWriter | None / fetch_mode(name: str) -> str
+# # # Per-portal WARC recorder (settings.WARC_RECORD); "replay" mode when settings.REPLAY is on
+# # run_worker() -> int
+# # # `scraper.py worker`: leases portals from a shared frontier (e.g. on another machine), rows go to Parquet and the warehouse
+# # seed_frontier(frontier, start_urls: list) -> int / open_frontier() -> Frontier
+# # # Queues every portal's start page for the run; the frontier is configured in settings.FRONTIER_*
+# # process_portal(name: str, start_url: str, pool=None, cache=None, stats=None, limiter=None) -> list
+# # # Fetches, parses and cleans one portal, returns its cleaned rows
+# # open_parquet_writer() -> ParquetDatasetWriter | None
+# # # Parquet writer for the run (settings.EXPORT_PARQUET), None if disabled or pyarrow is missing
+# # open_warehouse_loader() -> WarehouseLoader | None
+# # # Warehouse loader for the run (settings.WAREHOUSE_ENABLED)
+# # lean_profile() -> dict
+# # # get_driver() arguments for the lean browser profile in config/settings.py
+# # load_modules(*names)
+# # # Imports stage modules (fetcher, parser, cleaner, exporter...) on first use and times each import
+#
+#
+# metrics.py - logging setup and run metrics (logs/scraper.log, logs/metrics.json, logs/metrics.prom)
+# # configure_logging(level=logging.INFO, log_file=None)
+# # # Console (and file) handlers in the "[LEVEL] module --- message" format
+# # METRICS.inc / observe / timer(name, **labels), labels(portal=...)
+# # # Counters and latency histograms (pages fetched, fetch latency, WebDriverWait time, rows parsed/rejected, bytes written)
+# # # labelled per portal; worker processes return snapshot()s that the parent merge()s
+# # METRICS.write(json_path, prom_path=None, **run_info)
+# # # Writes the run's JSON summary and Prometheus text file
+#
+#
+# warehouse.py - SQLite warehouse loader (data/warehouse.sqlite)
+# # WarehouseLoader(backend, table, batch_size=1000)
+# # # Writer thread: submit(rows) queues rows, upserted in batched executemany transactions (idempotent re-runs)
+# # SQLiteBackend(path) / WarehouseBackend
+# # # WAL-mode SQLite backend; the backend interface leaves room for Postgres
+# # LISTINGS
+# # # listings table keyed by portal + URL (or address), indexed on portal, date and price
+#
+#
+# warc.py - WARC archive of fetched pages (data/raw/warc/<portal>/*.warc.gz + .idx offset index)
+# # WarcWriter(folder, prefix, portal, max_bytes)
+# # # write_response(url, body, status, headers) for static fetches, write_resource(url, html, crawl, page) for browser pages
+# # WarcReader(path)
+# # # records() scans gzip members; read_at(offset, length) seeks one record; index() reads the sidecar (or rebuilds it)
+# # replay_pages(start_url, folder=WARC_DIR) -> list
+# # # Pages of the latest recorded crawl of a URL (or list of URLs), in page order
+# # find_archives(folder, since=None, until=None) / iter_archive_pages(path)
+# # # Archive files oldest first; (index entry, html) of every page in one file
+#
+#
+# frontier.py - persistent crawl queue (data/frontier.sqlite, WAL), drained by several processes or machines
+# # Frontier(path, lease_seconds=120, max_attempts=3, host_concurrency=2, host_delay=0, host_overrides=None)
+# # # add(urls, kind, priority, payload, requeue=False) dedups seen URLs; lease(owner, count, kinds, wait) / ack / nack / renew
+# # # Priorities order URLs within a host; hosts take turns and are capped at host_concurrency leases; expired leases are re-queued
+# # LeaseKeeper(path, url, owner)
+# # # Renews a lease from a background thread while a long job runs
+#
+#
+# ratelimit.py - adaptive per-host rate and concurrency control (settings.RATE_LIMIT_*)
+# # RateLimiter(host_overrides=None, **defaults) / from_settings(settings, dynamic=False)
+# # # One HostLimiter per host; slot(url) / slot_async(url) pace a request and feed its latency and status back
+# # HostLimiter(host, rps, min_rps, max_rps, burst, concurrency, max_concurrency, target_latency)
+# # # Token bucket + AIMD: additive increase while fast, halved on slow responses, 429, 5xx and errors; honours Retry-After
+#
+#
+# http_cache.py - on-disk HTTP response cache (data/raw/http_cache)
+# # ResponseCache(root, ttl, max_bytes, offline=False)
+# # # Content-addressed gzip bodies + SQLite index; TTLs, LRU eviction, ETag/Last-Modified revalidation
 #
 # 
 # 1.
+# driver_pool.py - warm Selenium browsers shared across portals
+# # get_driver(lean=False, resource_types=None, url_patterns=None, page_load_strategy=None) -> webdriver.Chrome
+# # # Sets up and returns a configured Selenium Chrome driver (driver binary resolved once per process)
+# # # lean=True: no image decoding, CDP Network.setBlockedURLs for blocked resources/trackers, eager page loads
+# # DriverPool(size, max_pages, max_rss_mb, driver_kwargs=None)
+# # # Keeps N warm headless browsers; lease() hands one out and resets/recycles it on return
+# # open_tab(driver) -> str
+# # # Opens a tab (lean profile URL blocking re-applied) and switches to it
+# # get_pool() -> DriverPool
+# # # Process-wide default pool, created lazily
+#
 # fetcher.py - functions to fetch HTML content (static and dynamic)
-# # get_driver() -> webdriver.Chrome
-# # # Sets up and returns a configured Selenium Chrome driver
+# # StaticFetchEngine(per_host, max_connections, timeout, cache=None, limiter=None, retries=3)
+# # # Asyncio fetch engine with a shared keep-alive connection pool and a per-host concurrency limit
+# # fetch_static_pages(urls: list, per_host=4, cache=None, limiter=None) -> list
+# # # Fetches many static pages at once, returns HTML strings in input order (RuntimeError inside a running event loop)
+# # fetch_static_pages_async(...) -> list
+# # # The same as a coroutine, for callers that already run an event loop
 # # fetch_static_page(url: str) -> str
-# # # Fetches static HTML content using requests
-# # fetch_dynamic_page(url: str, driver_path=None) -> str
-# # # Fetches dynamically loaded HTML using Selenium, waits for content to load
-# # get_all_pages(start_url: str) -> list
+# # # Fetches static HTML content for a single URL through the async engine
+# # fetch_dynamic_page(url: str, pool=None, container_selector="body", stats=None, limiter=None, recorder=None, pagination="replace", record_selector=None, tabs=4) -> list
+# # # Fetches dynamically loaded HTML on a leased driver, waits for content to load, handles pagination
+# # # Records first page-load time, page count, captured bytes and browser RSS in `stats`
+# # # pagination="delta": captures only the records appended since the last step (cursor kept in the browser)
+# # # pagination="tabs": loads URL-addressable pages several tabs at a time, in page order (Next clicks as fallback)
+# # get_all_pages(start_url, mode="dynamic", per_host=4, pool=None, container_selector="body", cache=None, stats=None, limiter=None, recorder=None, warc_dir=WARC_DIR, pagination="replace", record_selector=None, tabs=4) -> list
 # # # Entry point for fetching all pages for a given URL, handles pagination and dynamic content
 # # innerHTMLChanged(locator, oldHTML="") -> callable
 # # # Custom Expected Condition: waits until the innerHTML of an element changes
 # # findNextButton(locator, searchText="Next") -> callable
 # # # Custom Expected Condition: waits for a button with matching text to appear
-# # openNextPage(delay=0) -> bool
+# # openNextPage(session: PageSession, delay=0) -> bool
 # # # Clicks the 'Next' button if available, returns True if navigation succeeds, False otherwise
+# # recordsChanged(record_selector) -> callable / captureNewRecords(driver, record_selector) -> dict
+# # # Delta pagination: waits until records were appended (or replaced); serializes only the new records
+# # loadMore(session: PageSession, record_selector) -> bool
+# # # Clicks a 'Next' / 'Load more' button, or scrolls to the last record on infinite-scroll pages
+# # infer_page_pattern(url, hrefs, text="") -> PageURLPattern | None / discover_page_pattern(driver)
+# # # Page URL pattern (?page=N, offset parameter or /page/N) and page count from the pagination links
+# # fetch_pages_in_tabs(lease, urls, tabs=4, container_selector="body", host=None, recorder=None, crawl=None) -> list
+# # # Loads page URLs in several tabs of one browser at once, returns their container HTML in page order
+# # save_error_screenshot(driver, label, folder=ERROR_SCREENSHOT_DIR) -> str | None
+# # # Saves <project>/error_screenshots/<time>-<label>.png when a dynamic fetch fails (never raises)
 #
 # 
 # 2.
 # parser.py - functions to parse property data from HTML
-# # parse_property_block(block) -> dict
-# # # Parses a single property block and extracts fields (address, price, beds, baths, sqft, agent, url)
+# # compile_plan(schema: dict, portal="") -> ExtractionPlan
+# # # Compiles a declarative schema from config/selectors.py: selectors parsed once, shared lookups, text/attr/url handling fixed
+# # get_plan(portal: str) -> ExtractionPlan / compile_plans(portals) -> dict
+# # # Per-portal plans, compiled once per process (all START_URLS portals are compiled and checked at startup)
+# # parse_property_block(block, plan: ExtractionPlan, base_url="") -> dict
+# # # Parses a single property block and extracts the plan's fields (address, price, beds, baths, sqft, agent, date, url)
 # # safe_get_text(block, selector: str, default="") -> str
 # # # Helper: safely extract text from a CSS selector, return default if missing
 # # safe_get_attr(block, selector: str, attr: str, default="") -> str
 # # # Helper: safely extract an attribute (like href) from a CSS selector
-# # parse_page(html_content: str, page_index: int) -> list
+# # parse_page(html_content: str, page_index: int, plan: ExtractionPlan, base_url="") -> list
 # # # Parses all property blocks in a single HTML page, returns list of dictionaries
-# # parse_multiple_pages(list_of_html: list) -> list
+# # parse_multiple_pages(list_of_html: list, plan: ExtractionPlan, base_url="") -> list
 # # # Parses multiple HTML pages, aggregates property dictionaries
 #
 # 
@@ -85,6 +208,14 @@ print("[INFO] All libraries installed correctly...")
 # # # Saves cleaned property data to JSON file
 # # validate_output(data_list: list, required_fields: list) -> bool
 # # # Ensures required fields (address, price, etc.) exist in all rows, returns True if valid
+# # ParquetDatasetWriter(root, scrape_date=None, row_group_size=50000)
+# # # Appends typed rows to output/parquet/portal=<name>/scrape_date=<date>/, one row group per row_group_size rows
+# # export_to_parquet(data_list: list, root: str, scrape_date=None) -> int
+# # # One-shot append of a row list to the partitioned Parquet dataset
+# # read_parquet(root: str, columns=None, portals=None, since=None) -> DataFrame
+# # # Reads only the requested columns and portal / scrape-date partitions
+# # validate_parquet(root: str, schema=None) -> bool
+# # # Checks each file's schema from its footer (pq.read_schema), without reading row data
 
 
 
@@ -102,69 +233,476 @@ START_URLS = [
     ["One Key MLS (Commercial Rentals)", "https://www.onekeymls.com/homes/commercial/rent"]
 ]
 OUTPUT_FOLDER = os.path.join(os.getcwd(), "output")
-OUTPUT_FILE = os.path.join(OUTPUT_FOLDER, "realestate.csv")
+OUTPUT_FILE = os.path.join(OUTPUT_FOLDER, "real_estate_listings.csv")
+REPROCESSED_FILE = os.path.join(OUTPUT_FOLDER, "real_estate_listings_reprocessed.csv")  # `reprocess` output
+PARQUET_FOLDER = os.path.join(OUTPUT_FOLDER, "parquet")
+OUTPUT_COLUMNS = ["portal", "address", "price", "beds", "baths", "sqft", "agent", "date", "url"]
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger(__name__)
 
 # Ensure output folder exists
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
+_worker_pool = None   # warm browsers owned by a portal worker process
+_worker_cache = None  # HTTP response cache opened by a portal worker process
+_worker_limiters = {} # fetch mode -> per-host RateLimiter of a portal worker process
+_worker_frontier = None  # connection to the crawl frontier of a portal worker process
+
+
+# -----------------------------
+# Lazy stage imports
+# -----------------------------
+COMMAND_MODULES = {
+    "run": ["fetcher", "driver_pool", "http_cache", "ratelimit", "parser", "cleaner", "exporter"],
+    "worker": ["fetcher", "driver_pool", "http_cache", "ratelimit", "parser", "cleaner", "exporter"],
+    "reprocess": ["parser", "cleaner", "exporter"],  # no browser, no network
+}
+
+_import_seconds = {}  # module -> seconds spent importing it (including its own imports)
+
+
+def load_modules(*names):
+    """Import stage modules on first use, timing each one. Returns the modules in order."""
+    modules = []
+    for name in names:
+        module = sys.modules.get(name)
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            _import_seconds[name] = time.perf_counter() - start
+            METRICS.observe("import_seconds", _import_seconds[name], module=name)
+        modules.append(module)
+    return modules if len(modules) > 1 else modules[0]
+
+
+def report_startup():
+    """Log how long the process took to get ready, and which imports cost the most."""
+    startup = time.perf_counter() - _STARTED
+    METRICS.observe("startup_seconds", startup)
+    imports = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in sorted(_import_seconds.items(), key=lambda item: -item[1]))
+    logger.info(f"Ready in {startup:.2f}s" + (f" (imports: {imports})" if imports else ""))
+
 
 # -----------------------------
 # Process each portal
 # ----------------------------- Helper to process each portal
-def process_portal(start_url: str, output_path: str):
+def process_portal(name: str, start_url: str, pool=None, cache=None, stats: dict = None, limiter=None) -> list:
     """
     Processes a single real estate portal:
-    1. Fetch all pages
-    2. Parse supporter data
+    1. Fetch all pages (on a warm browser leased from `pool`, or
+       through the static engine and `cache` for static portals)
+    2. Parse listing data
     3. Clean data
-    4. Export to CSV
+    Returns the cleaned rows, tagged with the portal name.
+    Browser fetches record page-load time and browser RSS in `stats`.
+    Requests are paced per host by `limiter` (ratelimit.RateLimiter), when given.
+    With settings.WARC_RECORD every fetched page is archived; in replay mode
+    (settings.REPLAY or FETCH_MODES) pages come from those archives instead.
+    Portals set to "delta" in settings.PAGINATION_MODES capture only the
+    listing cards (the portal schema's block selector) each step adds;
+    "tabs" portals load their page URLs settings.PAGE_TABS at a time.
     """
 
-    print(f"[INFO] Processing portal: {start_url}")
+    logger.info(f"Processing portal: {name} - {start_url}")
+    fetcher, parser, cleaner = load_modules("fetcher", "parser", "cleaner")
+
+    # 1. Fetch all pages
+    logger.info("Fetching pages...")
+    mode = fetch_mode(name)
+    recorder = open_recorder(name) if mode != "replay" else None
+    try:
+        with METRICS.timer("stage_seconds", stage="fetch"):
+            pages_html = fetcher.get_all_pages(
+                start_url, mode=mode, pool=pool, cache=cache, stats=stats, limiter=limiter,
+                recorder=recorder, warc_dir=portal_warc_dir(name),
+                pagination=settings.PAGINATION_MODES.get(name, "replace"), record_selector=get_schema(name)["block"], tabs=settings.PAGE_TABS,
+            )
+    finally:
+        if recorder:
+            recorder.close()
+    logger.info(f"Fetched {len(pages_html)} pages...")
+
+    # 2. Parse listing data
+    logger.info("Parsing listing data...")
+    with METRICS.timer("stage_seconds", stage="parse"):
+        raw_data = parser.parse_multiple_pages(pages_html, parser.get_plan(name), base_url=start_url)
+    logger.info(f"Found {len(raw_data)} listing entries...")
+
+    # 3. Clean data
+    logger.info("Cleaning data...")
+    with METRICS.timer("stage_seconds", stage="clean"):
+        cleaned_data = cleaner.clean_data(raw_data)
+    for row in cleaned_data:
+        row["portal"] = name
+    return cleaned_data
+
+
+def fetch_mode(name: str) -> str:
+    """How a portal's pages are obtained: "replay" (settings.REPLAY), else settings.FETCH_MODES, default "dynamic"."""
+    return "replay" if settings.REPLAY else settings.FETCH_MODES.get(name, "dynamic")
 
-    # # 1. Fetch all pages
-    # print("[INFO] Fetching pages...")
-    # pages_html = fetcher.get_all_pages(start_url)
-    # print(f"[INFO] Fetched {len(pages_html)} pages...")
 
-    # # 2. Parse supporter data
-    # print("[INFO] Parsing supporter data...")
-    # raw_data = parser.parse_multiple_pages(pages_html)
-    # print(f"[INFO] Found {len(raw_data)} supporter entries...")
+def portal_warc_dir(name: str) -> str:
+    return os.path.join(PROJECT_ROOT, settings.WARC_DIR, slugify(name))
 
-    # # 3. Clean data
-    # print("[INFO] Cleaning data...")
-    # cleaned_data = cleaner.clean_data(raw_data)
 
-    # # 4. Export to CSV
-    # print("[INFO] Exporting data to CSV...")
-    # exporter.export_to_csv(cleaned_data, output_path)
+def open_recorder(name: str):
+    """WARC writer for one portal's fetch (settings.WARC_RECORD), or None."""
+    if not settings.WARC_RECORD:
+        return None
+    return WarcWriter(portal_warc_dir(name), prefix=slugify(name), portal=name, max_bytes=settings.WARC_MAX_MB * 1024 * 1024)
+
+
+def lean_profile() -> dict:
+    """get_driver() arguments for the lean browser profile configured in settings."""
+    if not settings.LEAN_BROWSER:
+        return {}
+    return {
+        "lean": True,
+        "resource_types": settings.BLOCKED_RESOURCE_TYPES,
+        "url_patterns": settings.BLOCKED_URL_PATTERNS,
+        "page_load_strategy": settings.PAGE_LOAD_STRATEGY,
+    }
+
+
+def _init_worker():
+    """Give each worker process its own pool of warm browsers and cache handle, closed when the worker exits."""
+    global _worker_pool, _worker_cache, _worker_limiters, _worker_frontier
+
+    driver_pool, http_cache, ratelimit = load_modules("driver_pool", "http_cache", "ratelimit")
+    if not logging.getLogger().handlers:
+        configure_logging(settings.LOG_LEVEL)  # spawned workers start without the parent's handlers
+
+    _worker_pool = driver_pool.DriverPool(
+        size=settings.DRIVER_POOL_SIZE,
+        max_pages=settings.DRIVER_MAX_PAGES,
+        max_rss_mb=settings.DRIVER_MAX_RSS_MB,
+        warm=False,
+        driver_kwargs=lean_profile(),
+    )
+    # atexit does not run in pool workers; multiprocessing finalizers do
+    mp_util.Finalize(_worker_pool, _worker_pool.close, exitpriority=10)
+
+    if settings.HTTP_CACHE_ENABLED:
+        _worker_cache = http_cache.ResponseCache(
+            ttl=settings.HTTP_CACHE_TTL,
+            max_bytes=settings.HTTP_CACHE_MAX_MB * 1024 * 1024,
+            offline=settings.HTTP_CACHE_OFFLINE,
+        )
+        mp_util.Finalize(_worker_cache, _worker_cache.close, exitpriority=10)
+
+    _worker_limiters = {
+        "static": ratelimit.from_settings(settings),
+        "dynamic": ratelimit.from_settings(settings, dynamic=True),
+    }
+    _worker_frontier = open_frontier()
+    mp_util.Finalize(_worker_frontier, _worker_frontier.close, exitpriority=10)
+
+
+def _run_portal_job(index: int, name: str, url: str) -> dict:
+    """
+    Run one portal and never raise: failures are reported in the result
+    so one broken portal cannot take the others down. Metrics are labelled
+    with the portal; a worker process returns them in the result ("metrics").
+    """
+    start = time.perf_counter()
+    stats = {}
+    with labels(portal=name):
+        try:
+            limiter = _worker_limiters.get(fetch_mode(name))
+            rows = process_portal(name, url, pool=_worker_pool, cache=_worker_cache, stats=stats, limiter=limiter)
+            status, error = "ok", ""
+        except Exception as e:
+            logger.error(f"Portal failed: {name} - {e}")
+            rows, status, error = [], "failed", repr(e)
+        METRICS.observe("portal_seconds", time.perf_counter() - start)
+    METRICS.inc("portals_total", status=status, portal=name)
+
+    metrics = None
+    if multiprocessing.parent_process() is not None:
+        # Worker process: hand this job's metrics to the parent and start the next job from zero
+        metrics = METRICS.snapshot()
+        METRICS.reset()
+    return {
+        "index": index,
+        "name": name,
+        "rows": rows,
+        "status": status,
+        "error": error,
+        "seconds": time.perf_counter() - start,
+        "load_seconds": stats.get("load_seconds"),
+        "rss_mb": stats.get("rss_mb"),
+        "metrics": metrics,
+    }
+
+
+def _run_frontier_job():
+    """
+    Lease the next portal from the frontier, run it and ack it (or give it
+    back for another attempt if it failed). The lease is renewed while the
+    portal runs. Waits while other workers still hold portals, whose lease
+    expires if their worker dies. Returns the portal result, or None once
+    no portal is left.
+    """
+    owner = worker_id()
+    items = _worker_frontier.lease(owner, kinds=("portal",), wait=float("inf"))
+    if not items:
+        return None
+    item = items[0]
+    with LeaseKeeper(_worker_frontier.path, item.url, owner, settings.FRONTIER_LEASE_SECONDS):
+        result = _run_portal_job(item.payload["index"], item.payload["name"], item.payload["url"])
+    if result["status"] == "ok":
+        _worker_frontier.ack(item.url, owner)
+        if settings.FRONTIER_QUEUE_LISTINGS:
+            _worker_frontier.add([row["url"] for row in result["rows"] if row.get("url")], kind="listing")
+    else:
+        _worker_frontier.nack(item.url, owner, result["error"])
+    return result
+
+
+def open_parquet_writer():
+    """Parquet dataset writer for this run, or None if disabled or pyarrow is missing."""
+    if not settings.EXPORT_PARQUET:
+        return None
+    exporter = load_modules("exporter")
+    if exporter.pa is None:
+        logger.warning("pyarrow is not installed, skipping Parquet export")
+        return None
+    return exporter.ParquetDatasetWriter(PARQUET_FOLDER, row_group_size=settings.PARQUET_ROW_GROUP_SIZE)
+
+
+def open_frontier() -> Frontier:
+    """Crawl frontier configured in settings (settings.FRONTIER_FILE, relative to the project root)."""
+    return Frontier(
+        os.path.join(PROJECT_ROOT, settings.FRONTIER_FILE),
+        lease_seconds=settings.FRONTIER_LEASE_SECONDS,
+        max_attempts=settings.FRONTIER_MAX_ATTEMPTS,
+        host_concurrency=settings.FRONTIER_HOST_CONCURRENCY,
+        host_delay=settings.FRONTIER_HOST_DELAY,
+        host_overrides=settings.FRONTIER_HOSTS,
+    )
+
+
+def seed_frontier(frontier: Frontier, start_urls: list) -> int:
+    """Queue every portal's start page for this run (again, if an earlier run finished it)."""
+    return sum(
+        frontier.add([url], kind="portal", priority=10, payload={"index": index, "name": name, "url": url}, requeue=True)
+        for index, (name, url) in enumerate(start_urls)
+    )
+
+
+def worker_id() -> str:
+    """Lease owner name of this process, unique across machines sharing the frontier."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def open_warehouse_loader():
+    """Warehouse loader (writer thread) for this run, or None if disabled in settings."""
+    if not settings.WAREHOUSE_ENABLED:
+        return None
+    return WarehouseLoader(SQLiteBackend(), LISTINGS, batch_size=settings.WAREHOUSE_BATCH_SIZE)
+
+
+def report_timings(results: list, total_seconds: float, workers: int):
+    """Print wall-clock time, first page-load time and browser RSS per portal, and the whole run's time."""
+    portal_seconds = sum(result["seconds"] for result in results)
+    logger.info(f"Portal timings (lean browser profile: {'on' if settings.LEAN_BROWSER else 'off'}):")
+    for result in results:
+        load = f"{result['load_seconds']:>6.2f}s load" if result.get("load_seconds") is not None else " " * 11
+        rss = f"{result['rss_mb']:>6.0f} MB" if result.get("rss_mb") else ""
+        logger.info(f"{result['name']:<34} {result['status']:<7} {len(result['rows']):>7} rows {result['seconds']:>8.1f}s {load} {rss}")
+    logger.info(
+        f"Total: {total_seconds:.1f}s wall-clock with {workers} worker(s) on {os.cpu_count()} core(s); "
+        f"portals summed to {portal_seconds:.1f}s (speed-up x{portal_seconds / max(total_seconds, 1e-9):.1f})"
+    )
+
+
+def write_metrics(results: list, total_seconds: float, workers: int):
+    """Write the run's metrics (settings.METRICS_FILE / METRICS_PROM_FILE, relative to the project root)."""
+    if not settings.METRICS_FILE:
+        return
+    prom_path = os.path.join(PROJECT_ROOT, settings.METRICS_PROM_FILE) if settings.METRICS_PROM_FILE else None
+    METRICS.write(
+        os.path.join(PROJECT_ROOT, settings.METRICS_FILE), prom_path,
+        seconds=total_seconds, workers=workers,
+        portals={result["name"]: result["status"] for result in results},
+        finished=time.time(),
+    )
 
 
 # -----------------------------
 # Main workflow
 # -----------------------------
-def run_scraper(start_urls: str, output_path: str):
+def run_scraper(start_urls: list, output_path: str, workers: int = None):
     """
     Orchestrates the scraping workflow:
-    1. Fetch page(s)
-    2. Parse supporter data
-    3. Clean data
-    4. Export to CSV
+    1. Queue every portal in the crawl frontier (data/frontier.sqlite)
+    2. `workers` processes lease portals from it and run them (fetch, parse, clean);
+       a failed portal is retried, a crashed worker's portal is leased again once its lease expires
+    3. Merge the per-portal rows in `start_urls` order
+    4. Export to CSV (and append to the partitioned Parquet dataset / load into the SQLite warehouse)
+    5. Report per-portal and total wall-clock time
     """
 
-    print("[INFO] Starting scraper...")
+    logger.info("Starting scraper...")
+    start = time.perf_counter()
+    parser, exporter = load_modules("parser", "exporter")
+    parser.compile_plans(name for name, _ in start_urls)  # a broken selector schema fails here, before any browser starts
+    workers = workers or settings.PORTAL_WORKERS or min(len(start_urls), os.cpu_count() or 1)
+    with open_frontier() as frontier:
+        seed_frontier(frontier, start_urls)
+    results = {}  # index -> last result of that portal
+    parquet_writer = open_parquet_writer()  # portals are appended as they finish
+    loader = open_warehouse_loader()
+
+    def collect(result: dict):
+        if result["metrics"]:
+            METRICS.merge(result["metrics"])
+        logger.info(f"Finished portal: {result['name']} ({result['status']}, {len(result['rows'])} rows, {result['seconds']:.1f}s)")
+        results[result["index"]] = result
+        if parquet_writer:
+            parquet_writer.write(result["rows"])
+        if loader:
+            loader.submit(result["rows"])
 
-    # Loop through major URLs
-    for name, url in start_urls:
-        print(f"[INFO] Processing portal: {name} - {url}")
-        process_portal(url, output_path)
+    if workers <= 1:
+        # Single worker: run in-process, sharing one pool across portals
+        _init_worker()
+        while (result := _run_frontier_job()) is not None:
+            collect(result)
+        _worker_pool.close()
+        if _worker_cache:
+            _worker_cache.close()
+        _worker_frontier.close()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            running = {executor.submit(_run_frontier_job) for _ in range(workers)}
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # The worker process itself died (e.g. browser crash took it down)
+                        logger.error(f"Portal worker crashed: {e}")
+                        continue
+                    if result is not None:
+                        collect(result)
+                        running.add(executor.submit(_run_frontier_job))
 
-    print(f"[INFO] Scraper finished successfully.")
+    for index, (name, url) in enumerate(start_urls):
+        if index not in results:
+            # Its worker crashed; the portal stays in the frontier and is leased again once the lease expires
+            results[index] = {"index": index, "name": name, "rows": [], "status": "crashed", "error": "worker crashed", "seconds": 0.0, "load_seconds": None, "rss_mb": None, "metrics": None}
+            METRICS.inc("portals_total", status="crashed", portal=name)
+
+    # Merge deterministically: START_URLS order, then page order within a portal
+    results = [results[index] for index in sorted(results)]
+    merged = [row for result in results for row in result["rows"]]
+    exporter.export_to_csv(merged, output_path, columns=OUTPUT_COLUMNS)
+    if parquet_writer:
+        parquet_writer.close()
+        logger.info(f"Parquet exported to: {PARQUET_FOLDER} ({parquet_writer.rows_written} rows)")
+    if loader:
+        loader.close()  # waits for the writer thread to commit the last batch
+
+    total_seconds = time.perf_counter() - start
+    report_timings(results, total_seconds, workers)
+    write_metrics(results, total_seconds, workers)
+    failed = [result["name"] for result in results if result["status"] != "ok"]
+    if failed:
+        logger.warning(f"{len(failed)} portal(s) failed: {', '.join(failed)}")
+    logger.info("Scraper finished.")
+    return results
+
+
+def run_worker() -> int:
+    """
+    Extra worker for a run in progress, e.g. on another machine sharing
+    settings.FRONTIER_FILE: leases portals until none is left. Its rows go to
+    the Parquet dataset and the warehouse (the CSV holds what run_scraper's
+    own workers scraped). Returns the number of portals run.
+    """
+    logger.info(f"Worker {worker_id()} draining {settings.FRONTIER_FILE}")
+    parquet_writer = open_parquet_writer()
+    loader = open_warehouse_loader()
+    _init_worker()
+    portals = 0
+    try:
+        while (result := _run_frontier_job()) is not None:
+            portals += 1
+            logger.info(f"Finished portal: {result['name']} ({result['status']}, {len(result['rows'])} rows, {result['seconds']:.1f}s)")
+            if parquet_writer:
+                parquet_writer.write(result["rows"])
+            if loader:
+                loader.submit(result["rows"])
+    finally:
+        _worker_pool.close()
+        if parquet_writer:
+            parquet_writer.close()
+        if loader:
+            loader.close()
+    return portals
+
+
+# -----------------------------
+# Reprocessing archived crawls
+# -----------------------------
+def reprocess_archive(path: str) -> dict:
+    """Parse and clean every page of one WARC file with the current extraction plans (no browser, no network)."""
+    start = time.perf_counter()
+    parser, cleaner = load_modules("parser", "cleaner")  # worker processes import only what parsing needs
+    rows, pages = [], 0
+    for entry, html in iter_archive_pages(path):
+        if not entry.portal:
+            continue
+        pages += 1
+        listings = parser.parse_page(html, entry.page or pages, parser.get_plan(entry.portal), base_url=entry.crawl or entry.url)
+        for row in cleaner.clean_data(listings):
+            row["portal"] = entry.portal
+            rows.append(row)
+    return {"path": path, "rows": rows, "pages": pages, "seconds": time.perf_counter() - start}
+
+
+def reprocess_archives(output_path: str, since: str = None, until: str = None, workers: int = None) -> int:
+    """
+    Re-parse archived crawls (settings.WARC_DIR, optionally only files dated
+    `since`..`until`, "YYYYMMDD") and export the rows to `output_path`.
+    Files are parsed in parallel, one per worker process, so a month of
+    archives is bound by CPU only. Returns the number of rows written.
+    """
+    paths = find_archives(os.path.join(PROJECT_ROOT, settings.WARC_DIR), since, until)
+    workers = workers or settings.REPROCESS_WORKERS or os.cpu_count() or 1
+    logger.info(f"Reprocessing {len(paths)} archive(s) with {workers} worker(s)...")
+    start = time.perf_counter()
+    if workers <= 1 or len(paths) <= 1:
+        results = [reprocess_archive(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(reprocess_archive, paths))  # archive order, oldest first
+    merged = [row for result in results for row in result["rows"]]
+    load_modules("exporter").export_to_csv(merged, output_path, columns=OUTPUT_COLUMNS)
+    pages = sum(result["pages"] for result in results)
+    seconds = time.perf_counter() - start
+    logger.info(f"Reprocessed {pages} page(s) into {len(merged)} rows in {seconds:.1f}s ({pages / max(seconds, 1e-9):.0f} pages/s)")
+    return len(merged)
 
 
 # -----------------------------
 # Entry point
 # -----------------------------
 if __name__ == "__main__":
-    run_scraper(START_URLS, OUTPUT_FILE)
+    # python scraper.py          seed the frontier with START_URLS, scrape, export
+    # python scraper.py worker   help drain a running scrape's frontier
+    # python scraper.py reprocess [SINCE [UNTIL]]   re-parse archived crawls (dates as YYYYMMDD)
+    configure_logging(settings.LOG_LEVEL, os.path.join(PROJECT_ROOT, settings.LOG_FILE) if settings.LOG_FILE else None)
+    command = sys.argv[1] if sys.argv[1:2] in (["worker"], ["reprocess"]) else "run"
+    load_modules(*COMMAND_MODULES[command])
+    report_startup()
+    if command == "worker":
+        run_worker()
+    elif command == "reprocess":
+        reprocess_archives(REPROCESSED_FILE, *sys.argv[2:4])
+    else:
+        run_scraper(START_URLS, OUTPUT_FILE)
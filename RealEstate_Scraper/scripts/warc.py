@@ -0,0 +1,318 @@
+"""
+warc.py
+
+WARC archive of every captured page (data/raw/warc), so a crawl can be
+re-parsed later without a browser or the network.
+Each record is its own gzip member (standard .warc.gz), and a sidecar
+offset index (<file>.idx, JSON lines) lets a reader seek straight to a
+page. Static fetches are stored as `response` records with the HTTP status
+line and headers; browser captures as `resource` records of the container
+HTML. Every record carries the crawl's start URL and page number.
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+logger = logging.getLogger(__name__)
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+WARC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "raw", "warc")
+MAX_FILE_BYTES = 1024 ** 3   # start a new file once this many compressed bytes are written
+COMPRESS_LEVEL = 6
+READ_CHUNK = 1 << 20
+
+# Extension fields (WARC allows any field name)
+CRAWL_FIELD = "WARC-X-Crawl-URI"   # start URL of the portal crawl the page belongs to
+PAGE_FIELD = "WARC-X-Page"         # 1-based page number within that crawl
+PORTAL_FIELD = "WARC-X-Portal"
+
+WarcRecord = namedtuple("WarcRecord", "headers status http_headers body offset length")
+IndexEntry = namedtuple("IndexEntry", "url crawl page portal type date offset length")
+
+HTTP_HEADERS_DROPPED = {"content-length", "content-encoding", "transfer-encoding"}  # the stored body is decoded
+
+
+def _warc_date(timestamp: float = None) -> str:
+    return datetime.fromtimestamp(timestamp or time.time(), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "crawl"
+
+
+# -----------------------------
+# Writer
+# -----------------------------
+class WarcWriter:
+    """
+    Appends records to <folder>/<prefix>-<time>-<pid>-<n>.warc.gz, rolling
+    over to a new file after `max_bytes`. Thread-safe.
+    Usage: `with WarcWriter(folder, portal=name) as recorder: recorder.write_resource(url, html, crawl, page)`
+    """
+
+    def __init__(self, folder=WARC_DIR, prefix="crawl", portal: str = None, max_bytes=MAX_FILE_BYTES):
+        self.folder = folder
+        self.prefix = prefix
+        self.portal = portal
+        self.max_bytes = max_bytes
+        self.records = 0
+        self.paths = []
+        self._file = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        os.makedirs(self.folder, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        path = os.path.join(self.folder, f"{self.prefix}-{stamp}-{os.getpid()}-{len(self.paths)}.warc.gz")
+        self._file = open(path, "ab")
+        self._index = open(path + ".idx", "a", encoding="utf-8")
+        self.paths.append(path)
+        info = f"software: RealEstate_Scraper\r\nformat: WARC File Format 1.1\r\nportal: {self.portal or ''}\r\n".encode("utf-8")
+        self._append({"WARC-Type": "warcinfo", "Content-Type": "application/warc-fields", "WARC-Filename": os.path.basename(path)}, info)
+
+    def _append(self, fields: dict, block: bytes) -> tuple:
+        headers = {
+            "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+            "WARC-Date": _warc_date(),
+            **fields,
+            "Content-Length": str(len(block)),
+        }
+        head = "WARC/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+        data = gzip.compress(head.encode("utf-8") + block + b"\r\n\r\n", compresslevel=COMPRESS_LEVEL)
+        offset = self._file.tell()
+        self._file.write(data)
+        return headers, offset, len(data)
+
+    def _write(self, fields: dict, block: bytes, crawl: str, page: int):
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_bytes:
+                self.close()
+                self._open()
+            if self.portal:
+                fields[PORTAL_FIELD] = self.portal
+            if crawl:
+                fields[CRAWL_FIELD] = crawl
+            if page is not None:
+                fields[PAGE_FIELD] = str(page)
+            headers, offset, length = self._append(fields, block)
+            entry = IndexEntry(fields["WARC-Target-URI"], crawl, page, self.portal, fields["WARC-Type"], headers["WARC-Date"], offset, length)
+            self._index.write(json.dumps(entry._asdict()) + "\n")
+            self._file.flush()  # a crash loses at most the record being written
+            self._index.flush()
+            self.records += 1
+
+    def write_response(self, url: str, body: str, status: int = 200, headers: dict = None, crawl: str = None, page: int = None):
+        """Record an HTTP response (status line, headers and decoded body)."""
+        body_bytes = body.encode("utf-8")
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        lines = [f"HTTP/1.1 {status} {reason}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items() if name.lower() not in HTTP_HEADERS_DROPPED]
+        lines.append(f"Content-Length: {len(body_bytes)}")
+        block = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + body_bytes
+        self._write({"WARC-Type": "response", "WARC-Target-URI": url, "Content-Type": "application/http;msgtype=response"}, block, crawl, page)
+
+    def write_resource(self, url: str, body: str, crawl: str = None, page: int = None, content_type="text/html; charset=utf-8"):
+        """Record content captured without an HTTP response (a browser page's container HTML)."""
+        self._write({"WARC-Type": "resource", "WARC-Target-URI": url, "Content-Type": content_type}, body.encode("utf-8"), crawl, page)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+            self._file = self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# -----------------------------
+# Reader
+# -----------------------------
+def _parse_record(data: bytes, offset: int, length: int) -> WarcRecord:
+    head, _, rest = data.partition(b"\r\n\r\n")
+    lines = head.decode("utf-8").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+    block = rest[:int(headers.get("Content-Length", len(rest)))]
+    status, http_headers = None, {}
+    if headers.get("WARC-Type") == "response":
+        http_head, _, block = block.partition(b"\r\n\r\n")
+        http_lines = http_head.decode("iso-8859-1").split("\r\n")
+        status = int(http_lines[0].split(" ")[1])
+        http_headers = dict(line.split(": ", 1) for line in http_lines[1:] if ": " in line)
+    return WarcRecord(headers, status, http_headers, block.decode("utf-8", errors="replace"), offset, length)
+
+
+class WarcReader:
+    """
+    Reads one .warc.gz file: sequentially (records()) or at an offset from
+    the index (read_at()). The index comes from the .idx sidecar, completed
+    (or rebuilt, if the sidecar is missing) by scanning the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+
+    def read_at(self, offset: int, length: int = None) -> WarcRecord:
+        """The record starting at `offset` (one gzip member)."""
+        self._file.seek(offset)
+        if length:
+            return _parse_record(gzip.decompress(self._file.read(length)), offset, length)
+        return next(self._scan(offset))
+
+    def records(self):
+        """Every record in file order."""
+        return self._scan(0)
+
+    def _scan(self, offset: int):
+        """Yield records from `offset` on, finding gzip member boundaries as it goes."""
+        self._file.seek(offset)
+        pending = b""
+        while True:
+            if not pending:
+                pending = self._file.read(READ_CHUNK)
+                if not pending:
+                    return
+            member = zlib.decompressobj(31)
+            out, fed = [], 0
+            while True:
+                out.append(member.decompress(pending))
+                fed += len(pending)
+                if member.eof:
+                    pending = member.unused_data
+                    length = fed - len(pending)
+                    break
+                pending = self._file.read(READ_CHUNK)
+                if not pending:
+                    return  # torn last record
+            yield _parse_record(b"".join(out), offset, length)
+            offset += length
+
+    def index(self) -> list:
+        """
+        IndexEntry for every page record (warcinfo excluded), in file order.
+        Records the sidecar does not list (no sidecar, or a crash between a
+        record and its index line, possibly leaving that line torn) are
+        found by scanning the file after the last indexed record.
+        """
+        entries, offset = [], 0
+        sidecar = self.path + ".idx"
+        if os.path.exists(sidecar):
+            with open(sidecar, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(IndexEntry(**json.loads(line)))
+                    except (ValueError, TypeError):
+                        break  # torn last line
+            if entries:
+                offset = entries[-1].offset + entries[-1].length
+        for record in self._scan(offset):
+            h = record.headers
+            if h.get("WARC-Type") in ("response", "resource"):
+                page = h.get(PAGE_FIELD)
+                entries.append(IndexEntry(h.get("WARC-Target-URI"), h.get(CRAWL_FIELD), int(page) if page else None,
+                                          h.get(PORTAL_FIELD), h["WARC-Type"], h.get("WARC-Date"), record.offset, record.length))
+        return entries
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# -----------------------------
+# Archives
+# -----------------------------
+def _archive_order(path: str) -> tuple:
+    match = re.search(r"-(\d{8})-(\d{6})-(\d+)-(\d+)\.warc\.gz$", os.path.basename(path))
+    return tuple(match.groups()[:2]) + tuple(int(n) for n in match.groups()[2:]) if match else ("", "", 0, 0)
+
+
+def find_archives(folder=WARC_DIR, since: str = None, until: str = None) -> list:
+    """All .warc.gz files under `folder`, oldest first; `since`/`until` ("YYYYMMDD") filter on the file's date."""
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(".warc.gz"):
+                continue
+            day = _archive_order(name)[0]
+            if (since and day < since) or (until and day > until):
+                continue
+            paths.append(os.path.join(root, name))
+    return sorted(paths, key=lambda path: (_archive_order(path), os.path.getmtime(path)))  # same-second files: last written last
+
+
+def iter_archive_pages(path: str):
+    """Yield (entry, html) for every page in one archive file, in recording order."""
+    with WarcReader(path) as reader:
+        for entry in reader.index():
+            yield entry, reader.read_at(entry.offset, entry.length).body
+
+
+def _read_entries(hits: list) -> list:
+    """Bodies of [(archive, entry)], opening each archive once."""
+    readers = {}
+    try:
+        pages = []
+        for path, entry in hits:
+            if entry is None:
+                pages.append("")
+                continue
+            reader = readers.get(path) or readers.setdefault(path, WarcReader(path))
+            pages.append(reader.read_at(entry.offset, entry.length).body)
+        return pages
+    finally:
+        for reader in readers.values():
+            reader.close()
+
+
+def replay_pages(start_url, folder=WARC_DIR, archives: list = None) -> list:
+    """
+    Pages of the most recent recorded crawl of `start_url` (a crawl start
+    URL, or a list of static page URLs), in page / list order, read straight
+    from the archive through the offset index. Pages never recorded are "".
+    """
+    crawls = {}  # crawl URL -> [(archive, entry)] of its latest crawl (which may span rolled-over files)
+    latest = {}  # page URL -> (archive, entry) of its latest capture
+    for path in archives if archives is not None else find_archives(folder):
+        with WarcReader(path) as reader:
+            entries = reader.index()
+        for entry in entries:
+            if entry.crawl:
+                if entry.page == 1 or entry.crawl not in crawls:
+                    crawls[entry.crawl] = []  # a new crawl of this URL starts
+                crawls[entry.crawl].append((path, entry))
+            latest[entry.url] = (path, entry)
+
+    if isinstance(start_url, str) and start_url in crawls:
+        return _read_entries(sorted(crawls[start_url], key=lambda hit: hit[1].page or 0))
+
+    urls = [start_url] if isinstance(start_url, str) else list(start_url)
+    for url in urls:
+        if url not in latest:
+            logger.warning(f"Not in the archive: {url}")
+    return _read_entries([latest.get(url, (None, None)) for url in urls])
@@ -0,0 +1,90 @@
+"""
+bench_cleaner.py
+
+Cleans synthetic raw supporter records with the old per-row loop and with
+BatchCleaner, checks both agree on values the old loop could parse, and
+reports rows/s for each.
+
+Usage: python bench_cleaner.py [records]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "script"))
+
+import cleaner
+from fixtures import LOCATIONS, MESSAGES, MONTHS, NAMES
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+RECORDS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def make_records(total: int) -> list:
+    rng = random.Random(0)
+    amounts = ["$1", "$5", "$10", "$25", "$50", "$100", "$1,000", "$2,500", "n/a"]
+    return [
+        {
+            "name": f" {rng.choice(NAMES)} ",
+            "amount": rng.choice(amounts),
+            "date": f"{rng.randint(1, 28)} {rng.choice(MONTHS)} {rng.randint(2021, 2025)}",
+            "location": rng.choice(LOCATIONS),
+            "message": rng.choice(MESSAGES),
+        }
+        for _ in range(total)
+    ]
+
+
+def legacy_clean(records: list) -> list:
+    """The per-row loop clean_data used before BatchCleaner."""
+    return [
+        {
+            "name": cleaner.clean_name(entry.get("name", "")),
+            "amount": cleaner.clean_amount(entry.get("amount", "0")),
+            "date": cleaner.clean_date(entry.get("date", "")),
+            "location": entry.get("location", "").strip(),
+            "message": entry.get("message", "").strip(),
+        }
+        for entry in records
+    ]
+
+
+def main():
+    records = make_records(RECORDS)
+    print(f"[INFO] {len(records)} raw records")
+
+    start = time.perf_counter()
+    legacy = legacy_clean(records)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_cleaner = cleaner.BatchCleaner()
+    batch = batch_cleaner.clean_records(records)
+    batch_seconds = time.perf_counter() - start
+
+    for label, seconds in (("per-row", legacy_seconds), ("batch", batch_seconds)):
+        print(f"[INFO] {label:8s}: {seconds:6.2f}s ({len(records) / seconds:,.0f} rows/s)")
+    print(f"[INFO] Rejected values: {dict(batch_cleaner.rejected)}")
+
+    # The old loop turned unparseable amounts into 0.0; the batch cleaner leaves them missing
+    mismatches = sum(
+        1 for old, new in zip(legacy, batch)
+        if {**old, "amount": old["amount"] or None} != new
+    )
+    if mismatches:
+        print(f"[ERROR] {mismatches} row(s) differ between the two cleaners")
+        sys.exit(1)
+    print("[INFO] Batch cleaner matches the per-row loop")
+
+
+if __name__ == "__main__":
+    main()
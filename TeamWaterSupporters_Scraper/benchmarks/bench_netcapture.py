@@ -0,0 +1,90 @@
+"""
+bench_netcapture.py
+
+Runs the DOM fetcher and the network-capture mode against a local stand-in
+page that loads its supporters over XHR, checks both produce the same
+cleaned rows and reports time per page for each. Needs Chrome.
+
+Usage: python bench_netcapture.py [pages]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "script"))
+
+import cleaner, fetcher, netcapture, parser
+from driver_pool import DriverPool
+from standin_server import StandinServer
+from fixtures import LOCATIONS, MESSAGES, MONTHS, NAMES, SUPPORTERS_PER_PAGE
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+PAYLOAD_TIMEOUT = 3
+
+
+# -----------------------------
+# Stand-in API
+# -----------------------------
+def make_api(pages: int):
+    rng = random.Random(0)
+    data = [
+        [
+            {
+                "display_name": rng.choice(NAMES),
+                "amount": rng.choice([1, 5, 10, 25, 50, 100]),
+                "created_at": f"{rng.randint(1, 28)} {rng.choice(MONTHS)} 2025",
+                "location": rng.choice(LOCATIONS),
+                "message": rng.choice(MESSAGES).replace("&amp;", "&"),
+            }
+            for _ in range(SUPPORTERS_PER_PAGE)
+        ]
+        for _ in range(pages)
+    ]
+
+    def api(query, headers):
+        page = int(query.get("page", ["1"])[0])
+        body = {"page": page, "data": data[page - 1] if page <= pages else [], "has_more": page < pages}
+        return 200, "application/json", json.dumps(body)
+
+    return api
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def main():
+    with open(os.path.join(HERE, "standin_pages", "xhr_donations.html"), encoding="utf-8") as f:
+        page_html = f.read()
+    routes = {"/donations": page_html, "/api/donations": make_api(PAGES)}
+
+    with StandinServer(routes) as server, DriverPool(size=1, driver_kwargs={"capture_network": True}) as pool:
+        url = server.url("/donations")
+
+        start = time.perf_counter()
+        dom_rows = cleaner.clean_data(parser.parse_multiple_pages(fetcher.fetch_dynamic_page(url, pool=pool)))
+        dom_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        records = [r for batch in netcapture.iter_page_records(url, pool=pool, timeout=PAYLOAD_TIMEOUT) for r in batch]
+        net_rows = cleaner.clean_data(records)
+        net_seconds = time.perf_counter() - start
+
+    print(f"[INFO] dom:     {len(dom_rows)} rows in {dom_seconds:.2f}s")
+    print(f"[INFO] network: {len(net_rows)} rows in {net_seconds:.2f}s")
+    if dom_rows != net_rows:
+        print("[ERROR] Network capture rows differ from DOM rows")
+        sys.exit(1)
+    print("[INFO] Network capture rows match DOM rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+bench_page_transition.py
+
+Paginates a local stand-in page whose Next button swaps the supporters
+container after a short server round trip, once with innerHTMLChanged
+polling and once with the browser-side MutationObserver wait. Checks both
+capture the same pages and reports per-page transition latency. Needs Chrome.
+
+Usage: python bench_page_transition.py [pages] [supporters_per_page]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "script"))
+
+import fetcher
+from driver_pool import DriverPool
+from standin_server import StandinServer
+from fixtures import make_page
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+SUPPORTERS = int(sys.argv[2]) if len(sys.argv) > 2 else 500  # large containers make polling expensive
+
+STANDIN_PAGE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Stand-in donations (page swap)</title></head>
+<body>
+  <div class="min-h-160" id="supporters">Loading...</div>
+  <button id="next" type="button">Next</button>
+  <script>
+    const container = document.getElementById("supporters");
+    const next = document.getElementById("next");
+    let page = 1;
+    async function load() {
+      const response = await fetch("/fragment?page=" + page);
+      container.innerHTML = await response.text();
+      if (page >= %(pages)d) next.disabled = true;
+    }
+    next.addEventListener("click", () => { page += 1; load(); });
+    load();
+  </script>
+</body>
+</html>
+"""
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def timed_pages(url: str, pool: DriverPool, wait_mode: str):
+    """Return (pages, seconds between consecutive captured pages)."""
+    pages, gaps = [], []
+    last = time.perf_counter()
+    for html in fetcher.iter_pages(url, pool=pool, wait_mode=wait_mode):
+        now = time.perf_counter()
+        if pages:
+            gaps.append(now - last)
+        pages.append(html)
+        last = now
+    return pages, gaps
+
+
+def main():
+    fragments = [make_page(SUPPORTERS, seed=i) for i in range(PAGES)]
+
+    def fragment(query, headers):
+        return 200, "text/html; charset=utf-8", fragments[int(query.get("page", ["1"])[0]) - 1]
+
+    routes = {"/donations": STANDIN_PAGE % {"pages": PAGES}, "/fragment": fragment}
+    print(f"[INFO] {PAGES} pages, {len(fragments[0]) / 1024:.0f} KB of container HTML per page")
+
+    with StandinServer(routes, latency=0.02) as server, DriverPool(size=1) as pool:
+        url = server.url("/donations")
+        results = {}
+        for mode in ("poll", "observer"):
+            pages, gaps = timed_pages(url, pool, mode)
+            results[mode] = pages
+            if gaps:
+                print(
+                    f"[INFO] {mode:8s}: {len(pages)} pages, transition "
+                    f"median {statistics.median(gaps) * 1000:.0f} ms, max {max(gaps) * 1000:.0f} ms"
+                )
+
+    if results["poll"] != results["observer"] or len(results["observer"]) != PAGES:
+        print("[ERROR] Observer wait captured different pages than polling")
+        sys.exit(1)
+    print("[INFO] Both modes captured identical pages")
+
+
+if __name__ == "__main__":
+    main()
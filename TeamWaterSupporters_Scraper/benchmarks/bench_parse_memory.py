@@ -0,0 +1,129 @@
+"""
+bench_parse_memory.py
+
+Peak parse memory against page size. Parses one synthetic page of 20 to
+N supporters with every backend in full and restricted mode, each in a
+fresh process, and reports the peak above the page itself: Python heap
+(tracemalloc) and resident memory (ru_maxrss, which also covers
+libxml2's allocations that tracemalloc cannot see). The "document" pages
+wrap the supporters in unrelated page markup (navigation, scripts,
+footer), as a full-page capture would, which the restricted modes skip.
+Finally reports what stays allocated after a crawl of many pages with the
+garbage collector off, i.e. page trees not freed right after extraction.
+
+Usage: python bench_parse_memory.py [max_supporters_per_page]
+"""
+
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "script"))
+
+import parser
+from fixtures import make_page, make_pages
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+MAX_SUPPORTERS = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1] != "--child" else 5000
+PAGE_SIZES = [n for n in (20, 200, 1000, 5000, 20000) if n <= MAX_SUPPORTERS]
+BACKENDS = ["bs4", "lxml"] if parser.lxml_html is not None else ["bs4"]
+MODES = [(backend, restricted) for backend in BACKENDS for restricted in (False, True)]
+CRAWL_SUPPORTERS = 4000   # supporters in the retained-memory crawl (20 per page)
+NAV_LINKS = 400           # size of the unrelated markup around a "document" page
+
+
+# -----------------------------
+# Pages
+# -----------------------------
+def as_document(container: str) -> str:
+    nav = "".join(f'<li class="nav-item"><a href="/p/{n}">Project {n}</a></li>' for n in range(NAV_LINKS))
+    script = "<script>" + "var x = 1;" * 5000 + "</script>"
+    footer = "".join(f'<div class="footer-col"><p>Footer text {n}</p></div>' for n in range(NAV_LINKS // 2))
+    return f"<html><head>{script}</head><body><ul>{nav}</ul><main>{container}</main><footer>{footer}</footer></body></html>"
+
+
+def build_page(supporters: int, kind: str) -> str:
+    container = make_page(supporters)
+    return as_document(container) if kind == "document" else container
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def mode_name(backend: str, restricted: bool) -> str:
+    return f"{backend}/{'restricted' if restricted else 'full'}"
+
+
+def measure_child(supporters: int, kind: str, backend: str, restricted: bool):
+    """Runs in a fresh process: print {"page", "heap", "rss"} in bytes for one parse."""
+    html = build_page(supporters, kind)
+    engine = parser.get_backend(backend, restricted)
+    engine.parse_page(make_page(2))  # warm up (imports, compiled patterns)
+    gc.collect()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rows = engine.parse_page(html)
+    rss = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024  # ru_maxrss is in KB on Linux
+    del rows
+    gc.collect()
+    tracemalloc.start()  # second parse: tracemalloc's own bookkeeping would inflate the RSS figure
+    baseline = tracemalloc.get_traced_memory()[0]
+    rows = engine.parse_page(html)
+    heap = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    print(json.dumps({"page": len(html.encode("utf-8")), "heap": heap, "rss": rss, "rows": len(rows)}))
+
+
+def peak(supporters: int, kind: str, backend: str, restricted: bool) -> dict:
+    out = subprocess.check_output([sys.executable, __file__, "--child", str(supporters), kind, backend, str(int(restricted))], text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def retained_bytes(pages: list, backend: str, restricted: bool) -> int:
+    """Python memory still allocated after parsing `pages`, with the GC off, minus the rows themselves."""
+    engine = parser.get_backend(backend, restricted)
+    gc.collect()
+    gc.disable()
+    try:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        rows = [row for html in pages for row in engine.parse_page(html)]
+        held = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        rows_only = sum(sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values()) for row in rows)
+        return max(0, held - rows_only)
+    finally:
+        gc.enable()
+        gc.collect()
+
+
+def main():
+    print(f"{'page':<18}{'page KB':>8}  {'mode':<16}{'heap peak':>16}{'RSS peak':>16}")
+    for supporters in PAGE_SIZES:
+        for kind in ("container", "document"):
+            for mode in MODES:
+                result = peak(supporters, kind, *mode)
+                size = result["page"]
+                print(f"{f'{supporters} {kind}':<18}{size / 1024:>8.0f}  {mode_name(*mode):<16}"
+                      f"{result['heap'] / 1024:>9.0f} KB {result['heap'] / size:>4.1f}x"
+                      f"{result['rss'] / 1024:>9.0f} KB {result['rss'] / size:>4.1f}x")
+
+    pages = make_pages(CRAWL_SUPPORTERS)
+    print(f"\nRetained after parsing {len(pages)} pages with gc disabled (excluding the rows):")
+    for mode in MODES:
+        print(f"  {mode_name(*mode):<16}{retained_bytes(pages, *mode) / 1024:>9.0f} KB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        supporters, kind, backend, restricted = sys.argv[2:6]
+        measure_child(int(supporters), kind, backend, restricted == "1")
+    else:
+        main()
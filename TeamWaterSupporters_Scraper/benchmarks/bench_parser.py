@@ -0,0 +1,73 @@
+"""
+bench_parser.py
+
+Checks that every parser backend, in full and restricted mode, returns
+identical rows on the saved fixture pages and on synthetic pages, then
+reports rows/s for each. The saved fixtures include fields with embedded
+<script>, <style>, <template> and comments, whose content is not text,
+and supporter blocks nested inside other .white-box blocks.
+
+Usage: python bench_parser.py [supporters]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "script"))
+
+import parser
+from fixtures import make_pages, saved_pages
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+SUPPORTERS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+BACKENDS = ["bs4", "lxml"] if parser.lxml_html is not None else ["bs4"]
+MODES = [(backend, restricted) for backend in BACKENDS for restricted in (False, True)]  # (bs4, full) is the reference
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def mode_name(backend: str, restricted: bool) -> str:
+    return f"{backend}/{'restricted' if restricted else 'full'}"
+
+
+def parse_all(pages: list, backend: str, restricted: bool = False) -> list:
+    rows = []
+    for html in pages:
+        rows.extend(parser.get_backend(backend, restricted).parse_page(html))
+    return rows
+
+
+def check_identical(pages: list, label: str) -> bool:
+    reference = parse_all(pages, *MODES[0])
+    for mode in MODES[1:]:
+        rows = parse_all(pages, *mode)
+        if rows != reference:
+            mismatch = next((i for i, (a, b) in enumerate(zip(reference, rows)) if a != b), min(len(rows), len(reference)))
+            print(f"[ERROR] {mode_name(*mode)} differs from {mode_name(*MODES[0])} on {label} at row {mismatch}")
+            return False
+    print(f"[INFO] {label}: {len(reference)} rows identical across {', '.join(mode_name(*mode) for mode in MODES)}")
+    return True
+
+
+def main():
+    ok = check_identical(saved_pages(), "saved fixtures")
+    pages = make_pages(SUPPORTERS)
+    ok = check_identical(pages[:50], "synthetic sample") and ok
+
+    for mode in MODES:
+        start = time.perf_counter()
+        rows = parse_all(pages, *mode)
+        elapsed = time.perf_counter() - start
+        print(f"[INFO] {mode_name(*mode):<15} {len(rows)} rows in {elapsed:.2f}s ({len(rows) / elapsed:,.0f} rows/s)")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
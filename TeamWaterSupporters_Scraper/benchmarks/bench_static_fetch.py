@@ -0,0 +1,46 @@
+"""
+bench_static_fetch.py
+
+Compares the async static fetch engine at different per-host limits against
+a local stand-in server with simulated latency.
+
+Usage: python bench_static_fetch.py [pages] [latency_seconds]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "script"))
+
+import fetcher
+from standin_server import StandinServer
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+PER_HOST_LEVELS = [1, 4, 16]
+PAGE_BODY = "<html><body>" + "<div class='white-box'>supporter</div>" * 50 + "</body></html>"
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def main():
+    routes = {f"/donations/{i}": PAGE_BODY for i in range(PAGES)}
+    with StandinServer(routes, latency=LATENCY) as server:
+        urls = [server.url(f"/donations/{i}") for i in range(PAGES)]
+        for per_host in PER_HOST_LEVELS:
+            start = time.perf_counter()
+            pages = fetcher.get_all_pages(urls, mode="static", per_host=per_host)
+            elapsed = time.perf_counter() - start
+            ok = sum(1 for page in pages if page)
+            print(f"[INFO] per_host={per_host:<3} {ok}/{PAGES} pages in {elapsed:.2f}s ({ok / elapsed:.1f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()
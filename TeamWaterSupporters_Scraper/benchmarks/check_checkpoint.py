@@ -0,0 +1,158 @@
+"""
+check_checkpoint.py
+
+Checks crash-safe crawl checkpoints (script/checkpoint.py) on a throw-away
+folder:
+  1. a crawl killed after some pages resumes at the next page, and the
+     logged pages followed by the fresh ones give every page exactly once;
+  2. a torn last line (crash mid-write) is cut off on open and the log
+     keeps growing cleanly after it;
+  3. a gap in the page numbers ends the log there;
+  4. record() refuses a page out of order;
+  5. record logs ("rows", network capture) replay as rows;
+  6. fresh=True and remove() start the next crawl from page 1.
+Exits with status 1 if any check fails.
+
+Usage: python check_checkpoint.py [pages]
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "script"))
+
+from checkpoint import Checkpoint, checkpoint_path, page_hash
+from fixtures import make_page
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+CRASH_AFTER = PAGES // 2 + 1
+URL = "https://teamwater.test/donations"
+
+_failures = []
+
+
+def check(label: str, ok: bool, detail=""):
+    print(f"[{'OK' if ok else 'ERROR'}] {label}" + (f" ({detail})" if detail and not ok else ""))
+    if not ok:
+        _failures.append(label)
+
+
+# -----------------------------
+# Crawl stand-in
+# -----------------------------
+def crawl(path: str, crash_after: int = None):
+    """Log pages from the checkpoint's next page on, like fetcher.iter_pages; os._exit() mid-crawl simulates a crash."""
+    checkpoint = Checkpoint.open(path)
+    for page in range(checkpoint.next_page, PAGES + 1):
+        html = make_page(seed=page)
+        checkpoint.record(page, {"page": page, "url": URL, "hash": page_hash(html)}, html=html)
+        if page == crash_after:
+            os._exit(1)  # no close(), no cleanup
+        yield html
+    checkpoint.complete = True
+    checkpoint.close()
+
+
+def crashing_crawl(path: str):
+    for _ in crawl(path, crash_after=CRASH_AFTER):
+        pass
+
+
+def read_lines(path: str) -> list:
+    with open(path, "rb") as f:
+        return f.readlines()
+
+
+# -----------------------------
+# Checks
+# -----------------------------
+def check_resume(folder: str):
+    path = checkpoint_path(URL, folder=folder)
+    worker = multiprocessing.Process(target=crashing_crawl, args=(path,))
+    worker.start()
+    worker.join()
+    checkpoint = Checkpoint.open(path)
+    check(f"crawl killed after page {CRASH_AFTER} resumes at page {CRASH_AFTER + 1}", checkpoint.next_page == CRASH_AFTER + 1, checkpoint.next_page)
+    check("cursor of the last logged page is kept", checkpoint.cursor and checkpoint.cursor["page"] == CRASH_AFTER, checkpoint.cursor)
+    checkpoint.close()
+
+    pages = list(Checkpoint.open(path).resume(crawl(path)))
+    check("logged + fresh pages give every page once, in order", pages == [make_page(seed=page) for page in range(1, PAGES + 1)], len(pages))
+
+
+def check_torn_line(folder: str):
+    path = os.path.join(folder, "torn.jsonl")
+    list(crawl(path))
+    lines = read_lines(path)
+    with open(path, "wb") as f:
+        f.writelines(lines[:3])
+        f.write(lines[3][:len(lines[3]) // 2])  # crash mid-write of page 4
+    checkpoint = Checkpoint.open(path)
+    check("torn last line is ignored", checkpoint.last_page == 3, checkpoint.last_page)
+    check("...and cut off the file", os.path.getsize(path) == sum(len(line) for line in lines[:3]))
+    checkpoint.record(4, {"page": 4}, html="<p>again</p>")
+    checkpoint.close()
+    check("the log continues cleanly after it", [json.loads(line)["page"] for line in read_lines(path)] == [1, 2, 3, 4])
+    check("replay yields the re-logged page", list(Checkpoint.open(path).replay())[-1] == "<p>again</p>")
+
+
+def check_gap(folder: str):
+    path = os.path.join(folder, "gap.jsonl")
+    list(crawl(path))
+    lines = read_lines(path)
+    with open(path, "wb") as f:
+        f.writelines(lines[:2] + lines[3:])  # page 3 missing
+    checkpoint = Checkpoint.open(path)
+    check("a gap in page numbers ends the log", checkpoint.last_page == 2 and len(list(checkpoint.replay())) == 2, checkpoint.last_page)
+
+
+def check_order(folder: str):
+    checkpoint = Checkpoint.open(os.path.join(folder, "order.jsonl"))
+    checkpoint.record(1, html="<p>1</p>")
+    try:
+        checkpoint.record(3, html="<p>3</p>")
+        refused = False
+    except ValueError:
+        refused = True
+    checkpoint.close()
+    check("record() refuses a page out of order", refused)
+
+
+def check_rows(folder: str):
+    path = checkpoint_path(URL, kind="records", folder=folder)
+    check("HTML and record crawls use separate logs", path != checkpoint_path(URL, folder=folder))
+    rows = [[{"name": f"Supporter {page}", "amount": "$10"}] for page in range(1, 4)]
+    checkpoint = Checkpoint.open(path)
+    for page, page_rows in enumerate(rows, 1):
+        checkpoint.record(page, {"page": page}, rows=page_rows)
+    checkpoint.close()
+    check("record logs replay as rows", list(Checkpoint.open(path).replay("rows")) == rows)
+
+
+def check_fresh(folder: str):
+    path = os.path.join(folder, "fresh.jsonl")
+    list(crawl(path))
+    check("fresh=True starts from page 1", Checkpoint.open(path, fresh=True).next_page == 1)
+    list(crawl(path))
+    Checkpoint.open(path).remove()
+    check("remove() deletes the log", not os.path.exists(path) and Checkpoint.open(path).next_page == 1)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        for run in [check_resume, check_torn_line, check_gap, check_order, check_rows, check_fresh]:
+            run(folder)
+    print(f"\n{len(_failures)} check(s) failed" if _failures else "\nAll checkpoint checks passed")
+    sys.exit(1 if _failures else 0)
+
+
+if __name__ == "__main__":
+    main()
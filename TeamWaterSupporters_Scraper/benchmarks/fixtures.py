@@ -0,0 +1,73 @@
+"""
+fixtures.py
+
+Saved and synthetic TeamWater donation pages for the benchmarks.
+Synthetic pages reproduce the container markup captured by the fetcher
+(header block + one `white-box` block per supporter).
+"""
+
+import glob
+import os
+import random
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixture_pages")
+SUPPORTERS_PER_PAGE = 20
+
+NAMES = ["Kendall", "Anonymous", "Beaded Bliss Jewelry", "Ken Goss", "The O'Brien Family", "José & Maria"]
+MESSAGES = ["Jesus loves you!", "", "For clean water &amp; brighter futures", "Congratulations for you courage and leadership!"]
+LOCATIONS = ["", "Austin, TX", "Toronto, ON", "London, UK"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+
+HEADER_BLOCK = '<div class="white-box"><h2 class="font-[Sora]">Recent Supporters</h2></div>\n'
+SUPPORTER_BLOCK = """<div class="white-box flex flex-col gap-2">
+  <div class="flex items-center justify-between">
+    <div class="wrap-anywhere line-clamp-3 font-[Sora] text-base font-bold leading-[20px] sm:text-lg">{name}</div>
+    <div class="bg-(--navy-blue) rounded-sm px-1.5 py-1 font-[Sora] text-base font-bold text-white sm:text-xl">${amount}</div>
+  </div>
+  <div class="font-[Sora] text-[10px] font-bold">{date}</div>
+  {location}
+  <div class="wrap-anywhere font-[Sora] text-xs">{message}</div>
+</div>
+"""
+
+
+# -----------------------------
+# Fixture functions
+# -----------------------------
+def make_supporter(rng: random.Random) -> str:
+    location = rng.choice(LOCATIONS)
+    return SUPPORTER_BLOCK.format(
+        name=rng.choice(NAMES),
+        amount=f"{rng.choice([1, 5, 10, 25, 50, 100, 1000, 2500]):,}",
+        date=f"{rng.randint(1, 28)} {rng.choice(MONTHS)} {rng.randint(2021, 2025)}",
+        location=f'<div class="name text-xs">{location}</div>' if location else "",
+        message=rng.choice(MESSAGES),
+    )
+
+
+def make_page(supporters=SUPPORTERS_PER_PAGE, seed=0) -> str:
+    """One synthetic page (container innerHTML) with `supporters` entries."""
+    rng = random.Random(seed)
+    return HEADER_BLOCK + "".join(make_supporter(rng) for _ in range(supporters))
+
+
+def make_pages(total_supporters: int, per_page=SUPPORTERS_PER_PAGE) -> list:
+    """Synthetic crawl: enough pages to hold `total_supporters` entries."""
+    pages = []
+    for page_no, start in enumerate(range(0, total_supporters, per_page)):
+        pages.append(make_page(min(per_page, total_supporters - start), seed=page_no))
+    return pages
+
+
+def saved_pages() -> list:
+    """Saved fixture pages (benchmarks/fixture_pages/*.html), sorted by file name."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
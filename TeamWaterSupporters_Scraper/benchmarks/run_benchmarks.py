@@ -0,0 +1,305 @@
+"""
+run_benchmarks.py
+
+Offline replay benchmark for the whole scraper pipeline. Fixture pages
+and synthetic pages (scaled to any number of supporters) are served from
+a local stand-in server, then every stage is measured on its own
+(fetch -> parse -> clean -> export -> warehouse) and end to end through
+the streaming pipeline. Results are written as JSON so runs on
+different commits can be compared.
+
+Usage:
+    python run_benchmarks.py                          # fixtures + 10k supporters
+    python run_benchmarks.py --rows 10000 100000 1000000
+    python run_benchmarks.py --compare results/<earlier run>.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "script"))
+
+import cleaner, exporter, parser, pipeline
+from fetcher import StaticFetchEngine
+from warehouse import SQLiteBackend, SUPPORTERS, WarehouseLoader
+from standin_server import StandinServer
+from fixtures import SUPPORTERS_PER_PAGE, make_page, saved_pages
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+RESULTS_DIR = os.path.join(HERE, "results")
+CHUNK_PAGES = 500       # pages pushed through the stages at a time (bounds memory at 1M rows)
+TEMPLATE_PAGES = 500    # distinct synthetic pages; page n is served as template n % TEMPLATE_PAGES
+STAGES = ["fetch", "parse", "clean", "export", "warehouse"]
+
+
+# -----------------------------
+# Measurement helpers
+# -----------------------------
+@contextmanager
+def quiet():
+    """Silence the modules' per-page DEBUG/INFO log records while a stage runs."""
+    logging.disable(logging.INFO)
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+class StageMeter:
+    """Accumulates time, items and peak traced memory of one stage over all chunks."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.pages = 0
+        self.rows = 0
+        self.chunk_seconds = []
+        self.peak_bytes = 0
+
+    def run(self, fn, *args, pages=0):
+        """Call fn(*args) as one chunk of this stage and record its cost."""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        with quiet():
+            result = fn(*args)
+        elapsed = time.perf_counter() - start
+        if tracing:
+            self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1] - base)
+        self.seconds += elapsed
+        self.chunk_seconds.append(elapsed)
+        self.pages += pages
+        return result
+
+    def summary(self) -> dict:
+        chunks = sorted(self.chunk_seconds) or [0.0]
+        return {
+            "seconds": round(self.seconds, 4),
+            "pages": self.pages,
+            "rows": self.rows,
+            "pages_per_s": round(self.pages / self.seconds, 1) if self.seconds and self.pages else None,
+            "rows_per_s": round(self.rows / self.seconds, 1) if self.seconds else None,
+            "chunk_p50_ms": round(statistics.median(chunks) * 1000, 2),
+            "chunk_p95_ms": round(chunks[int(0.95 * (len(chunks) - 1))] * 1000, 2),
+            "peak_mb": round(self.peak_bytes / 2**20, 2) if self.peak_bytes else None,
+        }
+
+
+def max_rss_mb() -> float:
+    """Peak resident memory of this process so far (Linux reports KB, macOS bytes)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def format_mb(value) -> str:
+    return f"{value:>7.1f} MB" if value is not None else "    n/a"
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+# -----------------------------
+# Datasets
+# -----------------------------
+def make_dataset(name: str, rows: int = 0, per_page=SUPPORTERS_PER_PAGE):
+    """Return (page templates, number of pages) for "fixtures" or a synthetic crawl of `rows` supporters."""
+    if name == "fixtures":
+        templates = saved_pages()
+        return templates, len(templates)
+    pages = -(-rows // per_page)
+    templates = [make_page(per_page, seed=i) for i in range(min(pages, TEMPLATE_PAGES))]
+    return templates, pages
+
+
+def page_route(templates: list):
+    def route(query, headers):
+        page = int(query.get("page", ["0"])[0])
+        return 200, "text/html; charset=utf-8", templates[page % len(templates)]
+    return route
+
+
+def fetch_chunk(urls: list, per_host: int) -> list:
+    async def _run():
+        async with StaticFetchEngine(per_host=per_host) as engine:
+            return await engine.fetch_many(urls)
+    return asyncio.run(_run())
+
+
+def iter_url_chunks(server, pages: int, chunk=CHUNK_PAGES):
+    for start in range(0, pages, chunk):
+        yield [server.url(f"/page?page={n}") for n in range(start, min(start + chunk, pages))]
+
+
+# -----------------------------
+# Benchmarks
+# -----------------------------
+def bench_stages(server, pages: int, workdir: str, args) -> dict:
+    """Run every stage chunk by chunk, timing each stage separately."""
+    meters = {stage: StageMeter(stage) for stage in STAGES}
+    csv_path = os.path.join(workdir, "stages.csv")
+    backend = SQLiteBackend(os.path.join(workdir, "stages.sqlite"))
+    backend.connect()
+    backend.ensure_table(SUPPORTERS)
+    batch_cleaner = cleaner.BatchCleaner()
+
+    for urls in iter_url_chunks(server, pages):
+        html = meters["fetch"].run(fetch_chunk, urls, args.per_host, pages=len(urls))
+        raw = meters["parse"].run(parser.parse_multiple_pages, html, args.backend, pages=len(html))
+        rows = meters["clean"].run(batch_cleaner.clean_records, raw, pages=len(html))
+        meters["export"].run(exporter.append_to_csv, rows, csv_path, pages=len(html))
+        loaded_at = time.time()
+        meters["warehouse"].run(
+            backend.upsert_many, SUPPORTERS, [SUPPORTERS.to_row(row, loaded_at) for row in rows], pages=len(html)
+        )
+        for meter in meters.values():
+            meter.rows += len(raw) if meter.name in ("fetch", "parse") else len(rows)
+    backend.close()
+    return {stage: meter.summary() for stage, meter in meters.items()}
+
+
+def bench_end_to_end(server, pages: int, workdir: str, args) -> dict:
+    """Streaming pipeline: fetch, parse, clean and export/load run concurrently."""
+    def page_source():
+        for urls in iter_url_chunks(server, pages):
+            yield from fetch_chunk(urls, args.per_host)
+
+    csv_path = os.path.join(workdir, "end_to_end.csv")
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with quiet():
+        fetched = pipeline.buffered(page_source(), name="fetch")
+        parsed = pipeline.buffered(parser.iter_parse(fetched, backend=args.backend), name="parse")
+        cleaned = pipeline.buffered(cleaner.iter_clean(parsed), name="clean")
+        with WarehouseLoader(SQLiteBackend(os.path.join(workdir, "end_to_end.sqlite")), SUPPORTERS) as loader:
+            rows = exporter.export_stream(loader.tee(cleaned), csv_path)
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 4),
+        "pages": pages,
+        "rows": rows,
+        "pages_per_s": round(pages / seconds, 1),
+        "rows_per_s": round(rows / seconds, 1),
+        "peak_mb": round(tracemalloc.get_traced_memory()[1] / 2**20, 2) if tracing else None,
+        "max_rss_mb": max_rss_mb(),
+    }
+
+
+def bench_dataset(name: str, rows: int, args) -> dict:
+    templates, pages = make_dataset(name, rows, args.per_page)
+    print(f"[INFO] {name}: {pages} pages")
+    result = {"dataset": name, "pages": pages}
+
+    with StandinServer({"/page": page_route(templates)}) as server, tempfile.TemporaryDirectory() as workdir:
+        result["stages"] = bench_stages(server, pages, workdir, args)
+        result["end_to_end"] = bench_end_to_end(server, pages, workdir, args)
+
+        if not args.no_memory:
+            # Second pass under tracemalloc: it slows Python down, so timings come from the first pass
+            tracemalloc.start()
+            try:
+                memory = bench_stages(server, pages, workdir, args)
+                end_to_end = bench_end_to_end(server, pages, workdir, args)
+            finally:
+                tracemalloc.stop()
+            for stage, summary in memory.items():
+                result["stages"][stage]["peak_mb"] = summary["peak_mb"]
+            result["end_to_end"]["peak_mb"] = end_to_end["peak_mb"]
+
+    result["rows"] = result["stages"]["parse"]["rows"]
+    for stage, summary in result["stages"].items():
+        print(
+            f"[INFO]   {stage:<10} {summary['seconds']:>8.2f}s {summary['rows_per_s'] or 0:>12,.0f} rows/s "
+            f"p50 {summary['chunk_p50_ms']:>8.1f} ms/chunk  peak {format_mb(summary['peak_mb'])}"
+        )
+    e2e = result["end_to_end"]
+    print(f"[INFO]   {'end-to-end':<10} {e2e['seconds']:>8.2f}s {e2e['rows_per_s']:>12,.0f} rows/s  peak {format_mb(e2e['peak_mb'])}, max RSS {e2e['max_rss_mb']} MB")
+    return result
+
+
+def compare(results: dict, baseline_path: str):
+    """Print rows/s of this run relative to an earlier results file (>1.00 = faster)."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {run["dataset"]: run for run in json.load(f)["runs"]}
+    print(f"[INFO] Compared with {baseline_path}:")
+    for run in results["runs"]:
+        old = baseline.get(run["dataset"])
+        if old is None:
+            continue
+        pairs = [(stage, run["stages"][stage], old["stages"].get(stage, {})) for stage in STAGES]
+        pairs.append(("end-to-end", run["end_to_end"], old["end_to_end"]))
+        for stage, new_summary, old_summary in pairs:
+            if new_summary.get("rows_per_s") and old_summary.get("rows_per_s"):
+                ratio = new_summary["rows_per_s"] / old_summary["rows_per_s"]
+                flag = "  <-- regression" if ratio < 0.9 else ""
+                print(f"[INFO]   {run['dataset']:<16} {stage:<10} x{ratio:.2f}{flag}")
+
+
+# -----------------------------
+# Entry point
+# -----------------------------
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("--rows", type=int, nargs="*", default=[10000], help="synthetic dataset sizes (supporters)")
+    arg_parser.add_argument("--per-page", type=int, default=SUPPORTERS_PER_PAGE)
+    arg_parser.add_argument("--per-host", type=int, default=8, help="concurrent requests to the stand-in server")
+    arg_parser.add_argument("--backend", default=None, help="parser backend (default: parser.PARSER_BACKEND)")
+    arg_parser.add_argument("--no-fixtures", action="store_true", help="skip the recorded fixture pages")
+    arg_parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    arg_parser.add_argument("--output", default=None, help="results file (default: results/<time>-<commit>.json)")
+    arg_parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    args = arg_parser.parse_args()
+
+    commit = git_commit()
+    datasets = ([] if args.no_fixtures else [("fixtures", 0)]) + [(f"synthetic-{rows}", rows) for rows in args.rows]
+    results = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "per_page": args.per_page,
+            "per_host": args.per_host,
+            "backend": args.backend or parser.PARSER_BACKEND,
+            "chunk_pages": CHUNK_PAGES,
+        },
+        "runs": [bench_dataset(name, rows, args) for name, rows in datasets],
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Results written to: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+standin_server.py
+
+Local HTTP stand-in for the scraped sites, used by the benchmarks.
+Serves pages from a route table over keep-alive HTTP/1.1 so fetchers
+can be exercised without touching teamwater.org.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+
+# -----------------------------
+# Request handler
+# -----------------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse can be measured
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        route = self.server.routes.get(parts.path)
+        if route is None:
+            self._send(404, "text/plain", b"not found")
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        # A route is either fixed content or a callable(query, headers) -> (status, content_type, body[, headers])
+        if callable(route):
+            result = route(parse_qs(parts.query), self.headers)
+        else:
+            result = (200, "text/html; charset=utf-8", route)
+        self._send(*result)
+
+    def _send(self, status, content_type, body, headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+
+# -----------------------------
+# Server
+# -----------------------------
+class StandinServer:
+    """
+    Threaded local server. `routes` maps a path to content or a callable.
+    `latency` adds a fixed server-side delay to every response (seconds).
+    Usage: `with StandinServer(routes) as server: server.url("/donations")`
+    """
+
+    def __init__(self, routes: dict, latency=0.0, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.routes = routes
+        self.httpd.latency = latency
+        self.thread = None
+
+    def url(self, path: str) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,129 @@
+"""
+checkpoint.py
+
+Crash-safe crawl checkpoints. After every captured page one JSON line is
+appended (and fsync'ed) to a per-URL log: the page index, the pagination
+cursor and the page's HTML or records. A restarted run replays the logged
+pages and resumes fetching after the last good one.
+"""
+import logging
+import hashlib
+import json
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+CHECKPOINT_DIR = os.path.join(os.getcwd(), "output", "checkpoints")
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def checkpoint_path(url: str, kind: str = "pages", folder: str = CHECKPOINT_DIR) -> str:
+    """Checkpoint file for a crawl of `url`; `kind` keeps HTML and record crawls apart."""
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(folder, f"{kind}-{digest}.jsonl")
+
+
+def page_hash(html: str) -> str:
+    """Short content hash, stored in the cursor to check a resumed crawl lands on the same page."""
+    return hashlib.sha1(html.encode("utf-8")).hexdigest()[:16]
+
+
+# -----------------------------
+# Checkpoint log
+# -----------------------------
+class Checkpoint:
+    """
+    Append-only page log (JSON lines) for one paginated crawl.
+    Each entry: {"page", "cursor", "html" or "rows", "at"}. A torn last line
+    (crash mid-write) is ignored on load, so the log always ends on a whole page.
+    `complete` is set by the fetcher once pagination ran out; call remove()
+    after the run's output is safely written.
+    Usage: `checkpoint = Checkpoint.open(checkpoint_path(url))`
+    """
+
+    def __init__(self, path: str, last_page: int = 0, cursor: dict = None):
+        self.path = path
+        self.last_page = last_page  # last page safely on disk
+        self.cursor = cursor        # pagination cursor of that page: {"page", "url", "hash"}
+        self.complete = False
+        self._file = None
+
+    @classmethod
+    def open(cls, path: str, fresh: bool = False) -> "Checkpoint":
+        """Open the log at `path`, picking up where an earlier run stopped (unless `fresh`)."""
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        last_page, cursor, size = 0, None, 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn write: everything after the last whole line is dropped
+                    if entry.get("page") != last_page + 1:
+                        break
+                    last_page, cursor = entry["page"], entry.get("cursor")
+                    size += len(line)
+            if size < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+            if last_page:
+                logger.info(f"Resuming from checkpoint: {last_page} page(s) already fetched ({path})")
+        return cls(path, last_page, cursor)
+
+    @property
+    def next_page(self) -> int:
+        return self.last_page + 1
+
+    def record(self, page: int, cursor: dict = None, html: str = None, rows: list = None):
+        """Append one page and force it to disk before the page is handed on."""
+        if page != self.next_page:
+            raise ValueError(f"Checkpoint expects page {self.next_page}, got {page}")
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        entry = {"page": page, "cursor": cursor, "at": time.time()}
+        if html is not None:
+            entry["html"] = html
+        if rows is not None:
+            entry["rows"] = rows
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.last_page, self.cursor = page, cursor
+
+    def replay(self, field: str = "html"):
+        """Yield `field` ("html" or "rows") of every logged page, in page order, one page at a time."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["page"] > self.last_page:
+                    break
+                yield entry[field]
+
+    def resume(self, pages, field: str = "html"):
+        """Yield the logged pages, then the freshly fetched `pages` (which continue at next_page)."""
+        yield from self.replay(field)
+        yield from pages
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the log once the crawl's output is written; the next run starts from page 1."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -2,11 +2,18 @@
 cleaner.py
 
 Module to clean and standardize supporter data before export.
+Batches are cleaned column by column with pandas (BatchCleaner); the
+per-value functions below are kept for single values. pandas is imported
+on the first large batch, so page-by-page runs start without it.
 """
 
-print("[INFO] --- Installing 'CLEANER' libraries...")
-
+import logging
+import re
+from collections import Counter
 from datetime import datetime
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
 
 
 
@@ -14,6 +21,18 @@ from datetime import datetime
 # -----------------------------
 # Configuration
 # -----------------------------
+TEXT_FIELDS = ["name", "location", "message"]
+OUTPUT_FIELDS = ["name", "amount", "date", "location", "message"]
+
+# Candidate date formats; the one matching most of a sample is used for the whole crawl
+DATE_FORMATS = ["%d %B %Y", "%B %d, %Y", "%b %d, %Y", "%d %b %Y", "%B %d %Y", "%m/%d/%Y", "%Y-%m-%d", "%d/%m/%Y"]
+DATE_SAMPLE_SIZE = 200  # distinct non-empty dates looked at when detecting the format
+AMOUNT_JUNK = r"[^0-9.\-]"  # currency symbols, thousands separators, spaces
+VECTORIZE_MIN_ROWS = 256    # smaller batches (e.g. one streamed page) skip pandas and use memoized scalar cleaning
+MEMO_SIZE = 100000          # distinct raw values remembered per column by the scalar path
+
+np = pd = None  # numpy / pandas, imported by _load_pandas() on the first vectorized batch
+
 
 # -----------------------------
 # Cleaning functions
@@ -27,7 +46,7 @@ def clean_amount(amount: str) -> float:
     """Convert donation amount to float."""
     try:
         return float(amount.replace("$", "").replace(",", "").strip())
-    except:
+    except (AttributeError, ValueError):
         return 0.0
 
 
@@ -36,20 +55,197 @@ def clean_date(date_str: str) -> str:
     try:
         dt = datetime.strptime(date_str.strip(), "%d %B %Y")  # Example format
         return dt.strftime("%Y-%m-%d")
-    except:
+    except (AttributeError, ValueError):
         return ""
 
 
+# -----------------------------
+# Batch cleaning
+# -----------------------------
+def _load_pandas():
+    global np, pd
+    if pd is None:
+        import numpy as np
+        import pandas as pd
+
+
+def _parses(text: str, fmt: str) -> bool:
+    try:
+        datetime.strptime(text, fmt)
+        return True
+    except ValueError:
+        return False
+
+
+def detect_date_format(values, formats=DATE_FORMATS, sample_size=DATE_SAMPLE_SIZE):
+    """Return the format in `formats` that parses most of a sample of `values` (None if none do)."""
+    sample = {}  # distinct values, in order
+    for value in values:
+        text = "" if value is None or value != value else str(value).strip()  # value != value: NaN
+        if text:
+            sample[text] = None
+            if len(sample) >= sample_size:
+                break
+    if not sample:
+        return None
+    scores = {fmt: sum(_parses(text, fmt) for text in sample) for fmt in formats}
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else None
+
+
+def _by_unique(column: "pd.Series", clean_uniques):
+    """
+    Memoize: clean each distinct value once, then map the results back onto the column.
+    `clean_uniques` returns (cleaned values, rejected mask) for the distinct values.
+    Returns the cleaned column and the number of rows whose value was rejected.
+    """
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    cleaned, rejected = clean_uniques(pd.Series(uniques, dtype=object))
+    cleaned = np.append(np.asarray(cleaned, dtype=object), None)  # code -1 (missing) picks the trailing None
+    rejected_rows = int(np.asarray(rejected, dtype=bool)[codes[codes >= 0]].sum())
+    return pd.Series(cleaned[codes], index=column.index, dtype=object), rejected_rows
+
+
+class BatchCleaner:
+    """
+    Cleans whole batches of supporter records with vectorized pandas operations.
+    The date format is detected from the first batch that has dates and reused
+    afterwards. Values that cannot be cleaned become missing (NaN / None) and are
+    counted per column in `rejected` rather than silently turned into 0.0 or "".
+    """
+
+    def __init__(self, date_format=None, formats=DATE_FORMATS):
+        self.date_format = date_format
+        self.formats = formats
+        self.rows = 0
+        self.rejected = Counter()  # column -> rows whose value was present but not parseable
+        self._memo = {"amount": {}, "date": {}}  # raw value -> (cleaned, rejected), scalar path
+
+    def _clean_amounts(self, uniques: "pd.Series"):
+        text = uniques.astype(str).str.strip()
+        amounts = pd.to_numeric(text.str.replace(AMOUNT_JUNK, "", regex=True), errors="coerce")
+        return amounts, amounts.isna() & (text != "")
+
+    def _clean_dates(self, uniques: "pd.Series"):
+        text = uniques.astype(str).str.strip()
+        if self.date_format is None:
+            self.date_format = detect_date_format(text, self.formats)
+            if self.date_format:
+                logger.info(f"Detected date format: {self.date_format}")
+        if self.date_format is None:
+            parsed = pd.Series(pd.NaT, index=text.index)
+        else:
+            parsed = pd.to_datetime(text, format=self.date_format, errors="coerce")
+        dates = parsed.dt.strftime("%Y-%m-%d").astype(object).where(parsed.notna(), None)
+        return dates, parsed.isna() & (text != "")
+
+    def clean_frame(self, df: "pd.DataFrame") -> "pd.DataFrame":
+        """Clean a DataFrame of raw records; returns the OUTPUT_FIELDS columns."""
+        _load_pandas()
+        df = df.reindex(columns=OUTPUT_FIELDS)
+        out = pd.DataFrame(index=df.index)
+        for field in OUTPUT_FIELDS:
+            column = df[field]
+            if field == "amount":
+                amounts, rejected = _by_unique(column, self._clean_amounts)
+                out[field] = pd.to_numeric(amounts, errors="coerce")
+                self.rejected[field] += rejected
+            elif field == "date":
+                out[field], rejected = _by_unique(column, self._clean_dates)
+                self.rejected[field] += rejected
+            else:
+                out[field] = column.fillna("").astype(str).str.strip()
+        self.rows += len(out)
+        return out
+
+    def _clean_value(self, field: str, value):
+        """Scalar path: clean one amount/date, memoized; same results as the vectorized path."""
+        memo = self._memo[field]
+        if value in memo:
+            return memo[value]
+        text = "" if value is None else str(value).strip()
+        cleaned = None
+        if field == "amount":
+            try:
+                cleaned = float(re.sub(AMOUNT_JUNK, "", text))
+            except ValueError:
+                pass
+        elif self.date_format is not None:
+            try:
+                cleaned = datetime.strptime(text, self.date_format).strftime("%Y-%m-%d")
+            except ValueError:
+                pass
+        if len(memo) >= MEMO_SIZE:
+            memo.clear()
+        memo[value] = result = (cleaned, cleaned is None and text != "")
+        return result
+
+    def _clean_small(self, records: list) -> list:
+        if self.date_format is None:
+            self.date_format = detect_date_format([record.get("date") for record in records], self.formats)
+            if self.date_format:
+                logger.info(f"Detected date format: {self.date_format}")
+                self._memo["date"].clear()  # values seen before detection were rejected
+        cleaned = []
+        for record in records:
+            row = {}
+            for field in OUTPUT_FIELDS:
+                value = record.get(field)
+                if field in self._memo:
+                    row[field], rejected = self._clean_value(field, value)
+                    self.rejected[field] += rejected
+                else:
+                    row[field] = "" if value is None else str(value).strip()
+            cleaned.append(row)
+        self.rows += len(cleaned)
+        return cleaned
+
+    def clean_records(self, records: list) -> list:
+        """Clean a list of record dicts; missing values are None in the returned dicts."""
+        if not records:
+            return []
+        rejected_before = self.rejected.copy()
+        try:
+            return self._clean_records(records)
+        finally:
+            METRICS.inc("rows_cleaned_total", len(records))
+            for field, count in (self.rejected - rejected_before).items():
+                METRICS.inc("values_rejected_total", count, column=field)
+
+    def _clean_records(self, records: list) -> list:
+        if len(records) < VECTORIZE_MIN_ROWS:
+            return self._clean_small(records)
+        # Building columns directly is much faster than DataFrame.from_records / to_dict
+        _load_pandas()
+        out = self.clean_frame(pd.DataFrame({field: [record.get(field) for record in records] for field in OUTPUT_FIELDS}))
+        columns = []
+        for field in OUTPUT_FIELDS:
+            values = out[field].to_numpy(dtype=object, copy=True)
+            values[out[field].isna().to_numpy()] = None
+            columns.append(values.tolist())
+        return [dict(zip(OUTPUT_FIELDS, row)) for row in zip(*columns)]
+
+    def report(self):
+        """Log how many values each column rejected."""
+        for field in OUTPUT_FIELDS:
+            if self.rejected[field]:
+                logger.warning(f"{field}: {self.rejected[field]} of {self.rows} value(s) could not be cleaned")
+
+
 def clean_data(data_list: list) -> list:
     """Apply cleaning to entire dataset."""
-
-    cleaned = []
-    for entry in data_list:
-        cleaned.append({
-            "name": clean_name(entry.get("name", "")),
-            "amount": clean_amount(entry.get("amount", "0")),
-            "date": clean_date(entry.get("date", "")),
-            "location": entry.get("location", "").strip(),
-            "message": entry.get("message", "").strip()
-        })
+    cleaner = BatchCleaner()
+    cleaned = cleaner.clean_records(data_list)
+    cleaner.report()
     return cleaned
+
+
+def iter_clean(batches, cleaner: BatchCleaner = None):
+    """
+    Streaming clean: yield each batch of entries cleaned, one batch at a time.
+    One BatchCleaner is shared by all batches, so the date format is detected once.
+    """
+    cleaner = cleaner or BatchCleaner()
+    for batch in batches:
+        yield cleaner.clean_records(batch)
+    cleaner.report()
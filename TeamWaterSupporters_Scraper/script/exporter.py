@@ -3,9 +3,12 @@ exporter.py
 
 Module to export cleaned supporter data to CSV.
 """
-print("[INFO] --- Installing 'EXPORTER' libraries...")
+import logging
+import csv
+import os
+from metrics import METRICS
 
-import pandas as pd
+logger = logging.getLogger(__name__)
 
 
 
@@ -18,9 +21,65 @@ import pandas as pd
 # -----------------------------
 def export_to_csv(data_list: list, output_path: str):
     """Save the cleaned data to a CSV file."""
+    import pandas as pd  # heavy import, only paid by runs that export a whole DataFrame
+
     df = pd.DataFrame(data_list)
     df.to_csv(output_path, index=False)
-    print(f"[INFO] CSV exported to: {output_path}")
+    METRICS.inc("bytes_written_total", os.path.getsize(output_path), sink="csv")
+    METRICS.inc("rows_written_total", len(df), sink="csv")
+    logger.info(f"CSV exported to: {output_path}")
+
+
+def export_stream(batches, output_path: str, fieldnames: list = None) -> int:
+    """
+    Streaming export: append each batch of rows to the CSV as it arrives
+    and flush, so rows reach disk while the crawl is still running.
+    The header comes from `fieldnames` or the first row. Returns rows written.
+    """
+    written = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames) if fieldnames else None
+        if writer:
+            writer.writeheader()
+        for batch in batches:
+            if not batch:
+                continue
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(batch[0].keys()))
+                writer.writeheader()
+            writer.writerows(batch)
+            f.flush()
+            written += len(batch)
+            METRICS.inc("rows_written_total", len(batch), sink="csv")
+        METRICS.inc("bytes_written_total", f.tell(), sink="csv")
+    logger.info(f"CSV streamed to: {output_path} ({written} rows)")
+    return written
+
+
+def append_to_csv(data_list: list, output_path: str) -> int:
+    """
+    Append rows to an existing CSV without rewriting it (header is written
+    only when the file is new). Columns follow the existing header.
+    Returns rows written.
+    """
+    if not data_list:
+        return 0
+
+    fieldnames = None
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, newline="", encoding="utf-8") as f:
+            fieldnames = next(csv.reader(f), None)
+
+    with open(output_path, "a", newline="", encoding="utf-8") as f:
+        start = f.tell()
+        writer = csv.DictWriter(f, fieldnames=fieldnames or list(data_list[0].keys()), extrasaction="ignore")
+        if not fieldnames:
+            writer.writeheader()
+        writer.writerows(data_list)
+        METRICS.inc("bytes_written_total", f.tell() - start, sink="csv")
+    METRICS.inc("rows_written_total", len(data_list), sink="csv")
+    logger.info(f"Appended {len(data_list)} rows to: {output_path}")
+    return len(data_list)
 
 
 def validate_csv(output_path: str, sample_csv_path: str = None) -> bool:
@@ -28,14 +87,16 @@ def validate_csv(output_path: str, sample_csv_path: str = None) -> bool:
     Optional: Validate CSV against sample format.
     Returns True if valid, else False.
     """
+    import pandas as pd
+
     try:
         df = pd.read_csv(output_path)
         if sample_csv_path:
             sample_df = pd.read_csv(sample_csv_path)
             if list(df.columns) != list(sample_df.columns):
-                print("[WARN] CSV headers do not match sample")
+                logger.warning("CSV headers do not match sample")
                 return False
         return True
     except Exception as e:
-        print(f"[ERROR] CSV validation failed: {e}")
+        logger.error(f"CSV validation failed: {e}")
         return False
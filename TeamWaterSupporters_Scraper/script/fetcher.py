@@ -4,44 +4,58 @@ fetcher.py
 Module to fetch HTML content from TeamWater.org.
 Supports static and dynamic pages, as well as pagination.
 """
-print("[INFO] --- Installing 'FETCHER' libraries...")
-
+import logging
+import os
 import time
-import requests
-from selenium import webdriver
+import asyncio
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException, ElementNotInteractableException
+from checkpoint import Checkpoint, page_hash
+from driver_pool import DriverPool, get_driver, get_pool
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
 
 
 
 # -----------------------------
 # Configuration
 # -----------------------------
-driver = None
-prev_html = None
-next_button = None
-html = []
+CONTAINER_SELECTOR = ".min-h-160"  # element whose innerHTML holds one page of supporters
+
+# Page-change detection
+WAIT_MODE = "observer"  # "observer": browser-side MutationObserver, "poll": innerHTMLChanged via WebDriverWait
+CHANGE_QUIET_MS = 30    # a change counts as finished after this long without further mutations
+PAGE_TIMEOUT = 60       # seconds to wait for a page's content to change
+
+# Failures
+PAGE_RETRIES = 3          # attempts per page after the first, each reopening the feed at the last good page
+RETRY_BACKOFF = 2.0       # seconds before the first retry, doubled for every further attempt
+RETRY_BACKOFF_MAX = 60.0  # cap on the wait between two attempts
+ERROR_SCREENSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "error_png")  # None = no screenshots
+
+# Static fetch engine
+STATIC_PER_HOST = 4          # concurrent requests allowed against one host
+STATIC_MAX_CONNECTIONS = 32  # size of the shared keep-alive connection pool
+STATIC_TIMEOUT = 30          # total seconds allowed per request
 
 
 # -----------------------------
-# Creating Driver Setup
+# Pagination Session
 # -----------------------------
-def get_driver():
-    options = Options()
-    options.add_argument("--headless")  # run without opening a browser window
-    options.add_argument("--no-sandbox")
-    options.add_argument("--log-level=3")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+class PageSession:
+    """
+    Pagination state for one fetch job on a leased driver.
+    Replaces the old module globals (driver, prev_html, next_button, html)
+    so several fetches can run in the same process.
+    """
 
-    # Pass Service + Options
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=options)
+    def __init__(self, driver):
+        self.driver = driver
+        self.prev_html = None
+        self.next_button = None
 
 
 # -----------------------------
@@ -53,7 +67,6 @@ def innerHTMLChanged(locator, oldHTML=""):
     Wait until the innerHTML of the given locator is different from `oldHTML`.
     Returns: WebElement if changed, otherwise False.
     """
-    global driver
 
     def _predicate(driver):
         try:
@@ -73,8 +86,7 @@ def findNextButton(locator, searchText=""):
     Waits for an element (or multiple) matching locator to contain the given text.
     Returns the element if found, otherwise False.
     """
-    global driver
-    
+
     def _predicate(driver):
         try:
             elements_ = driver.find_elements(*locator) # find multiple
@@ -83,51 +95,141 @@ def findNextButton(locator, searchText=""):
                     return element_ # success: return the matching element
             return False
         except Exception as e:
-            print(f"[ERROR] findNextButton failed: {e}")
+            logger.error(f"findNextButton failed: {e}")
             return False
         
     return _predicate
 
 
+def timed_wait(driver, timeout, condition, name: str):
+    """WebDriverWait(driver, timeout).until(condition), timed into webdriver_wait_seconds{condition=name}."""
+    with METRICS.timer("webdriver_wait_seconds", condition=name):
+        return WebDriverWait(driver, timeout).until(condition)
+
+
+# -----------------------------
+# Browser-side Change Detection
+# -----------------------------
+# Installs a MutationObserver on the container (and on its parent, in case the
+# container node itself is replaced). A change is "settled" once no mutation
+# has been seen for `quietMs`.
+ARM_CHANGE_WATCH_JS = """
+const [selector, quietMs] = arguments;
+const old = window.__pageChangeWatch;
+if (old) { old.observer.disconnect(); clearTimeout(old.timer); }
+const target = document.querySelector(selector);
+if (!target) { window.__pageChangeWatch = null; return false; }
+const watch = {selector: selector, settled: false, mutations: 0, timer: null, onSettled: null};
+watch.observer = new MutationObserver((records) => {
+    watch.mutations += records.length;
+    clearTimeout(watch.timer);
+    watch.timer = setTimeout(() => {
+        watch.settled = true;
+        if (watch.onSettled) watch.onSettled();
+    }, quietMs);
+});
+watch.observer.observe(target, {childList: true, subtree: true, characterData: true});
+if (target.parentNode) watch.observer.observe(target.parentNode, {childList: true});
+window.__pageChangeWatch = watch;
+return true;
+"""
+
+# Resolves once the armed watch has settled. Only a small signal
+# (mutation count, length and 32-bit hash of the new innerHTML) is returned.
+WAIT_FOR_CHANGE_JS = """
+const done = arguments[arguments.length - 1];
+const watch = window.__pageChangeWatch;
+if (!watch) { done(null); return; }
+const finish = () => {
+    watch.observer.disconnect();
+    const el = document.querySelector(watch.selector);
+    const html = el ? el.innerHTML : "";
+    let hash = 0;
+    for (let i = 0; i < html.length; i++) hash = (hash * 31 + html.charCodeAt(i)) | 0;
+    done({mutations: watch.mutations, length: html.length, hash: hash});
+};
+if (watch.settled) finish(); else watch.onSettled = finish;
+"""
+
+FIND_BY_TEXT_JS = """
+const [selector, text] = arguments;
+for (const el of document.querySelectorAll(selector)) {
+    if (el.innerText.trim() === text) return el;
+}
+return null;
+"""
+
+
+def arm_change_watch(driver, selector=CONTAINER_SELECTOR, quiet_ms=CHANGE_QUIET_MS) -> bool:
+    """Start observing `selector` for changes. Call before the action that changes it."""
+    return bool(driver.execute_script(ARM_CHANGE_WATCH_JS, selector, quiet_ms))
+
+
+def wait_for_change(driver, timeout=PAGE_TIMEOUT) -> dict:
+    """
+    Block until the armed container has changed and settled.
+    Returns the change signal {mutations, length, hash}; raises TimeoutException
+    if nothing changed within `timeout` seconds or no watch was armed.
+    """
+    driver.set_script_timeout(timeout)  # a script timeout surfaces as TimeoutException
+    with METRICS.timer("webdriver_wait_seconds", condition="content_change"):
+        signal = driver.execute_async_script(WAIT_FOR_CHANGE_JS)
+    if signal is None:
+        raise TimeoutException("No change watch armed (container not found)")
+    return signal
+
+
+def findNextButtonJS(locator, searchText=""):
+    """
+    Same as findNextButton, but the text match runs in the browser:
+    one round trip per poll instead of one per button.
+    """
+
+    def _predicate(driver):
+        try:
+            return driver.execute_script(FIND_BY_TEXT_JS, locator[1], searchText) or False
+        except Exception as e:
+            logger.error(f"findNextButtonJS failed: {e}")
+            return False
+
+    return _predicate
+
+
 # -----------------------------
 # Configuration
 # -----------------------------
-def openNextPage(delay=0):
+def openNextPage(session: PageSession, delay=0):
     """
     Click the 'Next' button if available.
     Returns True if navigation succeeded, False otherwise.
     """
-    global driver, next_button
+    driver = session.driver
     next_btn = (By.TAG_NAME, "button")
     # time.sleep(delay)
 
     try:
         # Look for 'Next' button if not already found
-        if not next_button:
-            next_button = WebDriverWait(driver, 30).until(
-                findNextButton(next_btn, "Next")
-            )
+        if not session.next_button:
+            session.next_button = timed_wait(driver, 30, findNextButtonJS(next_btn, "Next"), "next_button")
 
         # Confirm the 'Next' button is clickable/active
-        isClickable = WebDriverWait(driver, 30).until(
-            EC.element_to_be_clickable(next_button)
-            # EC.element_to_be_clickable(next_btn)
-        )
+        isClickable = timed_wait(driver, 30, EC.element_to_be_clickable(session.next_button), "clickable")
+        # EC.element_to_be_clickable(next_btn)
         if not isClickable:
             return False
         
         # Click the 'Next' button
         try:
-            next_button.click()  # Normal click (preferred)
-            print("[VERBOSE] --- Redirecting to next page.")
+            session.next_button.click()  # Normal click (preferred)
+            logger.debug("Redirecting to next page.")
             return True
         except Exception:
-            print("[WARN] --- Normal click failed, using JS click instead")
+            logger.warning("Normal click failed, using JS click instead")
             try:
-                driver.execute_script("arguments[0].click();", next_button)
+                driver.execute_script("arguments[0].click();", session.next_button)
                 return True
             except Exception as e:
-                print(f"[ERROR] --- JS click also failed")
+                logger.error("JS click also failed")
                 return False
     
     # Combined exception handling for clarity
@@ -135,93 +237,281 @@ def openNextPage(delay=0):
         return False
 
 
+# -----------------------------
+# Async Static Fetch Engine
+# -----------------------------
+class StaticFetchEngine:
+    """
+    Asyncio fetch engine for static pages.
+    Every request goes through one shared keep-alive connection pool, and
+    `per_host` caps how many requests run against the same host at once.
+    Usage: `async with StaticFetchEngine() as engine: await engine.fetch_many(urls)`
+    """
+
+    def __init__(self, per_host=STATIC_PER_HOST, max_connections=STATIC_MAX_CONNECTIONS, timeout=STATIC_TIMEOUT, headers=None):
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.headers = headers
+        self.session = None
+
+    async def __aenter__(self):
+        import aiohttp  # imported on first use: browser-only runs never load it
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=self.headers,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    async def fetch(self, url: str) -> str:
+        """Fetch a single page. Returns "" on failure so page positions are kept."""
+        start = time.perf_counter()
+        try:
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                html = await response.text()
+        except Exception as e:
+            logger.error(f"Could not fetch static page {url}: {e}")
+            METRICS.inc("fetch_errors_total", mode="static")
+            return ""
+        METRICS.observe("fetch_seconds", time.perf_counter() - start, mode="static")
+        METRICS.inc("pages_fetched_total", mode="static")
+        return html
+
+    async def fetch_many(self, urls: list) -> list:
+        """Fetch all URLs concurrently. Returns HTML strings in the order of `urls`."""
+        return list(await asyncio.gather(*(self.fetch(url) for url in urls)))
+
+
 # -----------------------------
 # Fetching For Static Pages
 # -----------------------------
-def fetch_static_page(url: str) -> str:
-    """Fetch static HTML content using requests."""
-    global html
+async def fetch_static_pages_async(urls: list, per_host=STATIC_PER_HOST) -> list:
+    """
+    Fetch many static pages at once through the async engine.
+    Returns a list of HTML strings in the same order as `urls`.
+    Await this from code that already runs an event loop.
+    """
+    async with StaticFetchEngine(per_host=per_host) as engine:
+        return await engine.fetch_many(urls)
+
 
+def fetch_static_pages(urls: list, per_host=STATIC_PER_HOST) -> list:
+    """
+    Blocking wrapper around fetch_static_pages_async() for synchronous callers.
+    Raises RuntimeError when called from a running event loop (await the coroutine there).
+    """
     try:
-        print(f"[DEBUG] --- Fetching static page: {url}")
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad responses
-        html.append(response.text)
-    except Exception as e:
-        print(f"[ERROR] Could not fetch static page: {e}")
-        html = ""
-    finally:
-        time.sleep(2)
-    
-    # return the valued HTML
-    print("[DEBUG] --- Finished fetching page")
-    return html
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("fetch_static_pages() cannot run inside an event loop; await fetch_static_pages_async() instead")
+
+    logger.debug(f"Fetching {len(urls)} static page(s)")
+    pages = asyncio.run(fetch_static_pages_async(urls, per_host=per_host))
+    logger.debug("Finished fetching page(s)")
+    return pages
+
+
+def fetch_static_page(url: str) -> str:
+    """Fetch static HTML content for a single URL."""
+    return fetch_static_pages([url])[0]
 
 
 # -----------------------------
 # Fetching For Dynamic Pages
 # -----------------------------
-def fetch_dynamic_page(url: str, driver_path=None) -> str:
+def save_error_screenshot(driver, label: str, folder=ERROR_SCREENSHOT_DIR):
+    """Save a screenshot for debugging as <folder>/<time>-<label>.png (never raises)."""
+    if not folder:
+        return None
+    path = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}-{label}.png")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        driver.save_screenshot(path)
+        return path
+    except Exception as e:
+        logger.warning(f"Could not save error screenshot: {e}")
+        return None
+
+
+def retry_delay(attempt: int, backoff=RETRY_BACKOFF, limit=RETRY_BACKOFF_MAX) -> float:
+    """Seconds to wait before retry number `attempt` (1, 2, ...): exponential backoff, capped."""
+    return min(limit, backoff * 2 ** (attempt - 1))
+
+
+def wait_for_page(session: PageSession, wait_mode: str = None) -> str:
+    """Wait for the container to change (after a load or a click), store and return its HTML."""
+    wait_mode = wait_mode or WAIT_MODE
+    driver = session.driver
+    container_locator = (By.CSS_SELECTOR, CONTAINER_SELECTOR)
+    if wait_mode == "observer":
+        wait_for_change(driver)
+        element = driver.find_element(*container_locator)
+    else:
+        element = timed_wait(driver, PAGE_TIMEOUT, innerHTMLChanged(container_locator, session.prev_html), "content_change")
+    session.prev_html = element.get_attribute("innerHTML")  # one transfer per page
+    return session.prev_html
+
+
+def next_page(session: PageSession, wait_mode: str = None) -> bool:
+    """Click 'Next' (arming the change watch first in observer mode). Returns False on the last page."""
+    if (wait_mode or WAIT_MODE) == "observer":
+        arm_change_watch(session.driver)  # before the click, so a fast swap is not missed
+    return openNextPage(session)
+
+
+def open_at_page(session: PageSession, url: str, page_no: int = 1, cursor: dict = None, wait_mode: str = None) -> str:
     """
-    Fetch dynamically loaded HTML using Selenium.
-    If driver_path is None, ChromeDriverManager will install it automatically.
-    Returns the page HTML as a string.
+    Load the feed and bring the session to page `page_no`, returning its HTML.
+    With a checkpoint `cursor` for that page whose URL differs from `url`
+    (URL-addressable pages) the page is loaded directly; otherwise the
+    earlier pages are clicked through without being handed on.
+    Raises RuntimeError if pagination ends before `page_no`.
     """
-    global driver, prev_html, html
+    wait_mode = wait_mode or WAIT_MODE
+    driver = session.driver
+    session.prev_html = session.next_button = None
+    current = 1
+    if cursor and cursor.get("page") == page_no and cursor.get("url") and cursor["url"] != url:
+        url, current = cursor["url"], page_no
 
-    driver = get_driver()
     driver.get(url)
-    container_locator = (By.CSS_SELECTOR, ".min-h-160")
+    logger.info(f"Opened URL: {url}")
+    logger.info(f"Page title: {driver.title}")
+    element = timed_wait(driver, 30, EC.presence_of_element_located((By.CSS_SELECTOR, CONTAINER_SELECTOR)), "container")
+    if wait_mode == "observer":
+        arm_change_watch(driver)
+    else:
+        session.prev_html = element.get_attribute("innerHTML")
+    html = wait_for_page(session, wait_mode)
 
-    # Debug logging
-    print(f"[INFO] --- Opened URL: {url}")
-    print(f"[INFO] --- Page title: {driver.title}")
+    if current < page_no:
+        logger.info(f"Fast-forwarding to page {page_no}...")
+    while current < page_no:
+        if not next_page(session, wait_mode):
+            raise RuntimeError(f"Pagination ended at page {current}, before page {page_no}")
+        html = wait_for_page(session, wait_mode)
+        current += 1
 
-    while True:
-        try:
-            if not prev_html:
-                # print("[VERBOSE] --- Searching for data/content container")
-                element = WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located(container_locator)
-                )
-                # print(f"[VERBOSE] --- Data/content container found: {element}")
-                prev_html = element.get_attribute('innerHTML')
-            
-            # print("[VERBOSE] --- Waiting for new data/content to be loaded")
-            element = WebDriverWait(driver, 60).until(
-                innerHTMLChanged(container_locator, prev_html)
-            )
-            html.append(element.get_attribute("innerHTML"))
-            prev_html = element.get_attribute("innerHTML")
-
-            # After content has been loaded
-            # Check for "next" button and click if exists 
-            if not openNextPage():
-                print("[INFO] No more pages/data available.")
-                break
-            
-        except Exception as e:
-            print(f"[ERROR] Could not find container or load data")
-            driver.save_screenshot("../error_png/debug_screenshot.png") # save screenshot for debugging
-            break
-    
-    # return the valued HTML
-    driver.quit()
-    print("[INFO] --- Finished fetching page(s)")
+    if cursor and cursor.get("page") == page_no and cursor.get("hash") not in (None, page_hash(html)):
+        logger.warning(f"Page {page_no} changed since it was checkpointed; continuing from it anyway")
     return html
 
 
+def iter_pages(url: str, pool: DriverPool = None, wait_mode: str = None, checkpoint: Checkpoint = None, retries=PAGE_RETRIES):
+    """
+    Fetch dynamically loaded HTML using Selenium, one page at a time.
+    A warm driver is leased from `pool` (the process-wide pool by default)
+    and handed back, reset, when pagination ends or the consumer stops.
+    Page changes are detected in the browser (wait_mode="observer") or by
+    polling innerHTML from Python (wait_mode="poll"); defaults to WAIT_MODE.
+    A page that fails is retried up to `retries` times with exponential
+    backoff, each time reopening the feed at the last good page.
+    With a `checkpoint`, every page is logged before it is yielded and the
+    crawl starts after the checkpoint's last page (use checkpoint.resume()
+    to get the logged pages too).
+    Yields the container HTML of each page as soon as it is captured.
+    """
+    wait_mode = wait_mode or WAIT_MODE
+    pool = pool or get_pool()
+    page_no = checkpoint.next_page if checkpoint else 1
+    cursor = checkpoint.cursor if checkpoint else None
+    failures = 0
+
+    with pool.lease() as lease:
+        session = PageSession(lease.driver)
+        driver = session.driver
+
+        while True:
+            try:
+                page_start = time.perf_counter()
+                if session.prev_html is None:
+                    # (Re)open the feed: at page 1, or at the last good page and click on from there
+                    if page_no == 1:
+                        html = open_at_page(session, url, 1, wait_mode=wait_mode)
+                    else:
+                        open_at_page(session, url, page_no - 1, cursor, wait_mode)
+                        lease.page_loaded(page_no - 1)
+                        if not next_page(session, wait_mode):
+                            logger.info("No more pages/data available.")
+                            if checkpoint:
+                                checkpoint.complete = True
+                            break
+                        html = wait_for_page(session, wait_mode)
+                else:
+                    html = wait_for_page(session, wait_mode)
+                lease.page_loaded()
+                METRICS.observe("fetch_seconds", time.perf_counter() - page_start, mode="dynamic")
+                METRICS.inc("pages_fetched_total", mode="dynamic")
+
+                cursor = {"page": page_no, "url": driver.current_url, "hash": page_hash(html)}
+                if checkpoint:
+                    checkpoint.record(page_no, cursor, html=html)
+                failures = 0
+                yield html
+
+                # After content has been loaded
+                # Check for "next" button and click if exists
+                if not next_page(session, wait_mode):
+                    logger.info("No more pages/data available.")
+                    if checkpoint:
+                        checkpoint.complete = True
+                    break
+                page_no += 1
+
+            except Exception as e:
+                failures += 1
+                save_error_screenshot(driver, f"page{page_no}-attempt{failures}")
+                if failures > retries:
+                    logger.error(f"Giving up on page {page_no} after {failures} attempt(s): {e}")
+                    METRICS.inc("fetch_errors_total", mode="dynamic")
+                    break
+                delay = retry_delay(failures)
+                logger.warning(f"Page {page_no} failed ({type(e).__name__}), retrying in {delay:.0f}s ({failures}/{retries})")
+                METRICS.inc("page_retries_total", mode="dynamic")
+                time.sleep(delay)
+                session.prev_html = None  # reopen at the last good page
+
+    logger.info("Finished fetching page(s)")
+
+
+def fetch_dynamic_page(url: str, pool: DriverPool = None, wait_mode: str = None, checkpoint: Checkpoint = None) -> list:
+    """
+    Fetch dynamically loaded HTML using Selenium.
+    With a `checkpoint` the pages it already holds are reused and the crawl resumes after them.
+    Returns a list with the container HTML of every page.
+    """
+    pages = iter_pages(url, pool=pool, wait_mode=wait_mode, checkpoint=checkpoint)
+    return list(checkpoint.resume(pages) if checkpoint else pages)
+
+
 
 # -----------------------------
 # Entry point
 # -----------------------------
-def get_all_pages(start_url: str) -> list:
+def get_all_pages(start_url, mode="dynamic", per_host=STATIC_PER_HOST, pool: DriverPool = None) -> list:
     """
     Handle multiple pages if pagination exists.
     Returns a list of HTML content strings for all pages.
+    mode="static" fetches `start_url` (a URL or a list of page URLs) concurrently
+    through the async engine instead of driving a browser.
+    Dynamic fetches lease a warm browser from `pool`.
     """
+    if mode == "static":
+        urls = [start_url] if isinstance(start_url, str) else list(start_url)
+        return fetch_static_pages(urls, per_host=per_host)
 
-    # For now, assume single page
-    # html = fetch_static_page(start_url)
-    # html = fetch_dynamic_page(start_url)
-    return fetch_dynamic_page(start_url)
+    return fetch_dynamic_page(start_url, pool=pool)
@@ -0,0 +1,201 @@
+"""
+metrics.py
+
+Logging setup and run metrics for the scraper.
+Modules log through `logging.getLogger(__name__)`; configure_logging()
+maps the project's [INFO]/[WARN]/... scheme onto the standard levels.
+METRICS collects counters, timers and latency histograms (labelled, e.g.
+by portal) and is written as a JSON summary and a Prometheus text file at
+the end of a run. Recording is a dict update under a lock, cheap enough
+to leave on.
+"""
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s --- %(message)s"
+METRIC_PREFIX = "teamwater"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # histogram bounds, seconds
+
+_bound_labels = contextvars.ContextVar("metric_labels", default=())
+
+
+# -----------------------------
+# Logging
+# -----------------------------
+def configure_logging(level=logging.INFO, log_file: str = None):
+    """
+    Send log records to the console (and `log_file`, if given) in the
+    project's "[LEVEL] module --- message" format.
+    [VERBOSE]/[TRACE] map to DEBUG, [NOTICE] to INFO and [ALERT] to ERROR.
+    """
+    formatter = logging.Formatter(LOG_FORMAT, datefmt="%H:%M:%S")
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+    root.setLevel(level)
+    logging.addLevelName(logging.WARNING, "WARN")
+
+
+# -----------------------------
+# Metrics registry
+# -----------------------------
+@contextmanager
+def labels(**values):
+    """Attach labels (e.g. portal="...") to every metric recorded inside the block, in this thread/task."""
+    token = _bound_labels.set(tuple(sorted({**dict(_bound_labels.get()), **{k: str(v) for k, v in values.items()}}.items())))
+    try:
+        yield
+    finally:
+        _bound_labels.reset(token)
+
+
+def _prom_labels(label_values: dict) -> str:
+    if not label_values:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in label_values.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Metrics:
+    """
+    Thread-safe counters and histograms keyed by (name, labels).
+    snapshot() returns plain data that can cross process boundaries;
+    merge() folds a worker's snapshot into this registry.
+    """
+
+    def __init__(self, prefix=METRIC_PREFIX, buckets=BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+
+    @staticmethod
+    def _key(name: str, extra: dict) -> tuple:
+        bound = _bound_labels.get()
+        if extra:
+            bound = tuple(sorted({**dict(bound), **{k: str(v) for k, v in extra.items()}}.items()))
+        return name, bound
+
+    def inc(self, name: str, value=1, **label_values):
+        """Add `value` to a counter."""
+        key = self._key(name, label_values)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **label_values):
+        """Record one observation (seconds) in a histogram."""
+        key = self._key(name, label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            histogram[index] += 1
+            histogram[-1] += value
+
+    @contextmanager
+    def timer(self, name: str, **label_values):
+        """Time the block into histogram `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **label_values)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # --- Export ---
+    def snapshot(self) -> dict:
+        """Plain-data copy: {"counters": [...], "histograms": [...]}, picklable and JSON-serializable."""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(label_values), "value": value}
+                    for (name, label_values), value in sorted(self._counters.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(label_values),
+                        "buckets": histogram[:-1],  # per bucket, last one is +Inf
+                        "count": sum(histogram[:-1]),
+                        "sum": histogram[-1],
+                    }
+                    for (name, label_values), histogram in sorted(self._histograms.items())
+                ],
+            }
+
+    def merge(self, snapshot: dict):
+        """Add a snapshot (e.g. returned by a worker process) to this registry."""
+        with self._lock:
+            for counter in snapshot.get("counters", []):
+                key = (counter["name"], tuple(sorted(counter["labels"].items())))
+                self._counters[key] = self._counters.get(key, 0) + counter["value"]
+            for entry in snapshot.get("histograms", []):
+                key = (entry["name"], tuple(sorted(entry["labels"].items())))
+                histogram = self._histograms.setdefault(key, [0] * (len(self.buckets) + 2))
+                for index, count in enumerate(entry["buckets"]):
+                    histogram[index] += count
+                histogram[-1] += entry["sum"]
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (counters and cumulative histograms)."""
+        snapshot = self.snapshot()
+        lines, typed = [], set()
+        for counter in snapshot["counters"]:
+            name = f"{self.prefix}_{counter['name']}"
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_prom_labels(counter['labels'])} {counter['value']}")
+        for entry in snapshot["histograms"]:
+            name = f"{self.prefix}_{entry['name']}"
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], entry["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_prom_labels({**entry['labels'], 'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{_prom_labels(entry['labels'])} {entry['sum']:.6f}")
+            lines.append(f"{name}_count{_prom_labels(entry['labels'])} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: str, prom_path: str = None, **run_info):
+        """Write the JSON summary (with `run_info`) and, optionally, the Prometheus text file."""
+        os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"run": run_info, **self.snapshot()}, f, indent=2)
+        if prom_path:
+            with open(prom_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+        logging.getLogger(__name__).info(f"Metrics written to: {json_path}")
+
+
+METRICS = Metrics()
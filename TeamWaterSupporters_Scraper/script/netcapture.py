@@ -0,0 +1,261 @@
+"""
+netcapture.py
+
+Network-capture mode: instead of serializing the container's innerHTML
+and parsing it back, read the JSON payloads the donations page fetches
+(XHR / fetch) from Chrome's DevTools Network events and build supporter
+records straight from them. Pages without a usable payload fall back to
+DOM scraping.
+"""
+import logging
+import atexit
+import base64
+import json
+import re
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+import parser
+from metrics import METRICS
+from driver_pool import DriverPool
+from checkpoint import Checkpoint
+from fetcher import CONTAINER_SELECTOR, PAGE_RETRIES, PageSession, innerHTMLChanged, open_at_page, openNextPage, retry_delay, save_error_screenshot, timed_wait
+
+logger = logging.getLogger(__name__)
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+CAPTURE_URL_PATTERN = re.compile(r"donat|support", re.IGNORECASE)  # responses that carry supporter data
+PAYLOAD_TIMEOUT = 10  # seconds to wait for a page's JSON before falling back to the DOM
+
+# record field -> payload keys tried in order
+PAYLOAD_FIELDS = {
+    "name": ["name", "display_name", "displayName", "donor_name", "donorName"],
+    "amount": ["amount", "amount_display", "amountDisplay", "donation_amount", "total"],
+    "date": ["date", "created_at", "createdAt", "donated_at", "donatedAt"],
+    "location": ["location", "city", "place"],
+    "message": ["message", "comment", "note"],
+}
+
+_capture_pool = None
+
+
+# -----------------------------
+# Payload mapping
+# -----------------------------
+def find_record_list(payload):
+    """Return the first list of dicts in `payload` that looks like supporter records."""
+    known_keys = {key for keys in PAYLOAD_FIELDS.values() for key in keys}
+    stack = [payload]
+    while stack:
+        node = stack.pop(0)  # breadth-first: prefer the outermost list
+        if isinstance(node, list):
+            if node and all(isinstance(item, dict) for item in node) and known_keys & set(node[0]):
+                return node
+            stack.extend(node)
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+    return []
+
+
+def records_from_payload(payload, field_map=PAYLOAD_FIELDS) -> list:
+    """Build supporter records (same keys as parser.parse_page) from a JSON payload."""
+    records = []
+    for item in find_record_list(payload):
+        record = {}
+        for field, keys in field_map.items():
+            value = next((item[key] for key in keys if item.get(key) is not None), "")
+            record[field] = value if isinstance(value, str) else str(value)
+        records.append(record)
+    return records
+
+
+# -----------------------------
+# DevTools network capture
+# -----------------------------
+class NetworkCapture:
+    """
+    Reads Network.* events from the driver's performance log and returns
+    the decoded JSON bodies of finished XHR/fetch responses matching `url_pattern`.
+    The driver must be created with get_driver(capture_network=True).
+    """
+
+    def __init__(self, driver, url_pattern=CAPTURE_URL_PATTERN):
+        self.driver = driver
+        self.url_pattern = url_pattern
+        self._matched = {}      # requestId -> URL, response headers seen
+        self._finished = set()  # requestIds whose body is complete
+
+    def _read_events(self):
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+            if method == "Network.responseReceived":
+                response = params.get("response", {})
+                if (
+                    params.get("type") in ("XHR", "Fetch")
+                    and "json" in response.get("mimeType", "")
+                    and self.url_pattern.search(response.get("url", ""))
+                ):
+                    self._matched[params["requestId"]] = response["url"]
+            elif method == "Network.loadingFinished":
+                self._finished.add(params.get("requestId"))
+
+    def poll(self) -> list:
+        """Return payloads of matching responses that finished since the last poll."""
+        self._read_events()
+        payloads = []
+        for request_id in [rid for rid in self._matched if rid in self._finished]:
+            url = self._matched.pop(request_id)
+            self._finished.discard(request_id)
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                text = base64.b64decode(body["body"]).decode("utf-8") if body.get("base64Encoded") else body["body"]
+                payloads.append(json.loads(text))
+            except Exception as e:
+                logger.warning(f"Could not read response body for {url}: {e}")
+        self._finished &= set(self._matched)  # forget unrelated requests
+        return payloads
+
+    def wait_for_payloads(self, timeout=PAYLOAD_TIMEOUT, interval=0.05) -> list:
+        """Poll until at least one matching payload arrived or `timeout` expires."""
+        deadline = time.monotonic() + timeout
+        while True:
+            payloads = self.poll()
+            if payloads or time.monotonic() >= deadline:
+                return payloads
+            time.sleep(interval)
+
+
+# -----------------------------
+# Capture workflow
+# -----------------------------
+def get_capture_pool() -> DriverPool:
+    """Process-wide pool of drivers with performance logging enabled."""
+    global _capture_pool
+
+    if _capture_pool is None:
+        _capture_pool = DriverPool(warm=False, driver_kwargs={"capture_network": True})
+        atexit.register(_capture_pool.close)
+    return _capture_pool
+
+
+def _remember_container(session: PageSession):
+    """
+    Keep the container's current HTML before clicking 'Next' on a page built
+    from its payload, so a DOM fallback on the next page waits for it to change.
+    """
+    try:
+        session.prev_html = session.driver.find_element(By.CSS_SELECTOR, CONTAINER_SELECTOR).get_attribute("innerHTML")
+    except Exception:
+        session.prev_html = None
+
+
+def _dom_records(session: PageSession, page_no: int) -> list:
+    """
+    Fallback: parse the container's innerHTML. When the previous page's HTML
+    is known (DOM pages, _remember_container, open_at_page) it waits for the
+    container to change, so a payload timeout on a later page cannot re-read
+    the previous page; only the very first page is read as it is.
+    """
+    driver = session.driver
+    container_locator = (By.CSS_SELECTOR, CONTAINER_SELECTOR)
+    if session.prev_html is None:
+        element = timed_wait(driver, 30, EC.presence_of_element_located(container_locator), "container")
+    else:
+        element = timed_wait(driver, 60, innerHTMLChanged(container_locator, session.prev_html), "content_change")
+    session.prev_html = element.get_attribute("innerHTML")
+    return parser.parse_page(session.prev_html, page_no)
+
+
+def iter_page_records(url: str, pool: DriverPool = None, timeout=PAYLOAD_TIMEOUT, checkpoint: Checkpoint = None, retries=PAGE_RETRIES):
+    """
+    Paginate like fetcher.iter_pages, but yield each page's supporter records
+    built from the captured JSON payloads. If the first page has no payload
+    the rest of the crawl uses DOM scraping, so sites without an API do not
+    pay the timeout on every page. Failed pages are retried and, with a
+    `checkpoint`, each page's records are logged and the crawl resumes after
+    the checkpoint's last page, as in fetcher.iter_pages.
+    """
+    pool = pool or get_capture_pool()
+    page_no = checkpoint.next_page if checkpoint else 1
+    cursor = checkpoint.cursor if checkpoint else None
+    first_page = page_no
+    failures = 0
+
+    with pool.lease() as lease:
+        session = PageSession(lease.driver)
+        driver = session.driver
+        capture = NetworkCapture(driver)
+        use_network = True
+        opened = False
+        driver.get_log("performance")  # drop events left over from earlier leases
+
+        while True:
+            try:
+                page_start = time.perf_counter()
+                if not opened:
+                    if page_no == 1:
+                        session.prev_html = session.next_button = None
+                        driver.get(url)
+                        logger.info(f"Opened URL (network capture): {url}")
+                    else:
+                        open_at_page(session, url, page_no - 1, cursor)
+                        lease.page_loaded(page_no - 1)
+                        capture.poll()  # drop the payloads of the pages clicked through
+                        if not openNextPage(session):
+                            logger.info("No more pages/data available.")
+                            if checkpoint:
+                                checkpoint.complete = True
+                            break
+                    lease.page_loaded()
+                    opened = True
+
+                records = []
+                if use_network:
+                    payloads = capture.wait_for_payloads(timeout)
+                    METRICS.inc("payloads_captured_total", len(payloads))
+                    records = [record for payload in payloads for record in records_from_payload(payload)]
+                    if not records and page_no == first_page:
+                        logger.warning("No JSON payload captured, falling back to DOM scraping")
+                        use_network = False
+                mode = "network" if records else "dom"
+                if not records:
+                    records = _dom_records(session, page_no)
+                METRICS.observe("fetch_seconds", time.perf_counter() - page_start, mode=mode)
+                METRICS.inc("pages_fetched_total", mode=mode)
+                METRICS.inc("rows_parsed_total", len(records))
+
+                cursor = {"page": page_no, "url": driver.current_url}
+                if checkpoint:
+                    checkpoint.record(page_no, cursor, rows=records)
+                failures = 0
+                yield records
+
+                if mode == "network":
+                    _remember_container(session)
+                if not openNextPage(session):
+                    logger.info("No more pages/data available.")
+                    if checkpoint:
+                        checkpoint.complete = True
+                    break
+                lease.page_loaded()
+                page_no += 1
+
+            except Exception as e:
+                failures += 1
+                save_error_screenshot(driver, f"capture-page{page_no}-attempt{failures}")
+                if failures > retries:
+                    logger.error(f"Could not capture page {page_no} after {failures} attempt(s): {e}")
+                    METRICS.inc("fetch_errors_total", mode="network")
+                    break
+                delay = retry_delay(failures)
+                logger.warning(f"Page {page_no} failed ({type(e).__name__}), retrying in {delay:.0f}s ({failures}/{retries})")
+                METRICS.inc("page_retries_total", mode="network")
+                time.sleep(delay)
+                opened = False  # reopen at the last good page
+
+    logger.info("Finished capturing page(s)")
@@ -0,0 +1,75 @@
+"""
+parse_executor.py
+
+Parses pages in a pool of worker processes while the fetcher keeps
+paginating. Each page is submitted as soon as it is captured and
+results are handed back in page order.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import parser
+from metrics import METRICS
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # leave one core for the fetcher/browser
+MAX_IN_FLIGHT = 64  # pages submitted but not yet handed back; bounds memory
+
+
+# -----------------------------
+# Parse executor
+# -----------------------------
+class ParseExecutor:
+    """
+    Process pool for CPU-bound page parsing.
+    Usage: `with ParseExecutor() as executor: for rows in executor.map_pages(pages): ...`
+    """
+
+    def __init__(self, workers=PARSE_WORKERS, backend=None, max_in_flight=MAX_IN_FLIGHT):
+        self.workers = workers
+        self.backend = backend
+        self.max_in_flight = max(1, max_in_flight)
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    def map_pages(self, pages):
+        """
+        Submit every page from `pages` (e.g. fetcher.iter_pages) as it arrives
+        and yield each page's supporter list in page order. Finished pages at
+        the head of the queue are handed back between fetches, so parsing
+        overlaps with fetch latency instead of running after the crawl.
+        """
+        pending = deque()
+        for page_no, html in enumerate(pages, start=1):
+            pending.append(self._executor.submit(parser.parse_page, html, page_no, self.backend))
+            while pending and (pending[0].done() or len(pending) >= self.max_in_flight):
+                yield self._counted(pending.popleft().result())
+        while pending:
+            yield self._counted(pending.popleft().result())
+
+    @staticmethod
+    def _counted(supporters: list) -> list:
+        # Counted here: metrics recorded inside worker processes would be lost
+        METRICS.inc("rows_parsed_total", len(supporters))
+        return supporters
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_while_fetching(pages, workers=PARSE_WORKERS, backend=None) -> list:
+    """Parse pages in worker processes as they are fetched; returns all supporters in page order."""
+    all_supporters = []
+    with ParseExecutor(workers=workers, backend=backend) as executor:
+        for supporters in executor.map_pages(pages):
+            all_supporters.extend(supporters)
+    return all_supporters
@@ -2,23 +2,58 @@
 parser.py
 
 Module to parse supporter data from HTML content.
+Two interchangeable backends produce identical output:
+- "lxml": compiled field matchers, one pass over each supporter block (fast path)
+- "bs4":  BeautifulSoup with html.parser (fallback when lxml is not installed)
+In restricted mode (the default) neither backend builds the whole page:
+bs4 keeps only the supporter blocks (SoupStrainer) and lxml reads the page
+incrementally, dropping each block once it is extracted. Rows hold plain
+str values only, and each page's tree is freed as soon as it is parsed.
 """
-print("[INFO] --- Installing 'PARSER' libraries...")
+import logging
+import time
+from bs4 import BeautifulSoup, SoupStrainer
+from metrics import METRICS
 
-from bs4 import BeautifulSoup
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    lxml_html = None
+
+logger = logging.getLogger(__name__)
 
 
 
 # -----------------------------
 # Configuration
 # -----------------------------
+PARSER_BACKEND = "auto"  # "lxml", "bs4" or "auto" (lxml when installed)
+BLOCK_CLASS = "white-box"  # one supporter per block; the first block on a page is not a supporter
+RESTRICTED_PARSING = True  # build only the supporter blocks, not the whole page tree
+FEED_CHUNK = 64 * 1024     # characters fed to the incremental lxml parser at a time
+NON_TEXT_TAGS = {"script", "style", "template"}  # their content is not text (bs4's get_text() leaves it out too)
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}  # whitespace-only strings are kept as they are inside these
+ASCII_SPACES = " \n\t\f\r"
+
+# field -> (tag, class). A class with spaces must match the element's class list exactly,
+# a single class only has to be one of the element's classes (BeautifulSoup semantics).
+FIELD_SELECTORS = {
+    "name": ("div", "wrap-anywhere line-clamp-3 font-[Sora] text-base font-bold leading-[20px] sm:text-lg"),
+    "amount": ("div", "bg-(--navy-blue) rounded-sm px-1.5 py-1 font-[Sora] text-base font-bold text-white sm:text-xl"),
+    "date": ("div", "font-[Sora] text-[10px] font-bold"),
+    "location": ("div", "name"),
+    "message": ("div", "wrap-anywhere font-[Sora] text-xs"),
+}
+
+_backends = {}
+
 
 # -----------------------------
 # Parsing functions
 # -----------------------------
 def parse_supporter_block(html_block) -> dict:
     """
-    Parse a single supporter block to extract data.
+    Parse a single supporter block (BeautifulSoup Tag) to extract data.
     Returns a dictionary with keys: name, amount, date, location, messaged
     """
 
@@ -26,41 +61,215 @@ def parse_supporter_block(html_block) -> dict:
         """Safely extract text from a tag with a given class name."""
         el = block.find(tag, class_=class_name)
         # return el.text.strip() if el else default
-        return el.text if el else default
+        return str(el.text) if el else default  # a plain str, never a NavigableString tied to the tree
 
     def safe_get_html(block, tag, class_name, default=""):
         """Safely extract innerHTML instead of just text."""
         el = block.find(tag, class_=class_name)
         return el.decode_contents().strip() if el else default
 
-    # Example structure
     return {
-        "name": safe_get_text(html_block, "div", "wrap-anywhere line-clamp-3 font-[Sora] text-base font-bold leading-[20px] sm:text-lg"),
-        "amount": safe_get_text(html_block, "div", "bg-(--navy-blue) rounded-sm px-1.5 py-1 font-[Sora] text-base font-bold text-white sm:text-xl"),
-        "date": safe_get_text(html_block, "div", "font-[Sora] text-[10px] font-bold"),
-        "location": safe_get_text(html_block, "div", "name"),
-        "message": safe_get_text(html_block, "div", "wrap-anywhere font-[Sora] text-xs")
+        field: safe_get_text(html_block, tag, class_name)
+        for field, (tag, class_name) in FIELD_SELECTORS.items()
     }
 
 
-def parse_page(html_content: str, page_no: int) -> list:
+# -----------------------------
+# Parser backends
+# -----------------------------
+def _is_block_class(value) -> bool:
+    """SoupStrainer class matcher: `value` is the raw attribute while parsing (a str), a list afterwards."""
+    if value is None:
+        return False
+    return BLOCK_CLASS in (value.split() if isinstance(value, str) else value)
+
+
+def _dispose(soup):
+    """
+    Free a parsed page now: the tree is full of reference cycles, so it would
+    otherwise wait for the next GC run. BeautifulSoup.decompose() alone stops
+    at the root, so each top-level element is decomposed first.
+    """
+    for child in list(soup.contents):
+        child.decompose()
+    soup.decompose()
+
+
+class SoupBackend:
+    """BeautifulSoup + html.parser. Slow but pure Python."""
+
+    name = "bs4"
+
+    def __init__(self, restricted=RESTRICTED_PARSING):
+        self.restricted = restricted
+        self._strainer = SoupStrainer("div", class_=_is_block_class) if restricted else None
+
+    def parse_page(self, html_content: str) -> list:
+        soup = BeautifulSoup(html_content, "html.parser", parse_only=self._strainer)
+        try:
+            blocks = soup.find_all("div", class_=BLOCK_CLASS)[1:]
+            return [parse_supporter_block(block) for block in blocks]
+        finally:
+            _dispose(soup)
+
+
+def _element_text(el) -> str:
+    """
+    Text of an lxml element as bs4's get_text() returns it with html.parser:
+    script, style and template content is left out, and a whitespace-only
+    string becomes a single newline (or a space if it has no newline).
+    """
+    parts = []
+    _collect_text(el, parts, el.tag in PRESERVE_WHITESPACE_TAGS)
+    return "".join(parts)
+
+
+def _collect_text(el, parts: list, preserve: bool):
+    def add(text):
+        if text:
+            parts.append(text if preserve or text.strip(ASCII_SPACES) else "\n" if "\n" in text else " ")
+
+    add(el.text)
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in NON_TEXT_TAGS:  # comments and PIs have no text either
+            _collect_text(child, parts, preserve or child.tag in PRESERVE_WHITESPACE_TAGS)
+        add(child.tail)
+
+
+class LxmlBackend:
+    """
+    lxml fast path. Field selectors are compiled once into two lookup tables
+    (exact class list, single class) so each block is scanned in one pass.
+    Restricted mode feeds the page to an incremental parser and extracts each
+    block as soon as it closes, so at most one block's subtree is kept.
+    """
+
+    name = "lxml"
+
+    def __init__(self, field_selectors=FIELD_SELECTORS, restricted=RESTRICTED_PARSING):
+        self.restricted = restricted
+        self.fields = list(field_selectors)
+        self._exact = {}   # (tag, "class list joined by single spaces") -> [fields]
+        self._single = {}  # (tag, class) -> [fields]
+        for field, (tag, class_name) in field_selectors.items():
+            classes = class_name.split()
+            table, key = (self._exact, " ".join(classes)) if len(classes) > 1 else (self._single, classes[0])
+            table.setdefault((tag, key), []).append(field)
+
+    def parse_block(self, block) -> dict:
+        found = {}
+        for el in block.iterdescendants():
+            class_attr = el.get("class")
+            if not class_attr or not isinstance(el.tag, str):
+                continue
+            classes = class_attr.split()
+            matches = list(self._exact.get((el.tag, " ".join(classes)), ()))
+            for class_name in classes:
+                matches.extend(self._single.get((el.tag, class_name), ()))
+            for field in matches:
+                if field not in found:
+                    found[field] = _element_text(el)
+            if len(found) == len(self.fields):
+                break
+        return {field: found.get(field, "") for field in self.fields}
+
+    def parse_page(self, html_content: str) -> list:
+        if not html_content or not html_content.strip():
+            return []
+        if self.restricted:
+            return self._parse_incremental(html_content)
+        root = lxml_html.document_fromstring(html_content)
+        blocks = [
+            el for el in root.iter("div")
+            if BLOCK_CLASS in (el.get("class") or "").split()
+        ][1:]
+        return [self.parse_block(block) for block in blocks]
+
+    def _parse_incremental(self, html_content: str) -> list:
+        pull = etree.HTMLPullParser(events=("start", "end"), tag="div")
+        rows, blocks = [], 0
+        open_blocks, pending = [], []  # blocks not closed yet; blocks to extract, in document order
+        for start in range(0, len(html_content), FEED_CHUNK):
+            pull.feed(html_content[start:start + FEED_CHUNK])
+            blocks = self._drain(pull, rows, blocks, open_blocks, pending)
+        pull.close()
+        self._drain(pull, rows, blocks, open_blocks, pending)
+        return rows
+
+    def _drain(self, pull, rows: list, blocks: int, open_blocks: list, pending: list) -> int:
+        """
+        Extract the outermost blocks closed since the last call together with
+        the blocks nested in them, in document order (blocks are counted when
+        they open), then drop them and everything before them. Nothing is
+        cleared while a block that contains it is still open.
+        """
+        for event, el in pull.read_events():
+            if BLOCK_CLASS not in (el.get("class") or "").split():
+                continue  # a div inside a block: extracted with its block
+            if event == "start":
+                if blocks:
+                    pending.append(el)
+                blocks += 1
+                open_blocks.append(el)
+                continue
+            open_blocks.pop()
+            if open_blocks:
+                continue  # nested block: extracted when its outermost block closes
+            rows.extend(self.parse_block(block) for block in pending)
+            pending.clear()
+            el.clear()
+            parent = el.getparent()
+            while el.getprevious() is not None:
+                del parent[0]
+        return blocks
+
+
+def get_backend(name: str = None, restricted: bool = None):
+    """
+    Return a (cached) parser backend by name: "lxml", "bs4" or "auto".
+    `restricted` defaults to RESTRICTED_PARSING.
+    """
+    name = name or PARSER_BACKEND
+    if name == "auto":
+        name = "lxml" if lxml_html is not None else "bs4"
+    restricted = RESTRICTED_PARSING if restricted is None else restricted
+    key = (name, restricted)
+    if key not in _backends:
+        if name == "lxml":
+            if lxml_html is None:
+                raise ImportError("The 'lxml' parser backend needs the lxml package")
+            _backends[key] = LxmlBackend(restricted=restricted)
+        elif name == "bs4":
+            _backends[key] = SoupBackend(restricted=restricted)
+        else:
+            raise ValueError(f"Unknown parser backend: {name}")
+    return _backends[key]
+
+
+def parse_page(html_content: str, page_no: int, backend: str = None) -> list:
     """Parse all supporter entries from a single HTML page."""
-    supporters = []
-    soup = BeautifulSoup(html_content, "html.parser")
-
-    # Example selector (adjust to real page structure)
-    blocks = soup.find_all("div", class_="white-box")[1:]
-    print(f"[DEBUG] --- Found {len(blocks)} supporters in page {page_no}")
-    for block in blocks:
-        supporter = parse_supporter_block(block)
-        supporters.append(supporter)
+    supporters = get_backend(backend).parse_page(html_content)
+    logger.debug("Found %d supporters in page %s", len(supporters), page_no)
     return supporters
 
 
-def parse_multiple_pages(list_of_html: list) -> list:
+def parse_multiple_pages(list_of_html: list, backend: str = None) -> list:
     """Parse multiple pages and combine supporter data."""
 
     all_supporters = []
     for index, html in enumerate(list_of_html, start=1):
-        all_supporters.extend(parse_page(html, index))
+        all_supporters.extend(parse_page(html, index, backend))
     return all_supporters
+
+
+def iter_parse(pages, backend: str = None):
+    """
+    Streaming parse: consume HTML pages one at a time and yield
+    the list of supporter entries found on each page.
+    """
+    for index, html in enumerate(pages, start=1):
+        start = time.perf_counter()
+        supporters = parse_page(html, index, backend)
+        METRICS.observe("parse_seconds", time.perf_counter() - start)
+        METRICS.inc("rows_parsed_total", len(supporters))
+        yield supporters
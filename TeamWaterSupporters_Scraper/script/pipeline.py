@@ -0,0 +1,144 @@
+"""
+pipeline.py
+
+Streaming mode for the scraper: fetch -> parse -> clean -> export run as
+generator stages connected by bounded queues, so pages are parsed, cleaned
+and written while pagination continues and memory stays flat.
+"""
+import queue
+import threading
+import time
+import fetcher, parser, cleaner, exporter, netcapture
+from metrics import METRICS
+from parse_executor import ParseExecutor, PARSE_WORKERS
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+QUEUE_SIZE = 8  # items buffered between two stages before the producer waits
+
+_DONE = object()  # end-of-stream marker
+
+
+class _StageError:
+    """Carries an exception from a stage thread to its consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+# -----------------------------
+# Stage plumbing
+# -----------------------------
+def buffered(iterable, maxsize=QUEUE_SIZE, name="stage"):
+    """
+    Run `iterable` in a background thread and yield its items through a
+    bounded queue. The producer blocks once `maxsize` items are waiting,
+    so a slow consumer throttles the stage instead of growing memory.
+    Exceptions in the stage are re-raised in the consumer.
+    Per stage, records the time taken to produce each item (including any
+    wait on the stage upstream) and the time spent blocked on a full queue.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def _put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        try:
+            iterator = iter(iterable)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                produced = time.perf_counter()
+                METRICS.observe("stage_item_seconds", produced - start, stage=name)
+                if not _put(item):
+                    break
+                METRICS.inc("stage_blocked_seconds_total", time.perf_counter() - produced, stage=name)
+        except Exception as e:
+            _put(_StageError(e))
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()  # release leased drivers etc. on early stop
+            _put(_DONE)
+
+    thread = threading.Thread(target=_produce, name=f"pipeline-{name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join(timeout=5)
+
+
+# -----------------------------
+# Streaming workflow
+# -----------------------------
+def iter_record_batches(start_url: str, capture="dom", pool=None):
+    """
+    Yield each page's raw supporter records, either parsed from the DOM
+    (capture="dom") or built from captured JSON payloads (capture="network").
+    """
+    if capture == "network":
+        return netcapture.iter_page_records(start_url, pool=pool)
+    return parser.iter_parse(fetcher.iter_pages(start_url, pool=pool))
+
+
+def _export(cleaned, output_path: str, loader=None) -> int:
+    """Final stage: write batches to the CSV, handing each to the warehouse loader too."""
+    if loader is not None:
+        cleaned = loader.tee(cleaned)
+    return exporter.export_stream(cleaned, output_path)
+
+
+def run_streaming(start_url: str, output_path: str, queue_size=QUEUE_SIZE, pool=None, parse_workers=PARSE_WORKERS, capture="dom", loader=None, checkpoint=None) -> int:
+    """
+    Fetch, parse, clean and export incrementally.
+    Each stage runs in its own thread; at most `queue_size` pages/batches
+    wait between two stages. With parse_workers > 1 the parse stage hands
+    pages to worker processes. capture="network" builds records from the
+    page's JSON responses and skips HTML parsing. Cleaned batches are also
+    queued on `loader` (a warehouse.WarehouseLoader) when given. With a
+    `checkpoint` (checkpoint.Checkpoint) every page is logged as it is
+    fetched, and the pages of an interrupted run are replayed, not fetched again.
+    Returns the number of rows written.
+    """
+    if capture == "network":
+        records = netcapture.iter_page_records(start_url, pool=pool, checkpoint=checkpoint)
+        if checkpoint is not None:
+            records = checkpoint.resume(records, "rows")
+        records = buffered(records, queue_size, "capture")
+        cleaned = buffered(cleaner.iter_clean(records), queue_size, "clean")
+        return _export(cleaned, output_path, loader)
+
+    pages = fetcher.iter_pages(start_url, pool=pool, checkpoint=checkpoint)
+    if checkpoint is not None:
+        pages = checkpoint.resume(pages)
+    pages = buffered(pages, queue_size, "fetch")
+    if parse_workers > 1:
+        with ParseExecutor(workers=parse_workers, max_in_flight=queue_size) as executor:
+            parsed = buffered(executor.map_pages(pages), queue_size, "parse")
+            cleaned = buffered(cleaner.iter_clean(parsed), queue_size, "clean")
+            return _export(cleaned, output_path, loader)
+
+    parsed = buffered(parser.iter_parse(pages), queue_size, "parse")
+    cleaned = buffered(cleaner.iter_clean(parsed), queue_size, "clean")
+    return _export(cleaned, output_path, loader)
@@ -3,12 +3,30 @@ scraper.py
 
 Main script to scrape supporter data from TeamWater.org donations page,
 clean it, and export to CSV.
+
+Command line:
+    python scraper.py run      [--batch] [--full] [--capture dom|network] [--no-warehouse] [--fresh]
+    python scraper.py fetch    [--pages-dir DIR] [--fresh]    # save every page's HTML, no parsing
+    python scraper.py process  [--pages-dir DIR]    # parse, clean and export saved pages (no browser)
+A crashed full crawl resumes from its checkpoint (output/checkpoints) on the
+next run; --fresh discards it and starts again from page 1.
+Stage modules (selenium, aiohttp, bs4, pandas...) are imported only by the
+commands that use them; the import and startup time is logged.
 """
 
-print("[INFO] Start all libraries installation...")
+import time
+_STARTED = time.perf_counter()  # for the startup report
+
+import argparse
+import glob
+import importlib
+import logging
 import os
-import fetcher, parser, cleaner, exporter
-print("[INFO] All libraries installed correctly...")
+import sys
+from checkpoint import Checkpoint, checkpoint_path
+from metrics import METRICS, configure_logging
+from watermark import ANCHOR_RUN, Watermark, fingerprint, watermark_path
+from warehouse import SQLiteBackend, SUPPORTERS, WarehouseLoader
 
 
 # -----------------------------
@@ -26,6 +44,8 @@ print("[INFO] All libraries installed correctly...")
 # [ERROR] → caught exceptions or failed operations.
 # [ALERT] → (optional/custom) for very serious issues that need immediate attention. May not stop the program.
 # [CRITICAL] → unrecoverable failures, e.g., browser failed to start.
+# Modules log through logging.getLogger(__name__); metrics.configure_logging() maps
+# [TRACE]/[VERBOSE] to DEBUG, [NOTICE] to INFO and [ALERT] to ERROR.
 #
 #
 #
@@ -36,28 +56,130 @@ print("[INFO] All libraries installed correctly...")
 # 
 # 0.
 # scraper.py - main orchestration script
-# # run_scraper(start_url: str, output_path: str)
+# # run_scraper(start_url: str, output_path: str, stream: bool = False, incremental: bool = False, capture: str = "dom", warehouse_path=None, checkpoint_dir=CHECKPOINT_DIR, fresh=False)
 # # # Orchestrates the scraping workflow:
 # # # # 1. Fetch page(s) using fetcher.get_all_pages()
 # # # # 2. Parse supporter data using parser.parse_multiple_pages()
 # # # # 3. Clean data using cleaner.clean_data()
-# # # # 4. Export to CSV using exporter.export_to_csv()
+# # # # 4. Export to CSV using exporter.export_to_csv() (and upsert into the SQLite warehouse)
+# # # With stream=True it runs pipeline.run_streaming() instead
+# # # With incremental=True it runs run_incremental() instead
+# # # Full crawls are checkpointed per page and resume after a crash (fresh=True starts over)
+# # run_incremental(start_url: str, output_path: str, capture="dom", loader=None) -> int
+# # # Stops paginating once the feed repeats the newest exported supporters, appends only the rows before them (repeats included)
+# # run_fetch(start_url: str, pages_dir=PAGES_DIR, checkpoint_dir=CHECKPOINT_DIR, fresh=False) -> int
+# # # `fetch` command: saves every page's HTML to output/pages/page-00001.html, ... without parsing
+# # run_process(pages_dir: str, output_path: str, warehouse_path=None) -> int
+# # # `process` command: parses, cleans and exports saved pages page by page (no browser, no network)
+# # main(argv=None) -> int
+# # # Command line (run / fetch / process); imports only the stage modules the command needs and logs the startup time
+# # load_modules(*names)
+# # # Imports stage modules on first use and records their import time
+# # open_checkpoint(start_url, capture="dom", checkpoint_dir=CHECKPOINT_DIR, fresh=False) / close_checkpoint(checkpoint, succeeded)
+# # # Opens the crawl's checkpoint; removes it once the output is written, keeps it after a failure
+#
+# checkpoint.py - crash-safe crawl checkpoints (output/checkpoints)
+# # checkpoint_path(url: str, kind="pages", folder=CHECKPOINT_DIR) -> str
+# # # One JSON-lines log per start URL; kind="records" for network captures
+# # Checkpoint.open(path, fresh=False) -> Checkpoint
+# # # Loads the log, drops a torn last line; next_page is where fetching resumes
+# # Checkpoint.record(page, cursor, html=None, rows=None)
+# # # Appends and fsyncs one page with its pagination cursor {page, url, hash}
+# # Checkpoint.resume(pages, field="html") -> generator
+# # # Replays the logged pages, then yields the freshly fetched ones
+#
+# warehouse.py - SQLite warehouse loader (output/warehouse.sqlite)
+# # WarehouseLoader(backend, table, batch_size=1000)
+# # # Writer thread: submit(rows, known=None) / tee(batches) queue rows, upserted in batched executemany transactions
+# # SQLiteBackend(path) / WarehouseBackend
+# # # WAL-mode SQLite backend; the backend interface leaves room for Postgres
+# # SUPPORTERS
+# # # supporters table, keyed by the watermark fingerprint plus an occurrence number (repeat donations), indexed on date and amount
+# # load_rows(rows: list, table=SUPPORTERS, path=WAREHOUSE_PATH) -> int
+# # # One-shot load of a row list
+#
+# watermark.py - already-exported supporters for incremental runs
+# # fingerprint(record: dict) -> str
+# # # Stable hash of a cleaned record's name, amount, date and message
+# # Watermark.load(path) -> Watermark / Watermark.from_csv(path, csv_path) -> Watermark
+# # # Loads exported fingerprints (newest first, counted); without a watermark file the first run crawls in full and builds it from the CSV it wrote
+# # # find_anchor(fingerprints, start=0) finds the newest exported run in the feed; unseen(records) is the fallback multiset difference
+#
+# metrics.py - logging setup and run metrics
+# # configure_logging(level=logging.INFO, log_file=None)
+# # # Console (and file) handlers in the "[LEVEL] module --- message" format
+# # METRICS.inc(name, value=1, **labels) / METRICS.observe(name, seconds, **labels) / METRICS.timer(name, **labels)
+# # # Counters and latency histograms: pages fetched, fetch latency, WebDriverWait time, rows parsed/rejected/written...
+# # METRICS.write(json_path, prom_path=None, **run_info)
+# # # Writes the run's JSON summary and Prometheus text file (output/metrics.json, output/metrics.prom)
+#
+# pipeline.py - streaming mode
+# # buffered(iterable, maxsize=8) -> generator
+# # # Runs a stage in a background thread, yields its items through a bounded queue
+# # run_streaming(start_url: str, output_path: str, queue_size=8, parse_workers=N, capture="dom", loader=None, checkpoint=None) -> int
+# # # fetcher.iter_pages -> ParseExecutor.map_pages (or parser.iter_parse) -> cleaner.iter_clean -> exporter.export_stream
+# # # capture="network": netcapture.iter_page_records -> cleaner.iter_clean -> exporter.export_stream
+# # iter_record_batches(start_url: str, capture="dom") -> generator
+# # # Yields each page's raw supporter records from the DOM or from captured JSON
+#
+# netcapture.py - build records from the page's XHR/fetch JSON (Chrome DevTools Network events)
+# # NetworkCapture(driver, url_pattern)
+# # # Reads the performance log, returns decoded JSON bodies of matching finished responses
+# # records_from_payload(payload, field_map=PAYLOAD_FIELDS) -> list
+# # # Finds the record list in a payload and maps it to name, amount, date, location, message
+# # iter_page_records(url: str, pool=None, timeout=10, checkpoint=None, retries=PAGE_RETRIES) -> generator
+# # # Paginates and yields each page's records from JSON, falling back to DOM scraping (the fallback waits for the container to change from the previous page)
+#
+# parse_executor.py - parsing in worker processes, overlapped with fetching
+# # ParseExecutor(workers, backend=None, max_in_flight=64)
+# # # map_pages(pages) submits each page as it arrives and yields supporter lists in page order
+# # parse_while_fetching(pages, workers=N) -> list
+# # # Parses pages from fetcher.iter_pages() in worker processes, returns all supporters in page order
 #
 # 1.
+# driver_pool.py - warm Selenium browsers shared across fetch jobs
+# # DriverPool(size, max_pages, max_rss_mb)
+# # # Keeps N warm headless browsers; lease() hands one out and resets/recycles it on return
+# # get_pool() -> DriverPool
+# # # Process-wide default pool, created lazily
+#
 # fetcher.py - functions to fetch HTML content (static and dynamic)
-# # get_all_pages(start_url: str) -> list
+# # get_all_pages(start_url, mode="dynamic", per_host=4, pool=None) -> list
 # # # Entry point for fetching all pages, handles pagination and dynamic content
+# # # mode="static" fetches one URL or a list of page URLs concurrently
+# # StaticFetchEngine(per_host, max_connections, timeout)
+# # # Asyncio fetch engine with a shared keep-alive connection pool and a per-host concurrency limit
+# # fetch_static_pages(urls: list, per_host=4) -> list
+# # # Fetches many static pages at once, returns HTML strings in input order (RuntimeError inside a running event loop)
+# # fetch_static_pages_async(...) -> list
+# # # The same as a coroutine, for callers that already run an event loop
 # # fetch_static_page(url: str) -> str
-# # # Fetches static HTML content using requests
-# # fetch_dynamic_page(url: str, driver_path=None) -> str
-# # # Fetches dynamically loaded HTML using Selenium, waits for content to load, handles pagination
+# # # Fetches static HTML content for a single URL through the async engine
+# # iter_pages(url: str, pool=None, wait_mode=None, checkpoint=None, retries=PAGE_RETRIES) -> generator
+# # # Yields each page's container HTML as soon as it is captured
+# # # Records every page in `checkpoint` and starts at its next_page; failed pages are retried with backoff
+# # open_at_page(session, url, page_no=1, cursor=None, wait_mode=None) -> str
+# # # Reopens a crawl at a page: loads the cursor URL if it is addressable, otherwise clicks Next page_no-1 times
+# # save_error_screenshot(driver, label, folder=ERROR_SCREENSHOT_DIR) -> str | None
+# # # Saves a timestamped screenshot of a failed page
+# # retry_delay(attempt) -> float
+# # # Exponential backoff between page retries, capped at RETRY_BACKOFF_MAX
+# # # wait_mode="observer" (default) waits in the browser, "poll" uses innerHTMLChanged
+# # fetch_dynamic_page(url: str, pool=None, wait_mode=None, checkpoint=None) -> list
+# # # Fetches dynamically loaded HTML on a leased driver, waits for content to load, handles pagination
 # # get_driver() -> webdriver.Chrome
-# # # Sets up and returns a configured Selenium Chrome driver
+# # # Sets up and returns a configured Selenium Chrome driver (driver binary resolved once per process)
 # # innerHTMLChanged(locator, oldHTML="") -> callable
 # # # Custom Expected Condition: waits until the innerHTML of an element changes
 # # findNextButton(locator, searchText="") -> callable
 # # # Custom Expected Condition: waits for a button with matching text to appear
-# # openNextPage(delay=0) -> bool
+# # findNextButtonJS(locator, searchText="") -> callable
+# # # Same as findNextButton, but matches the text in the browser in one round trip
+# # arm_change_watch(driver, selector=CONTAINER_SELECTOR) -> bool
+# # # Installs a MutationObserver on the container before the action that changes it
+# # wait_for_change(driver, timeout=60) -> dict
+# # # Waits in the browser until the container changed and settled, returns a small {mutations, length, hash} signal
+# # openNextPage(session: PageSession, delay=0) -> bool
 # # # Clicks the 'Next' button if available, returns True if navigation succeeds, False otherwise
 # parser.py  - functions to parse supporter data from HTML
 # 
@@ -69,10 +191,16 @@ print("[INFO] All libraries installed correctly...")
 # # # Helper function: safely get text from a tag with a given class, returns default if missing
 # # safe_get_html(block, tag, class_name, default="")
 # # # Helper function: safely get innerHTML from a tag with a given class, returns default if missing
-# # parse_page(html_content: str, page_no: int) -> list
+# # get_backend(name="auto", restricted=RESTRICTED_PARSING) -> SoupBackend | LxmlBackend
+# # # Returns the parser backend: "lxml" (compiled selectors, one pass per block) or "bs4" (fallback)
+# # # restricted: build only the supporter blocks (bs4 SoupStrainer / lxml incremental parse), freeing each page's tree after extraction
+# # # lxml field text follows bs4's get_text(): script/style/template content skipped, whitespace-only strings collapsed
+# # parse_page(html_content: str, page_no: int, backend=None) -> list
 # # # Parses all supporter blocks in a single HTML page and returns a list of dictionaries
-# # parse_multiple_pages(list_of_html: list) -> list
+# # parse_multiple_pages(list_of_html: list, backend=None) -> list
 # # # Parses multiple HTML pages and returns a combined list of supporter dictionaries
+# # iter_parse(pages) -> generator
+# # # Yields the list of supporter dictionaries for each page as pages arrive
 # 
 # 3.
 # cleaner.py - functions to clean and standardize parsed data
@@ -82,14 +210,24 @@ print("[INFO] All libraries installed correctly...")
 # # # Converts donation amount string (e.g., "$1,000") to a float
 # # clean_date(date_str: str) -> str
 # # # Converts a date string to standardized YYYY-MM-DD format
+# # detect_date_format(values, formats=DATE_FORMATS) -> str | None
+# # # Picks the date format that parses most of a sample of values
+# # BatchCleaner(date_format=None)
+# # # Cleans whole batches column by column (pandas), memoizes repeated values, counts rejected values per column
 # # clean_data(data_list: list) -> list
-# # # Applies all cleaning functions to a list of supporter dictionaries and returns cleaned data
+# # # Cleans a list of supporter dictionaries with a BatchCleaner; unparseable amounts/dates become None
+# # iter_clean(batches, cleaner=None) -> generator
+# # # Yields each batch of supporter dictionaries cleaned, sharing one BatchCleaner (date format detected once)
 # 
 # 
 # 4.
 # exporter.py - functions to export cleaned data to CSV
 # # export_to_csv(data_list: list, output_path: str)
 # # # Saves the cleaned data list to a CSV file at the specified path
+# # export_stream(batches, output_path: str, fieldnames: list = None) -> int
+# # # Appends and flushes each batch of rows to the CSV as it arrives
+# # append_to_csv(data_list: list, output_path: str) -> int
+# # # Appends rows to an existing CSV without rewriting it
 # # validate_csv(output_path: str, sample_csv_path: str = None) -> bool
 # # # Optionally validates the CSV file against a sample CSV format, returns True if valid, False otherwise
 
@@ -100,48 +238,348 @@ print("[INFO] All libraries installed correctly...")
 START_URL = "https://teamwater.org/donations"
 OUTPUT_FOLDER = os.path.join(os.getcwd(), "output")
 OUTPUT_FILE = os.path.join(OUTPUT_FOLDER, "teamwater_supporters.csv")
+STREAMING = True    # parse, clean and write pages while pagination continues
+INCREMENTAL = True  # only fetch supporters newer than the last run and append them
+CAPTURE = "dom"     # "dom": parse innerHTML; "network": build records from the page's JSON responses (DOM fallback)
+WAREHOUSE = True    # also upsert cleaned supporters into output/warehouse.sqlite
+WAREHOUSE_FILE = os.path.join(OUTPUT_FOLDER, "warehouse.sqlite")
+METRICS_FILE = os.path.join(OUTPUT_FOLDER, "metrics.json")     # JSON summary of the run
+METRICS_PROM_FILE = os.path.join(OUTPUT_FOLDER, "metrics.prom") # same, Prometheus text format (node_exporter textfile)
+PAGES_DIR = os.path.join(OUTPUT_FOLDER, "pages")                # page HTML saved by `fetch`, read by `process`
+CHECKPOINTS = True  # log every fetched page so a crashed full crawl resumes where it stopped
+CHECKPOINT_DIR = os.path.join(OUTPUT_FOLDER, "checkpoints")
+
+logger = logging.getLogger(__name__)
 
 # Ensure output folder exists
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
 
+# -----------------------------
+# Lazy stage imports
+# -----------------------------
+COMMAND_MODULES = {
+    "run": ["pipeline"],  # imports fetcher, netcapture, parse_executor, parser, cleaner and exporter
+    "fetch": ["fetcher"],
+    "process": ["parser", "cleaner", "exporter"],
+}
+
+_import_seconds = {}  # module -> seconds spent importing it (including its own imports)
+
+
+def load_modules(*names):
+    """Import stage modules on first use, timing each one. Returns the modules in order."""
+    modules = []
+    for name in names:
+        module = sys.modules.get(name)
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            _import_seconds[name] = time.perf_counter() - start
+            METRICS.observe("import_seconds", _import_seconds[name], module=name)
+        modules.append(module)
+    return modules if len(modules) > 1 else modules[0]
+
+
+def report_startup():
+    """Log how long the process took to get ready, and which imports cost the most."""
+    startup = time.perf_counter() - _STARTED
+    METRICS.observe("startup_seconds", startup)
+    imports = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in sorted(_import_seconds.items(), key=lambda item: -item[1]))
+    logger.info(f"Ready in {startup:.2f}s" + (f" (imports: {imports})" if imports else ""))
+
+
+def write_metrics(metrics_path: str, metrics_prom_path: str = None, **run_info):
+    """Write the run's metrics (JSON summary and Prometheus text file), if a path is given."""
+    if metrics_path:
+        METRICS.write(metrics_path, metrics_prom_path, **run_info)
+
+
+# -----------------------------
+# Saved pages
+# -----------------------------
+def save_pages(pages, pages_dir: str = PAGES_DIR) -> int:
+    """Write each page's HTML to pages_dir/page-00001.html, ... (earlier pages are removed). Returns pages saved."""
+    os.makedirs(pages_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(pages_dir, "page-*.html")):
+        os.remove(path)
+    count = 0
+    for count, html in enumerate(pages, start=1):
+        with open(os.path.join(pages_dir, f"page-{count:05d}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+    return count
+
+
+def iter_saved_pages(pages_dir: str = PAGES_DIR):
+    """Yield the HTML of every saved page, in page order, one page in memory at a time."""
+    paths = sorted(glob.glob(os.path.join(pages_dir, "page-*.html")))
+    if not paths:
+        raise FileNotFoundError(f"No saved pages in {pages_dir}; run `scraper.py fetch` first")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            yield f.read()
+
+
+# -----------------------------
+# Incremental workflow
+# -----------------------------
+def run_incremental(start_url: str, output_path: str, pool=None, capture="dom", loader=None) -> int:
+    """
+    Walk the newest-first donations feed only until it repeats the newest
+    supporters already exported (per the watermark), then append the rows
+    listed before them to the existing CSV (and queue them on the warehouse
+    `loader`). If the feed never repeats them, every row beyond the exported
+    count of its fingerprint is new.
+    Returns the number of new rows.
+    """
+    pipeline, cleaner, exporter = load_modules("pipeline", "cleaner", "exporter")
+    watermark = Watermark.load(watermark_path(output_path))
+    logger.info(f"Incremental run, {len(watermark)} supporters already known...")
+
+    rows, fingerprints, anchor = [], [], None
+    batches = pipeline.iter_record_batches(start_url, capture=capture, pool=pool)
+    try:
+        for page_no, records in enumerate(batches, start=1):
+            searched = len(fingerprints) - ANCHOR_RUN + 1  # the anchor may straddle pages
+            page_rows = cleaner.clean_data(records)
+            rows.extend(page_rows)
+            fingerprints.extend(fingerprint(row) for row in page_rows)
+            anchor = watermark.find_anchor(fingerprints, start=searched)
+            if anchor is not None:
+                logger.info(f"Page {page_no} reaches the newest supporters already exported, stopping.")
+                break
+    finally:
+        batches.close()  # stops pagination and hands the driver back
+
+    if anchor is not None:
+        new_rows = rows[:anchor]
+    else:
+        new_rows = watermark.unseen(rows)
+        if len(watermark):
+            logger.warning("Newest exported supporters not found in the feed; kept the rows beyond the exported counts")
+
+    if loader is not None:
+        loader.submit(new_rows, known=watermark.counts)
+    exporter.append_to_csv(new_rows, output_path)
+    for row in new_rows:
+        watermark.add(row)
+    watermark.save()
+    return len(new_rows)
+
+
+# -----------------------------
+# Checkpoints
+# -----------------------------
+def open_checkpoint(start_url: str, capture: str = "dom", checkpoint_dir: str = CHECKPOINT_DIR, fresh: bool = False):
+    """Checkpoint for a full crawl of `start_url` (None if checkpoint_dir is None)."""
+    if not checkpoint_dir:
+        return None
+    kind = "records" if capture == "network" else "pages"
+    return Checkpoint.open(checkpoint_path(start_url, kind, checkpoint_dir), fresh=fresh)
+
+
+def close_checkpoint(checkpoint: Checkpoint, succeeded: bool):
+    """Remove the checkpoint once a complete crawl is written; otherwise keep it for the next run."""
+    if checkpoint is None:
+        return
+    if succeeded and checkpoint.complete:
+        checkpoint.remove()
+        return
+    checkpoint.close()
+    if checkpoint.last_page:
+        logger.warning(f"Crawl stopped after page {checkpoint.last_page}; run again to resume from the checkpoint ({checkpoint.path})")
+
+
 # -----------------------------
 # Main workflow
 # -----------------------------
-def run_scraper(start_url: str, output_path: str):
+def run_scraper(start_url: str, output_path: str, stream: bool = False, incremental: bool = False, capture: str = "dom", warehouse_path: str = None, metrics_path: str = METRICS_FILE, metrics_prom_path: str = METRICS_PROM_FILE, checkpoint_dir: str = CHECKPOINT_DIR, fresh: bool = False):
     """
     Orchestrates the scraping workflow:
     1. Fetch page(s)
     2. Parse supporter data
     3. Clean data
-    4. Export to CSV
+    4. Export to CSV (and load into the SQLite warehouse at `warehouse_path`, if given)
+    With stream=True the four stages run concurrently, page by page.
+    With incremental=True only supporters newer than the last run are fetched and appended;
+    if there is no watermark yet, a full crawl rewrites the CSV and the watermark is built from it.
+    capture="network" builds records from the page's JSON responses instead of parsing HTML.
+    Full crawls log every page to a checkpoint in `checkpoint_dir`; after a crash the
+    next run replays it and fetches on from the last good page (fresh=True starts over).
+    Run metrics are written to `metrics_path` (JSON) and `metrics_prom_path` (Prometheus text) at the end.
     """
 
-    print("[INFO] Starting scraper...")
+    logger.info("Starting scraper...")
+    build_watermark = incremental and not os.path.exists(watermark_path(output_path))
+    if build_watermark:
+        logger.info("No watermark yet: running a full crawl to rewrite the CSV and build one")
+        incremental = False
+    mode = "incremental" if incremental else "stream" if stream else "batch"
+    started = time.time()
+    loader = WarehouseLoader(SQLiteBackend(warehouse_path), SUPPORTERS) if warehouse_path else None
+    checkpoint = None if incremental else open_checkpoint(start_url, capture, checkpoint_dir, fresh)
+
+    try:
+        if incremental:
+            rows = run_incremental(start_url, output_path, capture=capture, loader=loader)
+            logger.info(f"Scraper finished successfully ({rows} new supporter entries).")
+
+        elif stream:
+            pipeline = load_modules("pipeline")
+            logger.info("Streaming pages to CSV...")
+            rows = pipeline.run_streaming(start_url, output_path, capture=capture, loader=loader, checkpoint=checkpoint)
+            logger.info(f"Scraper finished successfully ({rows} supporter entries).")
+
+        else:
+            # 1 + 2. Fetch all pages; each page is parsed in a worker process as soon as it is captured
+            cleaner, exporter = load_modules("cleaner", "exporter")
+            logger.info("Fetching and parsing pages...")
+            with METRICS.timer("stage_seconds", stage="fetch_parse"):
+                if capture == "network":
+                    netcapture = load_modules("netcapture")
+                    pages = netcapture.iter_page_records(start_url, checkpoint=checkpoint)
+                    if checkpoint is not None:
+                        pages = checkpoint.resume(pages, "rows")
+                    raw_data = [record for records in pages for record in records]
+                else:
+                    fetcher, parse_executor = load_modules("fetcher", "parse_executor")
+                    pages = fetcher.iter_pages(start_url, checkpoint=checkpoint)
+                    if checkpoint is not None:
+                        pages = checkpoint.resume(pages)
+                    raw_data = parse_executor.parse_while_fetching(pages)
+            logger.info(f"Found {len(raw_data)} supporter entries...")
+
+            # 3. Clean data
+            logger.info("Cleaning data...")
+            with METRICS.timer("stage_seconds", stage="clean"):
+                cleaned_data = cleaner.clean_data(raw_data)
+
+            # 4. Export to CSV
+            logger.info("Exporting data to CSV...")
+            with METRICS.timer("stage_seconds", stage="export"):
+                exporter.export_to_csv(cleaned_data, output_path)
+            if loader is not None:
+                loader.submit(cleaned_data)
+
+            logger.info("Scraper finished successfully.")
+
+        if build_watermark:
+            Watermark.from_csv(watermark_path(output_path), output_path).save()
+        if loader is not None:
+            loader.close()  # waits for the writer thread to finish the last batch
+            loader = None
+        close_checkpoint(checkpoint, succeeded=True)
+        checkpoint = None
+    finally:
+        if loader is not None:
+            loader.close()
+        close_checkpoint(checkpoint, succeeded=False)
+        METRICS.observe("run_seconds", time.time() - started, mode=mode)
+        write_metrics(metrics_path, metrics_prom_path, url=start_url, mode=mode, capture=capture, started=started, finished=time.time())
+
+
+def run_fetch(start_url: str, pages_dir: str = PAGES_DIR, metrics_path: str = METRICS_FILE, metrics_prom_path: str = METRICS_PROM_FILE, checkpoint_dir: str = CHECKPOINT_DIR, fresh: bool = False) -> int:
+    """
+    Fetch every page and save its HTML to `pages_dir` without parsing it. Returns pages saved.
+    Like run_scraper(), an interrupted fetch resumes from its checkpoint.
+    """
+    fetcher = load_modules("fetcher")
+    started = time.time()
+    checkpoint = open_checkpoint(start_url, "dom", checkpoint_dir, fresh)
+    succeeded = False
+    try:
+        pages = fetcher.iter_pages(start_url, checkpoint=checkpoint)
+        if checkpoint is not None:
+            pages = checkpoint.resume(pages)
+        saved = save_pages(pages, pages_dir)
+        logger.info(f"Saved {saved} page(s) to: {pages_dir}")
+        succeeded = True
+        return saved
+    finally:
+        close_checkpoint(checkpoint, succeeded)
+        write_metrics(metrics_path, metrics_prom_path, url=start_url, mode="fetch", started=started, finished=time.time())
+
+
+def run_process(pages_dir: str, output_path: str, warehouse_path: str = None, metrics_path: str = METRICS_FILE, metrics_prom_path: str = METRICS_PROM_FILE) -> int:
+    """
+    Parse, clean and export the pages saved by run_fetch(), page by page,
+    without a browser or network (and load them into the warehouse, if given).
+    Returns the number of rows written.
+    """
+    parser, cleaner, exporter = load_modules("parser", "cleaner", "exporter")
+    started = time.time()
+    loader = WarehouseLoader(SQLiteBackend(warehouse_path), SUPPORTERS) if warehouse_path else None
+    try:
+        batches = cleaner.iter_clean(parser.iter_parse(iter_saved_pages(pages_dir)))
+        if loader is not None:
+            batches = loader.tee(batches)
+        rows = exporter.export_stream(batches, output_path)
+        logger.info(f"Processed saved pages ({rows} supporter entries).")
+        return rows
+    finally:
+        if loader is not None:
+            loader.close()
+        write_metrics(metrics_path, metrics_prom_path, pages_dir=pages_dir, mode="process", started=started, finished=time.time())
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog="scraper.py", description="Scrape TeamWater.org supporters to CSV.")
+    arg_parser.add_argument("--log-level", default="INFO", help="DEBUG, INFO, WARNING, ... (default: INFO)")
+    arg_parser.add_argument("--log-file", help="also write log records to this file")
+    arg_parser.add_argument("--no-metrics", action="store_true", help="do not write output/metrics.json and metrics.prom")
+    arg_parser.set_defaults(  # `run` options, for a bare `scraper.py`
+        command="run", url=START_URL, output=OUTPUT_FILE, stream=STREAMING,
+        incremental=INCREMENTAL, capture=CAPTURE, warehouse=WAREHOUSE, fresh=False,
+    )
+    commands = arg_parser.add_subparsers(dest="command")
+
+    run = commands.add_parser("run", help="fetch, parse, clean and export (default)")
+    run.add_argument("--url", default=START_URL)
+    run.add_argument("--output", default=OUTPUT_FILE)
+    run.add_argument("--batch", dest="stream", action="store_false", default=STREAMING, help="fetch everything first, then clean and export")
+    run.add_argument("--full", dest="incremental", action="store_false", default=INCREMENTAL, help="fetch every page, not only new supporters")
+    run.add_argument("--capture", choices=["dom", "network"], default=CAPTURE)
+    run.add_argument("--no-warehouse", dest="warehouse", action="store_false", default=WAREHOUSE)
+    run.add_argument("--fresh", action="store_true", help="ignore the checkpoint of an interrupted crawl and start from page 1")
 
-    # 1. Fetch all pages
-    print("[INFO] Fetching pages...")
-    pages_html = fetcher.get_all_pages(start_url)
-    print(f"[INFO] Fetched {len(pages_html)} pages...")
+    fetch = commands.add_parser("fetch", help="save every page's HTML to --pages-dir, no parsing")
+    fetch.add_argument("--url", default=START_URL)
+    fetch.add_argument("--pages-dir", default=PAGES_DIR)
+    fetch.add_argument("--fresh", action="store_true", help="ignore the checkpoint of an interrupted fetch")
 
-    # 2. Parse supporter data
-    print("[INFO] Parsing supporter data...")
-    raw_data = parser.parse_multiple_pages(pages_html)
-    print(f"[INFO] Found {len(raw_data)} supporter entries...")
+    process = commands.add_parser("process", help="parse, clean and export the pages saved by `fetch`")
+    process.add_argument("--pages-dir", default=PAGES_DIR)
+    process.add_argument("--output", default=OUTPUT_FILE)
+    process.add_argument("--no-warehouse", dest="warehouse", action="store_false", default=WAREHOUSE)
+    return arg_parser
 
-    # 3. Clean data
-    print("[INFO] Cleaning data...")
-    cleaned_data = cleaner.clean_data(raw_data)
 
-    # 4. Export to CSV
-    print("[INFO] Exporting data to CSV...")
-    exporter.export_to_csv(cleaned_data, output_path)
+def main(argv=None) -> int:
+    """Command-line entry point: `run` (default), `fetch` or `process`."""
+    args = build_arg_parser().parse_args(argv)
+    configure_logging(args.log_level.upper(), args.log_file)
+    metrics = {"metrics_path": None} if args.no_metrics else {}
+    checkpoints = {"checkpoint_dir": CHECKPOINT_DIR if CHECKPOINTS else None, "fresh": args.fresh}
 
-    print(f"[INFO] Scraper finished successfully.")
+    load_modules(*COMMAND_MODULES[args.command])
+    report_startup()
+    if args.command == "fetch":
+        run_fetch(args.url, args.pages_dir, **metrics, **checkpoints)
+    elif args.command == "process":
+        run_process(args.pages_dir, args.output, warehouse_path=WAREHOUSE_FILE if args.warehouse else None, **metrics)
+    else:
+        run_scraper(
+            args.url, args.output, stream=args.stream, incremental=args.incremental, capture=args.capture,
+            warehouse_path=WAREHOUSE_FILE if args.warehouse else None, **metrics, **checkpoints,
+        )
+    return 0
 
 
 # -----------------------------
 # Entry point
 # -----------------------------
 if __name__ == "__main__":
-    run_scraper(START_URL, OUTPUT_FILE)
+    sys.exit(main())
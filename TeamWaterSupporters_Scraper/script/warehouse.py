@@ -0,0 +1,246 @@
+"""
+warehouse.py
+
+Warehouse loader: bulk-loads cleaned supporters into a local SQLite
+database (WAL mode, batched upserts on a natural key plus an occurrence
+number, so repeat donations are kept apart) from a background writer thread, so scraping never waits on disk. Backends share a small
+interface so a Postgres backend can be added next to SQLiteBackend.
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from metrics import METRICS
+from watermark import fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+WAREHOUSE_PATH = os.path.join(os.getcwd(), "output", "warehouse.sqlite")
+LOAD_BATCH_SIZE = 1000  # rows per executemany / transaction
+LOAD_QUEUE_SIZE = 64    # batches waiting for the writer thread before submit() blocks
+
+_STOP = object()  # end-of-stream marker for the writer thread
+
+
+# -----------------------------
+# Table definitions
+# -----------------------------
+class Table:
+    """
+    A warehouse table: typed columns, the key column used for upserts,
+    secondary indexes and a function computing a row's natural key. Records
+    can share a natural key (the same supporter giving the same amount twice
+    on one day), so the stored key is "<natural key>:<occurrence>".
+    """
+
+    def __init__(self, name: str, columns: list, key: str, indexes: list, make_key):
+        self.name = name
+        self.columns = columns  # [(column, SQL type)], key column first
+        self.key = key
+        self.indexes = indexes  # [column, ...]
+        self.make_key = make_key
+
+    @property
+    def column_names(self) -> list:
+        return [column for column, _ in self.columns]
+
+    def to_row(self, record: dict, loaded_at: float, occurrence: int = 1) -> tuple:
+        """Row tuple in column order; `occurrence` numbers records sharing a natural key, from 1."""
+        values = {**record, self.key: f"{self.make_key(record)}:{occurrence}", "loaded_at": loaded_at}
+        return tuple(values.get(column) for column in self.column_names)
+
+
+SUPPORTERS = Table(
+    name="supporters",
+    columns=[
+        ("supporter_key", "TEXT PRIMARY KEY"),  # watermark fingerprint (name, amount, date, message) + ":<occurrence>"
+        ("name", "TEXT"),
+        ("amount", "REAL"),
+        ("date", "TEXT"),
+        ("location", "TEXT"),
+        ("message", "TEXT"),
+        ("loaded_at", "REAL"),
+    ],
+    key="supporter_key",
+    indexes=["date", "amount"],
+    make_key=fingerprint,
+)
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+class WarehouseBackend:
+    """
+    Interface every backend implements. Methods are only called from the
+    loader's writer thread, so connections never cross threads.
+    """
+
+    placeholder = "?"  # DB-API parameter style ("%s" for psycopg)
+
+    def connect(self):
+        raise NotImplementedError
+
+    def ensure_table(self, table: Table):
+        raise NotImplementedError
+
+    def upsert_many(self, table: Table, rows: list):
+        raise NotImplementedError
+
+    def count(self, table: Table) -> int:
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def upsert_sql(self, table: Table) -> str:
+        """INSERT ... ON CONFLICT (key) DO UPDATE, valid for both SQLite and Postgres."""
+        columns = table.column_names
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != table.key)
+        return (
+            f"INSERT INTO {table.name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join([self.placeholder] * len(columns))}) "
+            f"ON CONFLICT ({table.key}) DO UPDATE SET {updates}"
+        )
+
+
+class SQLiteBackend(WarehouseBackend):
+    """Local SQLite file in WAL mode; each batch is one transaction."""
+
+    def __init__(self, path=WAREHOUSE_PATH):
+        self.path = path
+        self.db = None
+
+    def connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, one fsync per checkpoint
+
+    def ensure_table(self, table: Table):
+        columns = ", ".join(f"{column} {sql_type}" for column, sql_type in table.columns)
+        with self.db:
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS {table.name} ({columns})")
+            for column in table.indexes:
+                self.db.execute(f"CREATE INDEX IF NOT EXISTS {table.name}_{column} ON {table.name} ({column})")
+
+    def upsert_many(self, table: Table, rows: list):
+        with self.db:  # one transaction per batch
+            self.db.executemany(self.upsert_sql(table), rows)
+
+    def count(self, table: Table) -> int:
+        return self.db.execute(f"SELECT COUNT(*) FROM {table.name}").fetchone()[0]
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+# -----------------------------
+# Loader
+# -----------------------------
+class WarehouseLoader:
+    """
+    Loads cleaned rows into `table` from a writer thread.
+    submit() only queues the rows; the thread groups them into batches of
+    `batch_size` and upserts each batch in one transaction. Records sharing a
+    natural key are numbered in submission order, after the `known` count
+    given for that key (rows earlier loads already stored); re-loading the
+    same rows in the same order updates them in place, so repeated runs are
+    idempotent.
+    Usage: `with WarehouseLoader(SQLiteBackend(), SUPPORTERS) as loader: loader.submit(rows)`
+    """
+
+    def __init__(self, backend: WarehouseBackend, table: Table, batch_size=LOAD_BATCH_SIZE, queue_size=LOAD_QUEUE_SIZE):
+        self.backend = backend
+        self.table = table
+        self.batch_size = batch_size
+        self.rows_loaded = 0
+        self.rows_stored = 0  # rows in the table once the load finished
+        self.error = None
+        self._occurrences = {}  # natural key -> highest occurrence number used
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name=f"warehouse-{table.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        pending = []
+        try:
+            self.backend.connect()
+            self.backend.ensure_table(self.table)
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                rows, known = item
+                loaded_at = time.time()
+                pending.extend(self.table.to_row(record, loaded_at, self._occurrence(record, known)) for record in rows)
+                while len(pending) >= self.batch_size:
+                    self._load(pending[:self.batch_size])
+                    pending = pending[self.batch_size:]
+            if pending:
+                self._load(pending)
+            self.rows_stored = self.backend.count(self.table)
+        except Exception as e:
+            self.error = e
+            logger.error(f"Warehouse load into {self.table.name} failed: {e}")
+            while self._queue.get() is not _STOP:
+                pass  # keep draining so submit() never blocks forever
+        finally:
+            self.backend.close()
+
+    def _occurrence(self, record: dict, known: dict) -> int:
+        key = self.table.make_key(record)
+        occurrence = max(self._occurrences.get(key, 0), known.get(key, 0)) + 1
+        self._occurrences[key] = occurrence
+        return occurrence
+
+    def _load(self, rows: list):
+        with METRICS.timer("warehouse_batch_seconds", table=self.table.name):
+            self.backend.upsert_many(self.table, rows)
+        self.rows_loaded += len(rows)
+        METRICS.inc("rows_loaded_total", len(rows), table=self.table.name)
+
+    def submit(self, rows: list, known: dict = None):
+        """
+        Queue cleaned rows for loading (blocks only when the queue is full).
+        `known` maps natural keys to how many rows with that key are already
+        stored, so new repeats are numbered after them instead of replacing them.
+        """
+        if rows:
+            self._queue.put((list(rows), dict(known or {})))
+
+    def tee(self, batches):
+        """Pass batches through unchanged while submitting each one for loading."""
+        for batch in batches:
+            self.submit(batch)
+            yield batch
+
+    def close(self):
+        """Flush the remaining rows and stop the writer thread. Re-raises a load failure."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        logger.info(f"Loaded {self.rows_loaded} row(s) into {self.table.name} ({self.rows_stored} stored)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_rows(rows: list, table: Table = SUPPORTERS, path=WAREHOUSE_PATH) -> int:
+    """Load a list of cleaned rows into the SQLite warehouse at `path`. Returns rows loaded."""
+    with WarehouseLoader(SQLiteBackend(path), table) as loader:
+        loader.submit(rows)
+    return loader.rows_loaded
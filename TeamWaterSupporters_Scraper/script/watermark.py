@@ -0,0 +1,145 @@
+"""
+watermark.py
+
+Remembers which supporters earlier runs already exported, newest first,
+so an incremental run can stop paginating the newest-first donations feed
+as soon as it reaches the newest records it exported before. Identical
+donations (same name, amount, date and message) are counted, not merged.
+"""
+import logging
+import csv
+import hashlib
+import json
+import os
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+FINGERPRINT_FIELDS = ["name", "amount", "date", "message"]
+MAX_FINGERPRINTS = 200000  # newest fingerprints kept in the watermark file
+ANCHOR_RUN = 5             # newest exported records the feed must repeat, in order, to stop
+
+
+# -----------------------------
+# Fingerprints
+# -----------------------------
+def fingerprint(record: dict) -> str:
+    """
+    Stable fingerprint of a cleaned supporter record (name, amount, date, message).
+    Whitespace is collapsed and amounts are normalised, so a record read back
+    from the CSV has the same fingerprint as the freshly scraped one.
+    """
+    parts = []
+    for field in FINGERPRINT_FIELDS:
+        value = record.get(field, "")
+        if field == "amount":
+            try:
+                value = f"{float(value):.2f}"
+            except (TypeError, ValueError):
+                value = ""
+        parts.append(" ".join(str(value or "").split()))
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def watermark_path(output_path: str) -> str:
+    """Watermark file kept next to the CSV it describes."""
+    return os.path.splitext(output_path)[0] + ".watermark.json"
+
+
+# -----------------------------
+# Watermark
+# -----------------------------
+class Watermark:
+    """
+    Already-exported supporter fingerprints, newest first, with a count per
+    fingerprint. The newest ANCHOR_RUN of them anchor the next incremental
+    run: everything the feed lists before that run is new.
+    """
+
+    def __init__(self, path: str, fingerprints=None):
+        self.path = path
+        self._order = list(fingerprints or [])
+        self._counts = Counter(self._order)
+        self._new = []
+
+    @classmethod
+    def load(cls, path: str):
+        """Load the watermark from `path` (empty if there is none yet)."""
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return cls(path, json.load(f).get("fingerprints", []))
+        return cls(path)
+
+    @classmethod
+    def from_csv(cls, path: str, csv_path: str):
+        """
+        Build the watermark for `path` from a CSV the current cleaner just
+        wrote (rows from older runs may be cleaned differently and would
+        never match a fresh row's fingerprint).
+        """
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            fingerprints = [fingerprint(row) for row in csv.DictReader(f)]
+        logger.info(f"Watermark built from {len(fingerprints)} exported rows")
+        return cls(path, fingerprints)
+
+    def __contains__(self, record: dict) -> bool:
+        return fingerprint(record) in self._counts
+
+    def __len__(self):
+        return len(self._order) + len(self._new)
+
+    @property
+    def counts(self) -> dict:
+        """Exported records per fingerprint (a copy)."""
+        return dict(self._counts)
+
+    def find_anchor(self, fingerprints: list, start: int = 0):
+        """
+        Position in `fingerprints` (the feed so far, newest first) where the
+        newest exported records appear again, in order, or None. Only
+        positions from `start` on are tried.
+        """
+        anchor = self._order[:ANCHOR_RUN]
+        if not anchor:
+            return None
+        for i in range(max(start, 0), len(fingerprints) - len(anchor) + 1):
+            if fingerprints[i:i + len(anchor)] == anchor:
+                return i
+        return None
+
+    def unseen(self, records: list) -> list:
+        """
+        The records of a complete feed (newest first) beyond the exported
+        count of each fingerprint: for a fingerprint exported n times, all
+        but its oldest n records. Used when the anchor is not found.
+        """
+        extra = Counter(fingerprint(record) for record in records)
+        extra.subtract(self._counts)
+        new = []
+        for record in records:
+            key = fingerprint(record)
+            if extra[key] > 0:
+                extra[key] -= 1
+                new.append(record)
+        return new
+
+    def add(self, record: dict):
+        """Mark a record as exported (records are added newest first)."""
+        key = fingerprint(record)
+        self._counts[key] += 1
+        self._new.append(key)
+
+    def save(self):
+        """Write the watermark atomically (new fingerprints first, capped at MAX_FINGERPRINTS)."""
+        fingerprints = (self._new + self._order)[:MAX_FINGERPRINTS]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprints": fingerprints}, f)
+        os.replace(tmp_path, self.path)
+        self._order, self._new = fingerprints, []
+        self._counts = Counter(fingerprints)